@@ -0,0 +1,98 @@
+"""Benchmark cluster_embeddings against the legacy n_init=10 + per-singleton loop.
+
+usage: PYTHONPATH=src python benchmarks/bench_clustering.py [--dim 512] [--k-selection silhouette]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from suno_backend.app.core.clustering import cluster_embeddings
+
+SIZES = [6, 60, 600, 6000, 50000]
+
+
+def legacy_cluster_embeddings(embeddings: List[np.ndarray], max_k: int = 3) -> List[List[int]]:
+    n = len(embeddings)
+    k0 = min(max_k, n)
+    if k0 == 1:
+        return [list(range(n))]
+    X = np.stack(embeddings)
+    kmeans = KMeans(n_clusters=k0, random_state=42, n_init=10, max_iter=300)
+    labels = kmeans.fit_predict(X)
+    clusters = {label: [] for label in range(k0)}
+    for idx, label in enumerate(labels):
+        clusters[label].append(idx)
+    large_labels = [label for label, members in clusters.items() if len(members) >= 2]
+    if large_labels:
+        for label, members in list(clusters.items()):
+            if len(members) == 1:
+                idx = members[0]
+                target = min(
+                    large_labels,
+                    key=lambda l: float(np.linalg.norm(X[idx] - kmeans.cluster_centers_[l])),
+                )
+                clusters[target].append(idx)
+                clusters[label] = []
+    merged = [sorted(members) for members in clusters.values() if members]
+    merged.sort(key=lambda c: (-len(c), min(c)))
+    return merged
+
+
+def make_embeddings(n: int, dim: int, k: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(k, dim)).astype(np.float32)
+    labels = rng.integers(0, k, size=n)
+    points = centers[labels] + rng.normal(scale=0.5, size=(n, dim)).astype(np.float32)
+    return list(points)
+
+
+def time_call(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--max-k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--legacy-max-n", type=int, default=6000)
+    parser.add_argument("--k-selection", choices=["fixed", "silhouette"], default="fixed")
+    args = parser.parse_args()
+    sel = args.k_selection
+
+    print(f"{'n':>7} {'auto_s':>10} {'kmeans_s':>10} {'minibatch_s':>12} {'legacy_s':>10} {'same':>5}")
+    for n in SIZES:
+        embeddings = make_embeddings(n, args.dim, args.max_k)
+        auto = time_call(
+            lambda: cluster_embeddings(embeddings, args.max_k, k_selection=sel), args.repeats
+        )
+        full = time_call(
+            lambda: cluster_embeddings(embeddings, args.max_k, "kmeans", sel), args.repeats
+        )
+        mini = time_call(
+            lambda: cluster_embeddings(embeddings, args.max_k, "minibatch", sel), args.repeats
+        )
+        legacy = "-"
+        same = "-"
+        if n <= args.legacy_max_n and sel == "fixed":
+            legacy = f"{time_call(lambda: legacy_cluster_embeddings(embeddings, args.max_k), 1):.4f}"
+            same = str(
+                legacy_cluster_embeddings(embeddings, args.max_k)
+                == cluster_embeddings(embeddings, args.max_k)
+            )
+        print(f"{n:>7} {auto:>10.4f} {full:>10.4f} {mini:>12.4f} {legacy:>10} {same:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Compare CLAP embedding cost and cluster stability: full clip vs bounded windows.
+
+Embeds every clip with the "full" strategy and with each windowed strategy, then reports
+per-clip embed time, frames decoded, cosine similarity to the full-clip embedding, and how
+well the clusters agree (adjusted Rand index of cluster_embeddings over the same clips;
+1.0 = identical grouping). Uses WAVs from --clips-dir, or synthesizes --clips clips of
+--seconds from a few distinct tone/rhythm families. Exits 1 when a strategy's ARI falls
+below --min-ari. Loads the CLAP model (downloads once).
+
+usage: PYTHONPATH=src python benchmarks/bench_embed_windows.py [--seconds 60] [--window-sec 10] [--num-windows 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from suno_backend.app.core.audio_windows import plan_windows
+from suno_backend.app.core.clustering import cluster_embeddings
+from suno_backend.app.services.clap_embedding_provider import ClapEmbeddingProvider
+
+STRATEGIES = ("first", "spread", "sliding")
+
+
+def _write_clip(path: Path, seconds: float, family: int, seed: int) -> None:
+    """One of a few families: base pitch, pulse rate and noise level differ per family."""
+    rng = np.random.default_rng(seed)
+    sample_rate = 48000
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    base = [110.0, 330.0, 880.0, 55.0][family % 4] * rng.uniform(0.97, 1.03)
+    pulse = 0.5 + 0.5 * np.sign(np.sin(2 * np.pi * [1.0, 2.5, 4.0, 0.5][family % 4] * t))
+    # slow drift so windows from different parts of a clip are not identical
+    drift = 1.0 + 0.05 * np.sin(2 * np.pi * t / max(seconds, 1.0))
+    tone = np.sin(2 * np.pi * base * drift * t) + 0.5 * np.sin(4 * np.pi * base * t)
+    signal = 0.3 * tone * pulse + [0.01, 0.05, 0.02, 0.1][family % 4] * rng.standard_normal(t.size)
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes(pcm.tobytes())
+
+
+def adjusted_rand_index(a: Sequence[int], b: Sequence[int]) -> float:
+    a_ids, a = np.unique(a, return_inverse=True)
+    b_ids, b = np.unique(b, return_inverse=True)
+    table = np.zeros((len(a_ids), len(b_ids)))
+    np.add.at(table, (a, b), 1)
+
+    def pairs(x: np.ndarray) -> float:
+        return float((x * (x - 1) / 2).sum())
+
+    index = pairs(table)
+    rows, cols, total = pairs(table.sum(axis=1)), pairs(table.sum(axis=0)), pairs(np.array([len(a)]))
+    expected = rows * cols / total if total else 0.0
+    maximum = (rows + cols) / 2
+    return 1.0 if maximum == expected else (index - expected) / (maximum - expected)
+
+
+def _labels(embeddings: List[np.ndarray], max_k: int) -> List[int]:
+    labels = [0] * len(embeddings)
+    for label, members in enumerate(cluster_embeddings(embeddings, max_k=max_k)):
+        for idx in members:
+            labels[idx] = label
+    return labels
+
+
+def _embed_all(provider: ClapEmbeddingProvider, paths: List[Path]) -> tuple[List[np.ndarray], float]:
+    start = time.perf_counter()
+    embeddings = [provider.embed_audio(path) for path in paths]
+    return embeddings, (time.perf_counter() - start) / len(paths)
+
+
+def _decoded_frames(paths: List[Path], strategy: str, args: argparse.Namespace) -> int:
+    total = 0
+    for path in paths:
+        with wave.open(str(path), "rb") as handle:
+            frames, rate = handle.getnframes(), handle.getframerate()
+        spans = plan_windows(
+            frames, rate, strategy, args.window_sec, args.num_windows, args.overlap, args.max_windows
+        )
+        total += sum(count for _, count in spans)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips-dir", type=Path, default=None, help="embed these *.wav instead")
+    parser.add_argument("--clips", type=int, default=12)
+    parser.add_argument("--families", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--window-sec", type=float, default=10.0)
+    parser.add_argument("--num-windows", type=int, default=3)
+    parser.add_argument("--overlap", type=float, default=0.5, help="sliding window overlap")
+    parser.add_argument("--max-windows", type=int, default=16)
+    parser.add_argument("--pooling", choices=["mean", "attention", "max"], default="mean")
+    parser.add_argument("--max-k", type=int, default=3)
+    parser.add_argument("--min-ari", type=float, default=0.8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.clips_dir is not None:
+            paths = sorted(args.clips_dir.glob("*.wav"))
+            if not paths:
+                raise SystemExit(f"no .wav files in {args.clips_dir}")
+        else:
+            paths = [Path(tmp) / f"clip{i}.wav" for i in range(args.clips)]
+            for i, path in enumerate(paths):
+                _write_clip(path, args.seconds, family=i % args.families, seed=i)
+
+        full = ClapEmbeddingProvider(window_strategy="full")
+        # warm-up so model init and first-call overheads are not billed to "full"
+        full.embed_audio(paths[0])
+        reference, full_sec = _embed_all(full, paths)
+        reference_labels = _labels(reference, args.max_k)
+        full_frames = _decoded_frames(paths, "full", args)
+
+        print(
+            f"{len(paths)} clips, window {args.window_sec:.0f}s, spread x{args.num_windows}, "
+            f"sliding overlap {args.overlap:.0%}, pooling {args.pooling}"
+        )
+        print(f"   full  embed={full_sec * 1000:8.1f} ms/clip  frames=100.0%")
+        results: Dict[str, float] = {}
+        for strategy in STRATEGIES:
+            provider = ClapEmbeddingProvider(
+                window_strategy=strategy,
+                window_sec=args.window_sec,
+                num_windows=args.num_windows,
+                window_overlap=args.overlap,
+                max_windows=args.max_windows,
+                window_pooling=args.pooling,
+            )
+            embeddings, per_clip = _embed_all(provider, paths)
+            cosines = [
+                float(e @ r / (np.linalg.norm(e) * np.linalg.norm(r) or 1.0))
+                for e, r in zip(embeddings, reference)
+            ]
+            ari = adjusted_rand_index(reference_labels, _labels(embeddings, args.max_k))
+            frames = _decoded_frames(paths, strategy, args)
+            results[strategy] = ari
+            print(
+                f"{strategy:>7}  embed={per_clip * 1000:8.1f} ms/clip  frames={frames / full_frames:6.1%}  "
+                f"speedup={full_sec / per_clip:5.2f}x  cos mean={np.mean(cosines):.3f} "
+                f"min={min(cosines):.3f}  ARI={ari:.3f}"
+            )
+
+    unstable = [name for name, ari in results.items() if ari < args.min_ari]
+    if unstable:
+        raise SystemExit(f"cluster assignments unstable (ARI < {args.min_ari}): {', '.join(unstable)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure logging overhead on the SessionService hot path at high request rates.
+
+Modes:
+  off           root at WARNING
+  legacy        synchronous handler, every per-clip line at INFO incl. embedding stats
+  queue         queue handler + sampled per-clip lines (the default configuration)
+  queue-debug   queue handler at DEBUG (all diagnostics computed)
+
+usage: PYTHONPATH=src python benchmarks/bench_logging.py [--requests 400] [--workers 16] [--slow-sink-ms 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from suno_backend.app.logging_config import configure_logging, stop_logging
+from suno_backend.app.models.domain import BriefParams
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+
+MODES = ["off", "legacy", "queue", "queue-debug"]
+legacy_logger = logging.getLogger("suno_backend.bench.legacy")
+
+
+class SlowSink:
+    """Stand-in for a congested stdout: every write costs a fixed delay."""
+
+    def __init__(self, delay_sec: float) -> None:
+        self.delay_sec = delay_sec
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        if self.delay_sec:
+            time.sleep(self.delay_sec)
+        self.lines += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+class LegacyDiagnosticsEmbedder(FakeEmbeddingProvider):
+    """Reproduce the pre-change per-clip INFO lines (start + stats with array2string)."""
+
+    def embed_audio(self, audio_path: Path) -> np.ndarray:
+        legacy_logger.info("embed_audio start path=%s", audio_path)
+        embedding = super().embed_audio(audio_path)
+        legacy_logger.info(
+            "embed_audio done path=%s shape=%s mean=%.4f std=%.4f first3=%s",
+            audio_path,
+            embedding.shape,
+            float(embedding.mean()),
+            float(embedding.std()),
+            np.array2string(embedding[:3], precision=4, floatmode="fixed"),
+        )
+        legacy_logger.info("finalized track path=%s", audio_path)
+        return embedding
+
+
+def run_mode(mode: str, args: argparse.Namespace, media_root: Path) -> None:
+    sink = SlowSink(args.slow_sink_ms / 1000.0)
+    if mode == "off":
+        configure_logging(level="WARNING", use_queue=False, stream=sink)
+    elif mode == "legacy":
+        configure_logging(level="INFO", use_queue=False, sample_rate=1.0, stream=sink)
+    elif mode == "queue":
+        configure_logging(level="INFO", use_queue=True, sample_rate=0.1, stream=sink)
+    else:
+        configure_logging(level="DEBUG", use_queue=True, sample_rate=0.1, stream=sink)
+
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(media_root),
+        embedder=LegacyDiagnosticsEmbedder() if mode == "legacy" else FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=media_root,
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.3,
+    )
+    params = BriefParams(energy=0.5, density=0.5, duration_sec=args.duration)
+
+    def one_request(_: int) -> float:
+        start = time.perf_counter()
+        service.create_initial_batch("bench brief", params, num_clips=args.clips)
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        latencies: List[float] = list(pool.map(one_request, range(args.requests)))
+    wall = time.perf_counter() - wall_start
+    stop_logging()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(
+        f"{mode:>12}  {args.requests / wall:8.1f} req/s  p50={p50:7.2f}ms  p99={p99:7.2f}ms  "
+        f"lines_written={sink.lines}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--clips", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=0.25, help="fake clip length (s)")
+    parser.add_argument("--slow-sink-ms", type=float, default=0.2, help="per-line write cost")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            run_mode(mode, args, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare WAV vs compressed renditions: bytes on the wire and time-to-first-audio.
+
+Writes synthetic 48 kHz mono clips, encodes them with MediaTranscoder (needs ffmpeg on PATH
+or --ffmpeg) and reports, per rendition, size vs WAV, encode latency (time until the
+rendition exists) and the download time at --mbps. Time-to-first-audio is estimated as the
+time for a client to fetch enough bytes to start playback (--prebuffer-sec of audio) once the
+rendition is available; WAV is available immediately.
+
+usage: PYTHONPATH=src python benchmarks/bench_media_delivery.py [--clips 6] [--seconds 30] [--mbps 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from suno_backend.app.services.media_transcoder import MediaTranscoder, rendition_path
+
+
+def _write_clip(path: Path, seconds: float, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * 48000)) / 48000.0
+    tone = sum(np.sin(2 * np.pi * f * t) for f in rng.uniform(110, 880, size=3))
+    signal = 0.2 * tone / 3 + 0.02 * rng.standard_normal(t.size)
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(48000)
+        handle.writeframes(pcm.tobytes())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=6)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--mbps", type=float, default=5.0, help="client downlink")
+    parser.add_argument("--prebuffer-sec", type=float, default=2.0, help="audio buffered before playback")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    args = parser.parse_args()
+
+    transcoder = MediaTranscoder(formats=["opus", "mp3"], max_workers=args.workers, ffmpeg_path=args.ffmpeg)
+    if not transcoder.enabled:
+        raise SystemExit(f"ffmpeg not found ({args.ffmpeg}); nothing to compare")
+    bytes_per_sec = args.mbps * 1e6 / 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wavs = [Path(tmp) / f"clip{i}.wav" for i in range(args.clips)]
+        for i, path in enumerate(wavs):
+            _write_clip(path, args.seconds, seed=i)
+        start = time.perf_counter()
+        futures = [transcoder.submit(path) for path in wavs]
+        ready_at: Dict[Path, float] = {}
+        for path, future in zip(wavs, futures):
+            future.result()
+            ready_at[path] = time.perf_counter() - start
+        transcoder.shutdown(wait=True)
+
+        rows: Dict[str, List[float]] = {"wav": [], "opus": [], "mp3": []}
+        ttfa: Dict[str, List[float]] = {"wav": [], "opus": [], "mp3": []}
+        for path in wavs:
+            for name in rows:
+                target = path if name == "wav" else rendition_path(path, name)
+                size = target.stat().st_size
+                rows[name].append(size)
+                prebuffer = size * min(1.0, args.prebuffer_sec / args.seconds)
+                available = 0.0 if name == "wav" else ready_at[path]
+                ttfa[name].append(available + prebuffer / bytes_per_sec)
+
+    wav_total = sum(rows["wav"])
+    print(f"{args.clips} clips x {args.seconds:.0f}s, downlink {args.mbps} Mbit/s")
+    for name, sizes in rows.items():
+        total = sum(sizes)
+        print(
+            f"{name:>5}  total={total / 2**20:8.2f} MiB  vs wav={total / wav_total:6.1%}  "
+            f"download={total / bytes_per_sec:7.2f}s  "
+            f"ttfa p50={np.percentile(ttfa[name], 50):6.2f}s max={max(ttfa[name]):6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""End-to-end SessionService benchmark on fake providers with configurable latency/failures.
+
+Every scenario in the grid (num_clips x concurrency x depth) runs --sessions sessions: one
+create_initial_batch, then `depth` more_like_cluster calls on a cluster of the latest batch.
+Prints throughput and p50/p95/p99 per operation and writes machine-readable JSON; with
+--baseline, p95/p99 regressions beyond --tolerance fail the run (exit 1).
+
+usage: PYTHONPATH=src python benchmarks/bench_session_service.py [--num-clips 2 6] [--concurrency 1 8]
+       [--depth 0 2] [--music-latency 0.05 --music-dist lognormal] [--output bench.json] [--baseline old.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from suno_backend.app.models.domain import BriefParams
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_latency import FakeLatency
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+
+OPS = ("create", "more_like")
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+def _latency(args: argparse.Namespace, stage: str, seed: int) -> FakeLatency:
+    return FakeLatency(
+        mean_sec=getattr(args, f"{stage}_latency"),
+        distribution=getattr(args, f"{stage}_dist"),
+        sigma=args.sigma,
+        failure_rate=getattr(args, f"{stage}_fail"),
+        seed=seed,
+    )
+
+
+def _summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, float]:
+    total = len(latencies) + errors
+    summary = {
+        "ops": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput_per_sec": total / wall if wall else 0.0,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        summary.update(
+            p50_ms=float(p50),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            mean_ms=float(np.mean(latencies) * 1000),
+        )
+    return summary
+
+
+def run_scenario(
+    args: argparse.Namespace, media_root: Path, num_clips: int, concurrency: int, depth: int
+) -> Dict[str, object]:
+    seed = args.seed
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(media_root, latency=_latency(args, "music", seed)),
+        embedder=FakeEmbeddingProvider(latency=_latency(args, "embed", seed + 1)),
+        namer=FakeClusterNamingProvider(latency=_latency(args, "namer", seed + 2)),
+        media_root=media_root,
+        max_batch_size=max(6, num_clips),
+        default_max_k=3,
+        min_similarity=0.3,
+    )
+    params = BriefParams(energy=0.5, density=0.5, duration_sec=args.duration)
+    samples: Dict[str, List[float]] = {op: [] for op in OPS}
+    errors: Dict[str, int] = {op: 0 for op in OPS}
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def timed(op: str, call):
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            with lock:
+                errors[op] += 1
+            return None
+        elapsed = time.perf_counter() - start
+        with lock:
+            samples[op].append(elapsed)
+        return result
+
+    def one_session(index: int) -> None:
+        session = timed(
+            "create",
+            lambda: service.create_initial_batch(f"bench brief {index}", params, num_clips=num_clips),
+        )
+        if session is None:
+            return
+        batch = session.batches[-1]
+        for _ in range(depth):
+            if not batch.clusters:
+                return
+            with lock:
+                cluster = rng.choice(batch.clusters)
+            more = timed(
+                "more_like",
+                lambda: service.more_like_cluster(session.id, cluster.id, num_clips=num_clips),
+            )
+            if more is not None:
+                batch = more
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_session, range(args.sessions)))
+    wall = time.perf_counter() - wall_start
+
+    result: Dict[str, object] = {
+        "num_clips": num_clips,
+        "concurrency": concurrency,
+        "depth": depth,
+        "sessions": args.sessions,
+        "wall_sec": wall,
+        "sessions_per_sec": args.sessions / wall if wall else 0.0,
+        "ops": {
+            op: _summarize(samples[op], errors[op], wall)
+            for op in OPS
+            if samples[op] or errors[op]
+        },
+    }
+    return result
+
+
+def _scenario_key(result: Dict[str, object]) -> str:
+    return f"clips={result['num_clips']} conc={result['concurrency']} depth={result['depth']}"
+
+
+def compare(results: List[Dict[str, object]], baseline_path: Path, tolerance: float) -> List[str]:
+    baseline = {
+        _scenario_key(item): item for item in json.loads(baseline_path.read_text())["scenarios"]
+    }
+    regressions = []
+    for result in results:
+        key = _scenario_key(result)
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for op, summary in result["ops"].items():
+            before = previous["ops"].get(op)
+            if not before:
+                continue
+            for metric in ("p95_ms", "p99_ms"):
+                if metric in summary and metric in before and summary[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{key} {op} {metric}: {before[metric]:.2f} -> {summary[metric]:.2f}"
+                    )
+    return regressions
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-clips", type=int, nargs="+", default=[2, 6])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--depth", type=int, nargs="+", default=[0, 2], help="more_like calls per session")
+    parser.add_argument("--sessions", type=int, default=40, help="sessions per scenario")
+    parser.add_argument("--duration", type=float, default=0.25, help="fake clip length (s)")
+    for stage, default in (("music", 0.05), ("embed", 0.002), ("namer", 0.01)):
+        parser.add_argument(f"--{stage}-latency", type=float, default=default, help="mean/median seconds")
+        parser.add_argument(f"--{stage}-dist", choices=DISTRIBUTIONS, default="lognormal")
+        parser.add_argument(f"--{stage}-fail", type=float, default=0.0, help="per-call failure rate")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal spread")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p95/p99 slowdown")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_clips, concurrency, depth in itertools.product(
+            args.num_clips, args.concurrency, args.depth
+        ):
+            result = run_scenario(args, Path(tmp), num_clips, concurrency, depth)
+            results.append(result)
+            for op, summary in result["ops"].items():
+                print(
+                    f"{_scenario_key(result):<28} {op:>9}  {summary['throughput_per_sec']:8.1f} op/s  "
+                    f"p50={summary.get('p50_ms', float('nan')):8.2f}ms  "
+                    f"p95={summary.get('p95_ms', float('nan')):8.2f}ms  "
+                    f"p99={summary.get('p99_ms', float('nan')):8.2f}ms  "
+                    f"errors={summary['error_rate']:.1%}"
+                )
+
+    config = {
+        key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()
+    }
+    report = {
+        "benchmark": "session_service",
+        "created_at": time.time(),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+        "scenarios": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"wrote {args.output}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
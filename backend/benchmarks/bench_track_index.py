@@ -0,0 +1,84 @@
+"""Build time, query latency and recall@k of TrackIndex (IVF-flat) vs an exact scan.
+
+Inserts --n synthetic clustered unit vectors of --dim in --batch sized adds (as sessions
+finalize tracks), waits for the background quantizer to train, then times --queries
+`search` calls and compares each result with a brute-force top-k over the same matrix.
+Exits 1 when recall@k falls below --min-recall.
+
+usage: PYTHONPATH=src python benchmarks/bench_track_index.py [--n 1000000] [--dim 512] [--nprobe 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from suno_backend.app.services.track_index import IndexedTrack, TrackIndex
+
+
+def _vectors(n: int, dim: int, centers: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim)).astype(np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        stop = min(n, start + 65536)
+        out[start:stop] = means[rng.integers(0, centers, stop - start)]
+        out[start:stop] += 0.5 * rng.normal(size=(stop - start, dim)).astype(np.float32)
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--centers", type=int, default=256, help="synthetic style clusters")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = _vectors(args.n, args.dim, args.centers, args.seed)
+    index = TrackIndex(nprobe=args.nprobe)
+    start = time.perf_counter()
+    for offset in range(0, args.n, args.batch):
+        chunk = vectors[offset : offset + args.batch]
+        tracks = [IndexedTrack(f"t{offset + i}", f"s{(offset + i) // 6}", float(offset + i), "") for i in range(len(chunk))]
+        index.add(tracks, chunk)
+    insert_sec = time.perf_counter() - start
+    while not index.trained and len(index) >= 4096:
+        time.sleep(0.1)
+    train_sec = time.perf_counter() - start - insert_sec
+    print(f"n={args.n} dim={args.dim} insert={insert_sec:.1f}s ({args.n / insert_sec:,.0f}/s) train wait={train_sec:.1f}s")
+
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, args.n, args.queries)
+    latencies, exact_latencies, hits = [], [], 0
+    for row in picks:
+        query = vectors[row] + 0.05 * rng.normal(size=args.dim).astype(np.float32)
+        t0 = time.perf_counter()
+        got = index.search(query, k=args.k)
+        latencies.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        exact = np.argpartition(-(vectors @ query), args.k)[: args.k]
+        exact_latencies.append(time.perf_counter() - t0)
+        hits += len({int(m.track.track_id[1:]) for m in got} & set(exact.tolist()))
+    recall = hits / (args.queries * args.k)
+    ms = np.array(latencies) * 1000
+    exact_ms = np.array(exact_latencies) * 1000
+    print(
+        f"ivf nprobe={args.nprobe}  p50={np.percentile(ms, 50):.2f} ms  p99={np.percentile(ms, 99):.2f} ms  "
+        f"recall@{args.k}={recall:.3f}"
+    )
+    print(f"exact scan     p50={np.percentile(exact_ms, 50):.2f} ms  p99={np.percentile(exact_ms, 99):.2f} ms")
+    if recall < args.min_recall:
+        raise SystemExit(f"recall@{args.k} {recall:.3f} < {args.min_recall}")
+
+
+if __name__ == "__main__":
+    main()
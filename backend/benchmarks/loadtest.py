@@ -0,0 +1,424 @@
+"""HTTP load test: boot the app under uvicorn against stub ElevenLabs/OpenAI servers and replay a request mix.
+
+The app runs as a subprocess with the real ElevenLabs and OpenAI providers pointed at local
+stub servers (lognormal latency, tunable). Requests are issued open-loop at each target RPS
+step (latency is measured from the scheduled send time, so queueing in the client counts).
+Reports per-step latency percentiles, error rates and the server's CPU / RSS (Linux /proc),
+and flags the first step that looks saturated.
+
+usage: PYTHONPATH=src python benchmarks/loadtest.py [--rps 1 2 4 8] [--step-sec 30] [--workers 1]
+       [--mix create=0.2,more=0.3,media=0.5] [--music-median 2.0] [--output loadtest.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BOUNDARY = "loadboundary"
+BRIEFS = [
+    "warm lofi piano with vinyl crackle",
+    "driving synthwave at night",
+    "sparse ambient drones, glassy pads",
+    "upbeat funk bass and brass stabs",
+    "dusty boom bap drums with jazz samples",
+]
+KINDS = ("create", "more", "media")
+
+
+class StubUpstream(ThreadingHTTPServer):
+    """Answers ElevenLabs /v1/music/detailed and OpenAI /v1/chat/completions with lognormal delays."""
+
+    daemon_threads = True
+
+    def __init__(self, median_sec: float, sigma: float, clip_sec: float, seed: int) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.median_sec = median_sec
+        self.sigma = sigma
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        pcm = np.random.default_rng(seed).integers(-2000, 2000, int(clip_sec * 48000), dtype=np.int16)
+        self.music_body = (
+            f"--{BOUNDARY}\r\nContent-Type: application/json\r\n\r\n{{}}\r\n"
+            f"--{BOUNDARY}\r\nContent-Type: audio/pcm\r\n\r\n".encode()
+            + pcm.tobytes()
+            + f"\r\n--{BOUNDARY}--\r\n".encode()
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            if self.median_sec <= 0:
+                return 0.0
+            return self.median_sec * self.rng.lognormvariate(0.0, self.sigma)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: StubUpstream
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        time.sleep(self.server.delay())
+        if self.path.startswith("/v1/chat/completions"):
+            label = random.choice(["velvet night drive", "glass rain", "dusty groove"])
+            body = json.dumps({"choices": [{"message": {"content": label}}]}).encode()
+            content_type = "application/json"
+        else:
+            body = self.server.music_body
+            content_type = f"multipart/mixed; boundary={BOUNDARY}"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _start(server: StubUpstream) -> StubUpstream:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class ProcessSampler:
+    """Samples CPU% and RSS of a process tree from /proc (the uvicorn master plus its workers)."""
+
+    def __init__(self, pid: int, interval_sec: float = 0.5) -> None:
+        self.pid = pid
+        self.interval_sec = interval_sec
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.samples: List[Tuple[float, float, float]] = []  # (t, cpu_percent, rss_mb)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for entry in Path("/proc").iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry.name))
+        tree, stack = [], [self.pid]
+        while stack:
+            pid = stack.pop()
+            tree.append(pid)
+            stack.extend(children.get(pid, []))
+        return tree
+
+    def _read(self) -> Tuple[float, float]:
+        cpu_sec = rss_bytes = 0.0
+        for pid in self._tree():
+            try:
+                fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            # fields after ")": state=0 ... utime=11 stime=12 ... rss=21 (pages)
+            cpu_sec += (int(fields[11]) + int(fields[12])) / self.ticks
+            rss_bytes += int(fields[21]) * self.page_size
+        return cpu_sec, rss_bytes
+
+    def _run(self) -> None:
+        last_t, last_cpu = time.perf_counter(), self._read()[0]
+        while not self._stop.wait(self.interval_sec):
+            now = time.perf_counter()
+            cpu, rss = self._read()
+            self.samples.append((now, 100.0 * (cpu - last_cpu) / (now - last_t), rss / 2**20))
+            last_t, last_cpu = now, cpu
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def window(self, start: float, end: float) -> Dict[str, float]:
+        rows = [row for row in self.samples if start <= row[0] <= end]
+        if not rows:
+            return {}
+        cpu = [row[1] for row in rows]
+        rss = [row[2] for row in rows]
+        return {
+            "cpu_percent_mean": float(np.mean(cpu)),
+            "cpu_percent_max": float(np.max(cpu)),
+            "rss_mb_mean": float(np.mean(rss)),
+            "rss_mb_max": float(np.max(rss)),
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def boot_app(args: argparse.Namespace, music: StubUpstream, namer: StubUpstream, media_root: Path):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_DIR / "src"), os.environ.get("PYTHONPATH")])),
+        "MUSIC_PROVIDER": "elevenlabs",
+        "ELEVENLABS_API_KEY": "loadtest",
+        "ELEVENLABS_OUTPUT_FORMAT": "pcm_48000",
+        "SUNO_LAB_ELEVENLABS_API_URL": music.url,
+        "SUNO_LAB_OPENAI_API_KEY": "loadtest",
+        "SUNO_LAB_OPENAI_API_URL": namer.url,
+        "USE_FAKE_NAMER": "false",
+        "SUNO_LAB_CLAP_ENABLED": "true" if args.clap else "false",
+        "SUNO_LAB_MEDIA_ROOT": str(media_root),
+        "SUNO_LAB_LOG_LEVEL": "WARNING",
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "suno_backend.app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.boot_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"app exited during boot (code {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("app did not become healthy in time")
+
+
+class LoadClient:
+    """Open-loop request issuer that learns session/cluster ids and media URLs from responses."""
+
+    def __init__(self, args: argparse.Namespace, base_url: str, mix: Dict[str, float]) -> None:
+        self.args = args
+        self.base_url = base_url
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.clusters: Deque[Tuple[str, str]] = deque(maxlen=500)
+        self.media: Deque[str] = deque(maxlen=2000)
+        self.http = httpx.Client(
+            base_url=base_url,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.max_inflight),
+        )
+
+    def _pick(self) -> Tuple[str, object]:
+        with self.lock:
+            kind = self.rng.choices(self.kinds, self.weights)[0]
+            if kind == "more" and self.clusters:
+                return kind, self.rng.choice(self.clusters)
+            if kind == "media" and self.media:
+                return kind, self.rng.choice(self.media)
+            return "create", self.rng.choice(BRIEFS)
+
+    def _learn(self, session_id: str, batch: dict) -> None:
+        with self.lock:
+            for cluster in batch.get("clusters", []):
+                self.clusters.append((session_id, cluster["id"]))
+                self.media.extend(track["audio_url"] for track in cluster.get("tracks", []))
+
+    def one(self, scheduled_at: float) -> Tuple[str, float, str]:
+        kind, target = self._pick()
+        params = {"energy": 0.5, "density": 0.5, "duration_sec": self.args.clip_sec}
+        try:
+            if kind == "create":
+                response = self.http.post(
+                    "/sessions",
+                    json={"brief": target, "params": params, "num_clips": self.args.num_clips},
+                )
+            elif kind == "more":
+                session_id, cluster_id = target
+                response = self.http.post(
+                    f"/sessions/{session_id}/clusters/{cluster_id}/more",
+                    json={"num_clips": self.args.num_clips},
+                )
+            else:
+                response = self.http.get(str(target))
+            outcome = str(response.status_code)
+            if response.status_code == 200 and kind != "media":
+                payload = response.json()
+                self._learn(payload["session_id"], payload["batch"])
+        except httpx.HTTPError as exc:
+            outcome = type(exc).__name__
+        return kind, time.perf_counter() - scheduled_at, outcome
+
+    def run_step(self, rps: float) -> Tuple[List[Tuple[str, float, str]], float, float, float]:
+        count = max(1, int(rps * self.args.step_sec))
+        with ThreadPoolExecutor(max_workers=self.args.max_inflight) as pool:
+            start = time.perf_counter()
+            futures = []
+            offset = 0.0
+            for _ in range(count):
+                offset += self.rng.expovariate(rps) if self.args.poisson else 1.0 / rps
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self.one, start + offset))
+            results = [future.result() for future in futures]
+        end = time.perf_counter()
+        return results, start, end, end - start
+
+
+def summarize_step(
+    rps: float, results: List[Tuple[str, float, str]], wall: float, resources: Dict[str, float]
+) -> Dict[str, object]:
+    step: Dict[str, object] = {
+        "target_rps": rps,
+        "achieved_rps": len(results) / wall if wall else 0.0,
+        "requests": len(results),
+        "error_rate": sum(1 for _, _, outcome in results if not outcome.startswith("2")) / max(1, len(results)),
+        "server": resources,
+        "by_kind": {},
+    }
+    for kind in KINDS:
+        rows = [row for row in results if row[0] == kind]
+        if not rows:
+            continue
+        latencies = [row[1] for row in rows]
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        errors = sum(1 for _, _, outcome in rows if not outcome.startswith("2"))
+        step["by_kind"][kind] = {
+            "requests": len(rows),
+            "error_rate": errors / len(rows),
+            "outcomes": dict(Counter(outcome for _, _, outcome in rows)),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+    return step
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind '{kind}' (expected {KINDS})")
+        mix[kind] = float(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--step-sec", type=float, default=30.0, help="duration of each RPS step")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("create=0.2,more=0.3,media=0.5"))
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--num-clips", type=int, default=4)
+    parser.add_argument("--clip-sec", type=float, default=2.0)
+    parser.add_argument("--music-median", type=float, default=2.0, help="stub ElevenLabs median latency (s)")
+    parser.add_argument("--namer-median", type=float, default=0.3, help="stub OpenAI median latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal spread for both stubs")
+    parser.add_argument("--clap", action="store_true", help="embed with CLAP instead of the fake embedder")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--boot-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    args = parser.parse_args()
+
+    music = _start(StubUpstream(args.music_median, args.sigma, args.clip_sec, args.seed))
+    namer = _start(StubUpstream(args.namer_median, args.sigma, args.clip_sec, args.seed + 1))
+    steps: List[Dict[str, object]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        process, base_url = boot_app(args, music, namer, Path(tmp))
+        sampler = ProcessSampler(process.pid)
+        sampler.start()
+        client = LoadClient(args, base_url, args.mix)
+        try:
+            for rps in args.rps:
+                results, start, end, wall = client.run_step(rps)
+                step = summarize_step(rps, results, wall, sampler.window(start, end))
+                steps.append(step)
+                server = step["server"]
+                print(
+                    f"rps={rps:6.2f} achieved={step['achieved_rps']:6.2f} errors={step['error_rate']:.1%} "
+                    f"cpu={server.get('cpu_percent_mean', float('nan')):6.1f}% "
+                    f"rss_max={server.get('rss_mb_max', float('nan')):7.1f}MB"
+                )
+                for kind, summary in step["by_kind"].items():
+                    print(
+                        f"    {kind:>6} n={summary['requests']:<5} p50={summary['p50_ms']:8.1f}ms "
+                        f"p95={summary['p95_ms']:8.1f}ms p99={summary['p99_ms']:8.1f}ms "
+                        f"errors={summary['error_rate']:.1%}"
+                    )
+        finally:
+            sampler.stop()
+            client.http.close()
+            process.terminate()
+            process.wait(timeout=30)
+            music.shutdown()
+            namer.shutdown()
+
+    # saturated: throughput stops tracking the target or errors appear
+    saturated = next(
+        (
+            step["target_rps"]
+            for step in steps
+            if step["achieved_rps"] < 0.9 * step["target_rps"] or step["error_rate"] > 0.01
+        ),
+        None,
+    )
+    print(f"saturation: {'not reached' if saturated is None else f'at {saturated} rps'}")
+    print(f"upstream calls: elevenlabs={music.requests} openai={namer.requests}")
+    if args.output:
+        report = {
+            "benchmark": "loadtest",
+            "created_at": time.time(),
+            "config": {
+                key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()
+            },
+            "steps": steps,
+            "saturation_rps": saturated,
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Simulate hedged clip generation against a stub ElevenLabs server with heavy-tailed delays.
+
+Runs the same batches through ElevenLabsMusicProvider with and without a Hedger and
+reports batch latency percentiles, extra requests spent and measured latency saved.
+
+usage: PYTHONPATH=src python benchmarks/simulate_hedging.py [--batches 40] [--clips 6]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from suno_backend.app.services.elevenlabs_music_provider import ElevenLabsMusicProvider
+from suno_backend.app.services.hedging import Hedger
+
+BOUNDARY = "simboundary"
+BODY = (
+    f"--{BOUNDARY}\r\nContent-Type: audio/wav\r\n\r\n".encode()
+    + b"\x00\x10" * 4800
+    + f"\r\n--{BOUNDARY}--\r\n".encode()
+)
+
+
+class HeavyTailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, median_sec: float, sigma: float, seed: int) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.median_sec = median_sec
+        self.sigma = sigma
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            return self.median_sec * self.rng.lognormvariate(0.0, self.sigma)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: HeavyTailServer
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        time.sleep(self.server.delay())
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/mixed; boundary={BOUNDARY}")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def run(args: argparse.Namespace, hedger: Hedger | None) -> None:
+    server = HeavyTailServer(args.median, args.sigma, args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            provider = ElevenLabsMusicProvider(
+                media_root=Path(tmp),
+                api_key="sim",
+                output_format="pcm_48000",
+                max_concurrency=args.clips,
+                api_url=f"http://127.0.0.1:{server.server_address[1]}",
+                hedger=hedger,
+            )
+            latencies: List[float] = []
+            for _ in range(args.batches):
+                start = time.perf_counter()
+                provider.generate_batch("sim", args.clips, 1.0)
+                latencies.append(time.perf_counter() - start)
+            # let in-flight losers land so saved latency is fully measured
+            time.sleep(args.median * 4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    label = "hedged" if hedger else "baseline"
+    overhead = server.requests / float(args.batches * args.clips) - 1.0
+    print(
+        f"{label:>9}  p50={p50:6.3f}s  p95={p95:6.3f}s  p99={p99:6.3f}s  "
+        f"extra_requests={overhead:6.1%}"
+    )
+    if hedger:
+        stats = hedger.snapshot()
+        print(
+            f"{'':>9}  hedges_fired={stats['hedges_fired']}  hedges_won={stats['hedges_won']}  "
+            f"latency_saved={stats['latency_saved_sec']:.2f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=40)
+    parser.add_argument("--clips", type=int, default=6)
+    parser.add_argument("--median", type=float, default=0.05, help="median request delay (s)")
+    parser.add_argument("--sigma", type=float, default=1.0, help="lognormal shape; higher = heavier tail")
+    parser.add_argument("--max-hedges", type=int, default=2)
+    parser.add_argument("--hedge-when-remaining", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run(args, hedger=None)
+    run(
+        args,
+        hedger=Hedger(
+            max_hedges_per_batch=args.max_hedges,
+            hedge_when_remaining=args.hedge_when_remaining,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
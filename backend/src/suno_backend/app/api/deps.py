@@ -1,22 +1,35 @@
 from __future__ import annotations
 
 import logging
+from uuid import UUID
 
 from fastapi import Depends
 
+from suno_backend.app.metrics import SESSION_STORE_BYTES, SESSIONS_RESIDENT
+
+from suno_backend.app.profiling import ProfileStore
+from suno_backend.app.services.cached_embedding_provider import CachingEmbeddingProvider
+from suno_backend.app.services.cached_music_provider import CachingMusicProvider
+from suno_backend.app.services.candidate_pool import CandidatePool
 from suno_backend.app.services.clap_embedding_provider import ClapEmbeddingProvider
+from suno_backend.app.services.clip_streams import ClipStreamHub
 from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
 from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
 from suno_backend.app.services.fake_music_provider import FakeMusicProvider
 from suno_backend.app.services.elevenlabs_music_provider import ElevenLabsMusicProvider
+from suno_backend.app.services.hedging import Hedger
+from suno_backend.app.services.media_janitor import MediaJanitor
+from suno_backend.app.services.media_transcoder import MediaTranscoder
 from suno_backend.app.services.openai_cluster_naming_provider import OpenAiClusterNamingProvider
 from suno_backend.app.services.providers import (
     ClusterNamingProvider,
     EmbeddingProvider,
     MusicProvider,
 )
+from suno_backend.app.services.request_scheduler import CircuitBreaker, RequestScheduler
 from suno_backend.app.services.session_service import SessionService
 from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.services.track_index import TrackIndex
 from suno_backend.app.settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
@@ -25,16 +38,41 @@ _session_store: SessionStore | None = None
 _music_provider: MusicProvider | None = None
 _embedding_provider: EmbeddingProvider | None = None
 _cluster_namer: ClusterNamingProvider | None = None
+_candidate_pool: CandidatePool | None = None
 _session_service: SessionService | None = None
+_profile_store: ProfileStore | None = None
+_media_transcoder: MediaTranscoder | None = None
+_media_janitor: MediaJanitor | None = None
+_clip_stream_hub: ClipStreamHub | None = None
+_track_index: TrackIndex | None = None
 
 
 def get_session_store() -> SessionStore:
     global _session_store
     if _session_store is None:
-        _session_store = SessionStore()
+        settings = get_settings()
+        store = SessionStore(
+            max_sessions=settings.session_max_sessions,
+            max_bytes=settings.session_max_bytes,
+            ttl_sec=settings.session_ttl_sec,
+            on_evict=_release_session,
+        )
+        SESSIONS_RESIDENT.set_function(store.session_count)
+        SESSION_STORE_BYTES.set_function(lambda: store.resident_bytes)
+        _session_store = store
     return _session_store
 
 
+def _release_session(session_id: UUID) -> None:
+    """SessionStore eviction hook: drop the session's pooled candidates and its media."""
+    pool = get_candidate_pool()
+    if pool is not None:
+        pool.discard_session(session_id)
+    if get_settings().session_evict_media:
+        janitor = get_media_janitor()
+        janitor.schedule_delete(janitor.media_root / str(session_id), reason="session")
+
+
 def get_music_provider() -> MusicProvider:
     global _music_provider
     if _music_provider is None:
@@ -49,9 +87,36 @@ def get_music_provider() -> MusicProvider:
                 api_key=settings.elevenlabs_api_key,
                 output_format=settings.elevenlabs_output_format,
                 force_instrumental=settings.elevenlabs_force_instrumental,
+                max_concurrency=settings.elevenlabs_max_concurrency,
+                api_url=settings.elevenlabs_api_url,
+                scheduler=RequestScheduler(
+                    max_concurrency=settings.elevenlabs_concurrency_limit,
+                    max_retries=settings.elevenlabs_max_retries,
+                    base_backoff_sec=settings.elevenlabs_backoff_base_sec,
+                    max_backoff_sec=settings.elevenlabs_backoff_max_sec,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.elevenlabs_circuit_failure_threshold,
+                        reset_timeout_sec=settings.elevenlabs_circuit_reset_sec,
+                    ),
+                ),
+                hedger=(
+                    Hedger(
+                        max_hedges_per_batch=settings.elevenlabs_hedge_max_per_batch,
+                        hedge_when_remaining=settings.elevenlabs_hedge_when_remaining,
+                    )
+                    if settings.elevenlabs_hedge_enabled
+                    else None
+                ),
             )
         else:
             raise ValueError(f"unsupported music_provider '{settings.music_provider}'")
+        if settings.generation_cache_enabled:
+            _music_provider = CachingMusicProvider(
+                _music_provider,
+                media_root=settings.media_root,
+                cache_root=settings.generation_cache_root,
+                max_clips_per_key=settings.generation_cache_max_clips_per_key,
+            )
         logger.info("music provider initialized: %s", type(_music_provider).__name__)
     return _music_provider
 
@@ -61,9 +126,20 @@ def get_embedding_provider() -> EmbeddingProvider:
     if _embedding_provider is None:
         settings = get_settings()
         if settings.clap_enabled:
-            _embedding_provider = ClapEmbeddingProvider(settings.clap_model_name)
+            inner: EmbeddingProvider = ClapEmbeddingProvider(
+                settings.clap_model_name,
+                window_strategy=settings.clap_window_strategy,
+                window_sec=settings.clap_window_sec,
+                num_windows=settings.clap_num_windows,
+                window_overlap=settings.clap_window_overlap,
+                max_windows=settings.clap_max_windows,
+                window_pooling=settings.clap_window_pooling,
+            )
         else:
-            _embedding_provider = FakeEmbeddingProvider()
+            inner = FakeEmbeddingProvider()
+        _embedding_provider = CachingEmbeddingProvider(
+            inner, max_text_entries=settings.text_embedding_cache_size
+        )
     return _embedding_provider
 
 
@@ -72,12 +148,86 @@ def get_cluster_namer() -> ClusterNamingProvider:
     if _cluster_namer is None:
         settings = get_settings()
         if settings.openai_api_key and not settings.use_fake_namer:
-            _cluster_namer = OpenAiClusterNamingProvider(settings.openai_api_key)
+            _cluster_namer = OpenAiClusterNamingProvider(
+                settings.openai_api_key, api_url=settings.openai_api_url
+            )
         else:
             _cluster_namer = FakeClusterNamingProvider()
     return _cluster_namer
 
 
+def get_candidate_pool() -> CandidatePool | None:
+    global _candidate_pool
+    settings = get_settings()
+    if not settings.candidate_pool_enabled:
+        return None
+    if _candidate_pool is None:
+        _candidate_pool = CandidatePool(
+            settings.media_root,
+            max_age_sec=settings.candidate_pool_max_age_sec,
+            max_per_session=settings.candidate_pool_max_per_session,
+            max_total_bytes=settings.candidate_pool_max_bytes,
+        )
+    return _candidate_pool
+
+
+def get_media_transcoder() -> MediaTranscoder:
+    global _media_transcoder
+    if _media_transcoder is None:
+        settings = get_settings()
+        _media_transcoder = MediaTranscoder(
+            formats=settings.media_rendition_list,
+            max_workers=settings.media_transcode_workers,
+            ffmpeg_path=settings.media_ffmpeg_path,
+            bitrates_kbps={
+                "opus": settings.media_opus_bitrate_kbps,
+                "mp3": settings.media_mp3_bitrate_kbps,
+            },
+        )
+    return _media_transcoder
+
+
+def shutdown_media_transcoder() -> None:
+    global _media_transcoder
+    if _media_transcoder is not None:
+        _media_transcoder.shutdown()
+        _media_transcoder = None
+
+
+def get_media_janitor() -> MediaJanitor:
+    global _media_janitor
+    if _media_janitor is None:
+        settings = get_settings()
+        _media_janitor = MediaJanitor(
+            settings.media_root,
+            quota_bytes=settings.media_quota_bytes,
+            tmp_max_age_sec=settings.media_tmp_max_age_sec,
+            min_idle_sec=settings.media_evict_min_idle_sec,
+            interval_sec=settings.media_janitor_interval_sec,
+            on_delete=_forget_media,
+        )
+    return _media_janitor
+
+
+def _forget_media(session_id: str) -> None:
+    """MediaJanitor delete hook: drop pooled candidates and index entries whose audio is gone."""
+    pool = get_candidate_pool()
+    if pool is not None:
+        pool.discard_session(UUID(session_id))
+    index = get_track_index()
+    if index is not None:
+        removed = index.remove_session(session_id)
+        if removed:
+            logger.info("track index removed session_id=%s tracks=%s", session_id, removed)
+
+
+def shutdown_media_janitor() -> None:
+    global _media_janitor
+    if _media_janitor is not None:
+        _media_janitor.stop()
+        _media_janitor = None
+
+
 def get_session_service(
     store: SessionStore = Depends(get_session_store),
     music: MusicProvider = Depends(get_music_provider),
@@ -106,5 +256,47 @@ def get_session_service(
             max_batch_size=settings.max_batch_size,
             default_max_k=settings.default_max_k,
             min_similarity=settings.min_similarity,
+            cluster_algorithm=settings.cluster_algorithm,
+            k_selection=settings.cluster_k_selection,
+            more_like_assignment=settings.more_like_assignment,
+            oversample=settings.more_like_oversample,
+            oversample_max_factor=settings.oversample_max_factor,
+            candidate_pool=get_candidate_pool(),
+            deadline_reserve_sec=settings.deadline_reserve_sec,
+            transcoder=get_media_transcoder(),
+            prompt_filter=settings.prompt_filter,
+            prompt_min_similarity=settings.prompt_filter_min_similarity,
+            prompt_min_keep=settings.prompt_filter_min_keep,
+            track_index=get_track_index(),
         )
     return _session_service
+
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        settings = get_settings()
+        _profile_store = ProfileStore(
+            settings.profiling_root, max_profiles=settings.profiling_max_profiles
+        )
+    return _profile_store
+
+
+def get_clip_stream_hub() -> ClipStreamHub:
+    global _clip_stream_hub
+    if _clip_stream_hub is None:
+        settings = get_settings()
+        _clip_stream_hub = ClipStreamHub(
+            linger_sec=settings.stream_linger_sec, max_streams=settings.stream_max_streams
+        )
+    return _clip_stream_hub
+
+
+def get_track_index() -> TrackIndex | None:
+    global _track_index
+    settings = get_settings()
+    if not settings.track_index_enabled:
+        return None
+    if _track_index is None:
+        _track_index = TrackIndex(settings.track_index_root, nprobe=settings.track_index_nprobe)
+    return _track_index
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from suno_backend.app.api.deps import get_media_janitor
+from suno_backend.app.metrics import MEDIA_BYTES_SAVED, MEDIA_BYTES_SERVED
+from suno_backend.app.services.media_janitor import MediaJanitor
+from suno_backend.app.services.media_transcoder import RENDITIONS, WAV_MEDIA_TYPE, rendition_path
+from suno_backend.app.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_UUID = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+_SESSION_DIR = re.compile(rf"^{_UUID}$")
+_TRACK_FILE = re.compile(rf"^({_UUID})\.(wav|opus|mp3)$")
+
+
+def _parse_accept(header: str) -> List[Tuple[str, float]]:
+    ranges: List[Tuple[str, float]] = []
+    for part in header.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def _quality(media_type: str, ranges: Sequence[Tuple[str, float]]) -> Tuple[float, int]:
+    """(q, specificity) from the most specific matching range; explicit types beat wildcards."""
+    major = media_type.split("/", 1)[0]
+    best: Tuple[float, int] | None = None
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{major}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if best is None or specificity > best[1]:
+            best = (q, specificity)
+    return best or (0.0, -1)
+
+
+def negotiate(accept: str | None, candidates: Sequence[Tuple[str, str]]) -> str | None:
+    """Pick a rendition name from (name, media_type) candidates listed in server preference order.
+
+    Highest q wins, then the more specific match, then server order; a missing Accept
+    header accepts anything.
+    """
+    if not candidates:
+        return None
+    if not accept:
+        return candidates[0][0]
+    ranges = _parse_accept(accept)
+    scored = []
+    for index, (name, media_type) in enumerate(candidates):
+        q, specificity = _quality(media_type, ranges)
+        if q > 0:
+            scored.append((q, specificity, -index, name))
+    return max(scored)[3] if scored else None
+
+
+@dataclass(frozen=True)
+class _Resolved:
+    path: Path
+    track_id: str
+    rendition: str
+    media_type: str
+    # False while a better rendition may still appear at the same negotiated URL
+    final: bool
+
+
+def _resolve(
+    settings: Settings, session_id: str, filename: str, accept: str | None, fmt: str | None
+) -> _Resolved:
+    match = _TRACK_FILE.match(filename)
+    if not _SESSION_DIR.match(session_id) or match is None:
+        raise HTTPException(status_code=404, detail="not found")
+    track_id, requested = match.group(1), match.group(2)
+    wav_path = settings.media_root / session_id / f"{track_id}.wav"
+    if requested != "wav":
+        path = rendition_path(wav_path, requested)
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail="not found")
+        return _Resolved(path, track_id, requested, RENDITIONS[requested].media_type, True)
+
+    configured = settings.media_rendition_list
+    candidates = [
+        (name, RENDITIONS[name].media_type)
+        for name in configured
+        if rendition_path(wav_path, name).is_file()
+    ]
+    final = fmt is not None or len(candidates) == len(configured)
+    if wav_path.is_file():
+        candidates.append(("wav", WAV_MEDIA_TYPE))
+    if fmt is not None:
+        candidates = [candidate for candidate in candidates if candidate[0] == fmt]
+    chosen = negotiate(accept, candidates)
+    if chosen is None:
+        if not candidates:
+            raise HTTPException(status_code=404, detail="not found")
+        raise HTTPException(status_code=406, detail="no acceptable audio rendition")
+    if chosen == "wav":
+        return _Resolved(wav_path, track_id, "wav", WAV_MEDIA_TYPE, final)
+    return _Resolved(
+        rendition_path(wav_path, chosen), track_id, chosen, RENDITIONS[chosen].media_type, final
+    )
+
+
+class MediaFileResponse(FileResponse):
+    # fewer event-loop round trips per track than starlette's 64 KiB default
+    chunk_size = 256 * 1024
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _range_length(range_header: str | None, size: int) -> int:
+    """Bytes a single `bytes=a-b` range will send (full size for anything else)."""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return size
+    first, _, last = range_header[6:].partition("-")
+    try:
+        if not first:
+            return min(size, int(last))
+        start = int(first)
+        end = min(size - 1, int(last)) if last else size - 1
+    except ValueError:
+        return size
+    return max(0, end - start + 1)
+
+
+@router.api_route("/media/{session_id}/{filename}", methods=["GET", "HEAD"])
+def get_media(
+    session_id: str,
+    filename: str,
+    request: Request,
+    fmt: str | None = Query(default=None, alias="format", pattern="^(wav|opus|mp3)$"),
+    settings: Settings = Depends(get_settings),
+    janitor: MediaJanitor = Depends(get_media_janitor),
+):
+    """Serve a track; `<track>.wav` URLs are content-negotiated to a compressed rendition.
+
+    Track files never change once written, so responses carry a strong ETag and, once the
+    negotiated representation is final, `Cache-Control: immutable`. Ranges are handled by
+    FileResponse (zero-copy via the ASGI pathsend extension where the server supports it),
+    or the bytes are handed to a fronting proxy with X-Accel-Redirect.
+    """
+    resolved = _resolve(settings, session_id, filename, request.headers.get("accept"), fmt)
+    try:
+        stat_result = resolved.path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="not found")
+    etag = f'"{resolved.track_id}.{resolved.rendition}.{stat_result.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept",
+        "Cache-Control": (
+            f"public, max-age={settings.media_cache_max_age_sec}, immutable"
+            if resolved.final
+            else "public, no-cache"
+        ),
+    }
+    if request.method == "GET":
+        # a revalidated replay counts as a play too
+        janitor.touch(session_id)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if request.method == "GET":
+        _record_bytes(
+            resolved.path,
+            resolved.rendition,
+            _range_length(request.headers.get("range"), stat_result.st_size),
+        )
+    if settings.media_accel_redirect_prefix:
+        prefix = settings.media_accel_redirect_prefix.rstrip("/")
+        headers["X-Accel-Redirect"] = f"{prefix}/{session_id}/{resolved.path.name}"
+        return Response(media_type=resolved.media_type, headers=headers)
+    return MediaFileResponse(
+        resolved.path, media_type=resolved.media_type, headers=headers, stat_result=stat_result
+    )
+
+
+def _record_bytes(path: Path, rendition: str, sent: int) -> None:
+    MEDIA_BYTES_SERVED.inc(sent, rendition=rendition)
+    if rendition != "wav":
+        try:
+            wav_size = path.with_suffix(".wav").stat().st_size
+            size = path.stat().st_size
+        except OSError:
+            return
+        # scale by the share of the file this response covers
+        MEDIA_BYTES_SAVED.inc(max(0, wav_size - size) * (sent / size if size else 0))
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from suno_backend.app.api.deps import get_profile_store
+from suno_backend.app.profiling import ProfileCapture, ProfilerBusyError, ProfileStore
+from suno_backend.app.request_context import current_request_id
+from suno_backend.app.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _require_profiling(settings: Settings = Depends(get_settings)) -> None:
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=403, detail="profiling is disabled")
+
+
+router = APIRouter(dependencies=[Depends(_require_profiling)])
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def profile_requested(request: Request) -> bool:
+    flag = request.query_params.get("profile") or request.headers.get("x-profile") or ""
+    return flag.strip().lower() in _TRUTHY
+
+
+@contextmanager
+def maybe_profile(
+    request: Request,
+    response: Response,
+    settings: Settings,
+    store: ProfileStore,
+) -> Iterator[ProfileCapture | None]:
+    """Profile the enclosed service call when the request asks for it; sets X-Profile-ID."""
+    if not profile_requested(request):
+        yield None
+        return
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=403, detail="profiling is disabled")
+    try:
+        with store.capture(
+            label=f"{request.method} {request.url.path}",
+            metadata={"request_id": current_request_id()},
+        ) as capture:
+            response.headers["X-Profile-ID"] = capture.profile_id
+            yield capture
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/profiles")
+def list_profiles(store: ProfileStore = Depends(get_profile_store)) -> List[Dict[str, Any]]:
+    return store.list()
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str, store: ProfileStore = Depends(get_profile_store)
+) -> Dict[str, Any]:
+    meta = store.get(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return meta
+
+
+@router.get("/profiles/{profile_id}/{artifact}")
+def download_profile_artifact(
+    profile_id: str, artifact: str, store: ProfileStore = Depends(get_profile_store)
+):
+    path = store.artifact_path(profile_id, artifact)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="artifact not found")
+    media_type = "application/json" if path.suffix == ".json" else "text/plain; charset=utf-8"
+    if path.suffix == ".pstats":
+        media_type = "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=f"{profile_id}-{artifact}")
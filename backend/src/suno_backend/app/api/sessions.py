@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import contextvars
 import logging
+import threading
 import wave
 from pathlib import Path
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
-from suno_backend.app.api.deps import get_music_provider, get_session_service
+from suno_backend.app.api.deps import (
+    get_clip_stream_hub,
+    get_media_janitor,
+    get_music_provider,
+    get_profile_store,
+    get_session_service,
+)
+from suno_backend.app.api.profiles import maybe_profile
+from suno_backend.app.api.streams import iter_events
+from suno_backend.app.metrics import stage_timer
+from suno_backend.app.profiling import ProfileStore
 from suno_backend.app.models.api import (
     BatchOut,
     ClusterOut,
@@ -19,14 +32,17 @@ from suno_backend.app.models.api import (
     MusicSettingsUpdate,
     TrackOut,
 )
+from suno_backend.app.request_context import bind_deadline
+from suno_backend.app.services.clip_streams import ClipObserver, ClipStreamHub, bind_clip_observer
+from suno_backend.app.services.media_janitor import MediaJanitor
 from suno_backend.app.services.session_service import (
+    DeadlineExceededError,
     GenerationFailedError,
     InvalidRequestError,
     NotFoundError,
     SessionService,
 )
-from suno_backend.app.media_utils import clear_media_root
-from suno_backend.app.settings import get_settings
+from suno_backend.app.settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +85,11 @@ def _batch_to_out(batch, media_root: Path) -> BatchOut:
 @router.post("/sessions", response_model=CreateSessionResponse)
 def create_session_endpoint(
     body: CreateSessionRequest,
+    request: Request,
+    response: Response,
     service: SessionService = Depends(get_session_service),
+    settings: Settings = Depends(get_settings),
+    profiles: ProfileStore = Depends(get_profile_store),
 ):
     try:
         logger.info(
@@ -78,18 +98,25 @@ def create_session_endpoint(
             body.num_clips,
             getattr(body.params, "duration_sec", None),
         )
-        session = service.create_initial_batch(
-            brief=body.brief, params=body.params, num_clips=body.num_clips
-        )
+        with bind_deadline(settings.request_deadline_sec), maybe_profile(
+            request, response, settings, profiles
+        ):
+            session = service.create_initial_batch(
+                brief=body.brief, params=body.params, num_clips=body.num_clips
+            )
     except InvalidRequestError as exc:
         logger.warning("create_session invalid_request: %s", exc)
         raise HTTPException(status_code=400, detail=str(exc))
+    except DeadlineExceededError as exc:
+        logger.error("create_session deadline_exceeded: %s", exc)
+        raise HTTPException(status_code=504, detail=str(exc))
     except GenerationFailedError as exc:
         logger.error("create_session generation_failed: %s", exc)
         raise HTTPException(status_code=500, detail=str(exc))
 
     batch = session.batches[-1]
-    batch_out = _batch_to_out(batch, media_root=service.media_root)
+    with stage_timer("serialize"):
+        batch_out = _batch_to_out(batch, media_root=service.media_root)
     logger.info(
         "POST /sessions ok session_id=%s batch_id=%s clusters=%s tracks=%s",
         session.id,
@@ -100,6 +127,73 @@ def create_session_endpoint(
     return CreateSessionResponse(session_id=session.id, batch=batch_out)
 
 
+def _stream_initial_batch(
+    body: CreateSessionRequest,
+    service: SessionService,
+    settings: Settings,
+    observer: ClipObserver,
+) -> None:
+    with bind_clip_observer(observer), bind_deadline(settings.request_deadline_sec):
+        try:
+            session = service.create_initial_batch(
+                brief=body.brief, params=body.params, num_clips=body.num_clips
+            )
+            with stage_timer("serialize"):
+                batch_out = _batch_to_out(session.batches[-1], media_root=service.media_root)
+        except InvalidRequestError as exc:
+            logger.warning("create_session_stream invalid_request: %s", exc)
+            observer.events.put(("error", {"status": 400, "detail": str(exc)}))
+            return
+        except DeadlineExceededError as exc:
+            logger.error("create_session_stream deadline_exceeded: %s", exc)
+            observer.events.put(("error", {"status": 504, "detail": str(exc)}))
+            return
+        except GenerationFailedError as exc:
+            logger.error("create_session_stream generation_failed: %s", exc)
+            observer.events.put(("error", {"status": 500, "detail": str(exc)}))
+            return
+        except Exception:
+            logger.exception("create_session_stream failed")
+            observer.events.put(("error", {"status": 500, "detail": "internal error"}))
+            return
+    payload = CreateSessionResponse(session_id=session.id, batch=batch_out).model_dump(mode="json")
+    # stream_id -> track_id, so clients can swap the live stream for the finished track
+    payload["streams"] = dict(observer.track_streams)
+    observer.events.put(("batch", payload))
+
+
+@router.post("/sessions/stream")
+def create_session_stream_endpoint(
+    body: CreateSessionRequest,
+    service: SessionService = Depends(get_session_service),
+    settings: Settings = Depends(get_settings),
+    hub: ClipStreamHub = Depends(get_clip_stream_hub),
+):
+    """POST /sessions as Server-Sent Events, so playback can start at the first chunk.
+
+    Emits `clip` (with a /streams URL) as each clip starts generating, `clip_done` /
+    `clip_failed` as each ends, then a single `batch` event carrying the usual
+    CreateSessionResponse once embedding, clustering and labelling finish (or `error`).
+    """
+    logger.info(
+        "POST /sessions/stream brief_len=%s num_clips=%s", len(body.brief), body.num_clips
+    )
+    observer = ClipObserver(hub)
+    # the copied context carries the request id into the generation thread
+    worker = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_stream_initial_batch, body, service, settings, observer),
+        name="session-stream",
+        daemon=True,
+    )
+    worker.start()
+    return StreamingResponse(
+        iter_events(observer, settings.stream_keepalive_sec),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
     "/sessions/{session_id}/clusters/{cluster_id}/more",
     response_model=MoreLikeResponse,
@@ -108,7 +202,11 @@ def more_like_endpoint(
     session_id: UUID,
     cluster_id: UUID,
     body: MoreLikeRequest,
+    request: Request,
+    response: Response,
     service: SessionService = Depends(get_session_service),
+    settings: Settings = Depends(get_settings),
+    profiles: ProfileStore = Depends(get_profile_store),
 ):
     try:
         logger.info(
@@ -117,20 +215,27 @@ def more_like_endpoint(
             cluster_id,
             body.num_clips,
         )
-        batch = service.more_like_cluster(
-            session_id=session_id, cluster_id=cluster_id, num_clips=body.num_clips
-        )
+        with bind_deadline(settings.request_deadline_sec), maybe_profile(
+            request, response, settings, profiles
+        ):
+            batch = service.more_like_cluster(
+                session_id=session_id, cluster_id=cluster_id, num_clips=body.num_clips
+            )
     except InvalidRequestError as exc:
         logger.warning("more_like invalid_request: %s", exc)
         raise HTTPException(status_code=400, detail=str(exc))
     except NotFoundError as exc:
         logger.warning("more_like not_found: %s", exc)
         raise HTTPException(status_code=404, detail=str(exc))
+    except DeadlineExceededError as exc:
+        logger.error("more_like deadline_exceeded: %s", exc)
+        raise HTTPException(status_code=504, detail=str(exc))
     except GenerationFailedError as exc:
         logger.error("more_like generation_failed: %s", exc)
         raise HTTPException(status_code=500, detail=str(exc))
 
-    batch_out = _batch_to_out(batch, media_root=service.media_root)
+    with stage_timer("serialize"):
+        batch_out = _batch_to_out(batch, media_root=service.media_root)
     logger.info(
         "POST /sessions/%s/clusters/%s/more ok batch_id=%s clusters=%s tracks=%s",
         session_id,
@@ -146,9 +251,10 @@ def more_like_endpoint(
 
 @router.delete("/media-cache", status_code=204)
 def clear_media_endpoint(
-    settings=Depends(get_settings),
+    janitor: MediaJanitor = Depends(get_media_janitor),
 ):
-    clear_media_root(settings.media_root)
+    # entries vanish from /media at once; the janitor thread deletes them afterwards
+    janitor.clear()
     return Response(status_code=204)
 
 
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from suno_backend.app.api.deps import get_clip_stream_hub
+from suno_backend.app.services.clip_streams import (
+    ClipObserver,
+    ClipStream,
+    ClipStreamHub,
+    streaming_wav_header,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+TERMINAL_EVENTS = ("batch", "error")
+# how long a relay waits for the provider before re-checking the stream
+_READ_WAIT_SEC = 1.0
+
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def iter_events(observer: ClipObserver, keepalive_sec: float) -> Iterator[str]:
+    """SSE frames from the observer's queue until the batch (or an error) is delivered."""
+    while True:
+        try:
+            event, payload = observer.events.get(timeout=keepalive_sec)
+        except queue.Empty:
+            # comment frame keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+            continue
+        yield format_sse(event, payload)
+        if event in TERMINAL_EVENTS:
+            return
+
+
+def _to_big_endian(data: bytes) -> Tuple[bytes, bytes]:
+    """Byteswap whole 16-bit samples; returns (swapped, odd trailing byte to carry over)."""
+    whole = len(data) - len(data) % 2
+    swapped = np.frombuffer(data, dtype="<i2", count=whole // 2).astype(">i2").tobytes()
+    return swapped, data[whole:]
+
+
+def _relay(stream: ClipStream, header: bytes, big_endian: bool = False) -> Iterator[bytes]:
+    if header:
+        yield header
+    offset = 0
+    carry = b""
+    while True:
+        chunk, ended = stream.read(offset, timeout=_READ_WAIT_SEC)
+        if chunk:
+            offset += len(chunk)
+            if big_endian:
+                # provider chunks need not end on a sample boundary
+                chunk, carry = _to_big_endian(carry + chunk)
+            if chunk:
+                yield chunk
+        if ended:
+            if stream.failed:
+                logger.info("clip stream %s failed after %s bytes", stream.stream_id, offset)
+            return
+
+
+@router.get("/streams/{stream_id}")
+def get_clip_stream(
+    stream_id: str,
+    fmt: str = Query(default="wav", alias="format", pattern="^(wav|pcm)$"),
+    hub: ClipStreamHub = Depends(get_clip_stream_hub),
+):
+    """Relay an in-progress clip from its first byte, following the provider as it writes.
+
+    `wav` prefixes a streaming header (unknown length) so an <audio> element can start
+    playing; `pcm` is raw 16-bit audio for Web Audio clients, served as `audio/L16`
+    (RFC 2586), so samples are swapped from the provider's little-endian to network order.
+    """
+    stream = hub.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="stream not found")
+    if fmt == "pcm":
+        media_type = f"audio/L16;rate={stream.sample_rate};channels={stream.channels}"
+        header = b""
+    else:
+        media_type = "audio/wav"
+        header = streaming_wav_header(stream.sample_rate, stream.channels, stream.sample_width)
+    return StreamingResponse(
+        _relay(stream, header, big_endian=fmt == "pcm"),
+        media_type=media_type,
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from suno_backend.app.api.deps import get_embedding_provider, get_track_index
+from suno_backend.app.metrics import stage_timer
+from suno_backend.app.models.api import (
+    SearchTracksResponse,
+    SimilarTrackOut,
+    SimilarTracksResponse,
+)
+from suno_backend.app.services.providers import EmbeddingProvider
+from suno_backend.app.services.track_index import TrackIndex, TrackMatch
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def require_track_index(index: TrackIndex | None = Depends(get_track_index)) -> TrackIndex:
+    if index is None:
+        raise HTTPException(status_code=503, detail="track index disabled")
+    return index
+
+
+def matches_to_out(matches: List[TrackMatch]) -> List[SimilarTrackOut]:
+    return [
+        SimilarTrackOut(
+            id=match.track.track_id,
+            session_id=match.track.session_id,
+            audio_url=match.track.audio_url,
+            score=match.score,
+            created_at=match.track.created_at,
+        )
+        for match in matches
+    ]
+
+
+@router.get("/tracks/{track_id}/similar", response_model=SimilarTracksResponse)
+def similar_tracks_endpoint(
+    track_id: UUID,
+    k: int = Query(default=10, ge=1, le=100),
+    index: TrackIndex = Depends(require_track_index),
+):
+    """Nearest tracks from every session by cosine similarity of their audio embeddings."""
+    matches = index.similar(str(track_id), k=k)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="track not indexed")
+    logger.info("GET /tracks/%s/similar k=%s results=%s", track_id, k, len(matches))
+    return SimilarTracksResponse(track_id=track_id, results=matches_to_out(matches))
+
+
+@router.get("/search", response_model=SearchTracksResponse)
+def search_tracks_endpoint(
+    q: str = Query(min_length=1, max_length=2000),
+    k: int = Query(default=10, ge=1, le=100),
+    session_id: UUID | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    index: TrackIndex = Depends(require_track_index),
+    embedder: EmbeddingProvider = Depends(get_embedding_provider),
+):
+    """Stored tracks closest to a text query, ranked by CLAP text-to-audio cosine similarity.
+
+    `since` / `until` take ISO 8601 or unix seconds and bound the track's creation time.
+    """
+    since_ts = since.timestamp() if since is not None else None
+    until_ts = until.timestamp() if until is not None else None
+    if since_ts is not None and until_ts is not None and since_ts > until_ts:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    with stage_timer("embed_text"):
+        query = embedder.embed_text(q)
+    try:
+        with stage_timer("search"):
+            matches = index.search(
+                query,
+                k=k,
+                session_id=str(session_id) if session_id is not None else None,
+                since=since_ts,
+                until=until_ts,
+            )
+    except ValueError as exc:
+        # the index was filled by a different embedding model than the one serving text
+        logger.warning("GET /search failed: %s", exc)
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    logger.info("GET /search k=%s session_id=%s results=%s", k, session_id, len(matches))
+    return SearchTracksResponse(query=q, results=matches_to_out(matches))
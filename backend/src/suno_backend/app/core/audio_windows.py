@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Literal, Tuple
+
+import numpy as np
+
+WindowStrategy = Literal["full", "first", "spread", "sliding"]
+WindowPooling = Literal["mean", "attention", "max"]
+
+
+def plan_windows(
+    num_frames: int,
+    sample_rate: int,
+    strategy: WindowStrategy = "full",
+    window_sec: float = 10.0,
+    num_windows: int = 3,
+    overlap: float = 0.5,
+    max_windows: int = 16,
+) -> List[Tuple[int, int]]:
+    """(start_frame, frame_count) spans to embed.
+
+    "full" is the whole clip, "first" the first window_sec, "spread" num_windows windows
+    of window_sec evenly spaced from the start to the end of the clip, "sliding" covers
+    the whole clip with windows overlapping by `overlap` (the last one ends at the clip's
+    end; past max_windows they are spread evenly instead). Clips shorter than one window
+    are always read whole.
+    """
+    window = max(1, int(round(window_sec * sample_rate)))
+    if strategy == "full" or num_frames <= window:
+        return [(0, num_frames)]
+    if strategy == "first":
+        return [(0, window)]
+    if strategy == "spread":
+        starts = np.linspace(0, num_frames - window, num=max(1, num_windows))
+        return [(start, window) for start in sorted({int(round(s)) for s in starts})]
+    if strategy == "sliding":
+        hop = max(1, int(round(window * (1.0 - overlap))))
+        starts = list(range(0, num_frames - window, hop)) + [num_frames - window]
+        if len(starts) > max_windows:
+            starts = np.linspace(0, num_frames - window, num=max_windows)
+        return [(start, window) for start in sorted({int(round(s)) for s in starts})]
+    raise ValueError(f"unsupported window strategy '{strategy}'")
+
+
+@dataclass
+class DecodedWindows:
+    sample_rate: int
+    channels: int
+    total_frames: int
+    # (start_frame, frame_count) per window, parallel to samples
+    spans: List[Tuple[int, int]]
+    # mono float32 arrays of raw int16 sample values
+    samples: List[np.ndarray]
+
+    def spans_sec(self) -> List[Tuple[float, float]]:
+        rate = float(self.sample_rate or 1)
+        return [(start / rate, (start + count) / rate) for start, count in self.spans]
+
+
+def read_wav_windows(
+    path: Path,
+    strategy: WindowStrategy = "full",
+    window_sec: float = 10.0,
+    num_windows: int = 3,
+    overlap: float = 0.5,
+    max_windows: int = 16,
+) -> DecodedWindows:
+    """Decode only the planned windows of a 16-bit PCM WAV, seeking past everything else."""
+    with wave.open(str(path), "rb") as wf:
+        sample_rate = wf.getframerate()
+        num_channels = wf.getnchannels()
+        num_frames = wf.getnframes()
+        if wf.getsampwidth() != 2:
+            raise ValueError("expected 16-bit PCM WAV input")
+        if num_channels not in (1, 2):
+            raise ValueError("expected mono or stereo PCM WAV input")
+        spans = plan_windows(
+            num_frames, sample_rate, strategy, window_sec, num_windows, overlap, max_windows
+        )
+        windows: List[np.ndarray] = []
+        for start, count in spans:
+            wf.setpos(start)
+            samples = np.frombuffer(wf.readframes(count), dtype=np.int16).astype(np.float32)
+            if num_channels > 1:
+                samples = samples.reshape(-1, num_channels).mean(axis=1)
+            windows.append(samples)
+    return DecodedWindows(sample_rate, num_channels, num_frames, spans, windows)
+
+
+def pool_windows(
+    embeddings: np.ndarray, method: WindowPooling = "mean", temperature: float = 0.1
+) -> np.ndarray:
+    """Collapse (num_windows, dim) window embeddings into one vector.
+
+    "attention" weights each window by softmax(cos(window, mean) / temperature), so
+    windows unlike the rest of the clip (intro silence, a break) count for less.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1 or embeddings.shape[0] == 1:
+        return embeddings.reshape(-1)
+    if method == "mean":
+        return embeddings.mean(axis=0)
+    if method == "max":
+        return embeddings.max(axis=0)
+    if method == "attention":
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.where(norms == 0, 1.0, norms)
+        query = unit.mean(axis=0)
+        query /= np.linalg.norm(query) or 1.0
+        scores = unit @ query / temperature
+        weights = np.exp(scores - scores.max())
+        weights /= weights.sum()
+        return (weights[:, None] * embeddings).sum(axis=0).astype(np.float32)
+    raise ValueError(f"unsupported window pooling '{method}'")
@@ -1,42 +1,170 @@
-from typing import List
+from typing import List, Literal, Tuple
 
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans, kmeans_plusplus
 
+ClusterAlgorithm = Literal["auto", "kmeans", "minibatch"]
+KSelection = Literal["fixed", "silhouette"]
 
-def cluster_embeddings(embeddings: List[np.ndarray], max_k: int = 3) -> List[List[int]]:
-    """KMeans clustering with singleton-merge rule per spec."""
+# above this many points "auto" switches from full-batch k-means to mini-batch
+MINIBATCH_THRESHOLD = 2048
+MINIBATCH_BATCH_SIZE = 1024
+RANDOM_STATE = 42
+# below this mean silhouette the batch is treated as a single cluster (no real structure)
+MIN_SILHOUETTE = 0.25
+# silhouette needs an n x n distance matrix; larger inputs are scored on a fixed subsample
+SILHOUETTE_SAMPLE_SIZE = 2000
+
+
+def cluster_embeddings(
+    embeddings: List[np.ndarray],
+    max_k: int = 3,
+    algorithm: ClusterAlgorithm = "auto",
+    k_selection: KSelection = "fixed",
+) -> List[List[int]]:
+    """KMeans clustering with singleton-merge rule per spec.
+
+    k_selection="fixed" uses k = min(max_k, n); "silhouette" picks k in [1, max_k].
+    """
     n = len(embeddings)
     k0 = min(max_k, n)
     if k0 == 1:
         return [list(range(n))]
 
     X = np.stack(embeddings)
-    kmeans = KMeans(n_clusters=k0, random_state=42, n_init=10, max_iter=300)
-    labels = kmeans.fit_predict(X)
-
-    clusters = {label: [] for label in range(k0)}
-    for idx, label in enumerate(labels):
-        clusters[label].append(idx)
-
-    cluster_lists = list(clusters.values())
-    has_large_cluster = any(len(members) >= 2 for members in cluster_lists)
-
-    if has_large_cluster:
-        large_labels = [label for label, members in clusters.items() if len(members) >= 2]
-        large_centroids = {label: kmeans.cluster_centers_[label] for label in large_labels}
-
-        for label, members in list(clusters.items()):
-            if len(members) == 1:
-                idx = members[0]
-                embedding = embeddings[idx]
-                target_label = min(
-                    large_labels,
-                    key=lambda l: float(np.linalg.norm(embedding - large_centroids[l])),
-                )
-                clusters[target_label].append(idx)
-                clusters[label] = []
-
-    merged_clusters = [sorted(members) for members in clusters.values() if members]
-    merged_clusters.sort(key=lambda c: (-len(c), min(c)))
-    return merged_clusters
+    if k_selection == "fixed":
+        labels, centers = fit_kmeans(X, k0, algorithm)
+    elif k_selection == "silhouette":
+        labels, centers = select_k_by_silhouette(X, k0, algorithm)
+        if len(centers) == 1:
+            return [list(range(n))]
+    else:
+        raise ValueError(f"unsupported k_selection '{k_selection}'")
+    labels = merge_singletons(X, labels, centers)
+    return group_labels(labels)
+
+
+def fit_kmeans(
+    X: np.ndarray,
+    k: int,
+    algorithm: ClusterAlgorithm = "auto",
+    init: np.ndarray | str = "k-means++",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit k-means++ (single deterministic init) and return (labels, centers)."""
+    if algorithm == "auto":
+        algorithm = "minibatch" if len(X) > MINIBATCH_THRESHOLD else "kmeans"
+
+    if algorithm == "kmeans":
+        model = KMeans(n_clusters=k, init=init, n_init=1, max_iter=300, random_state=RANDOM_STATE)
+    elif algorithm == "minibatch":
+        model = MiniBatchKMeans(
+            n_clusters=k,
+            init=init,
+            n_init=1,
+            batch_size=MINIBATCH_BATCH_SIZE,
+            random_state=RANDOM_STATE,
+        )
+    else:
+        raise ValueError(f"unsupported clustering algorithm '{algorithm}'")
+
+    labels = model.fit_predict(X)
+    return labels, model.cluster_centers_
+
+
+def select_k_by_silhouette(
+    X: np.ndarray, max_k: int, algorithm: ClusterAlgorithm = "auto"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit k = 2..max_k and keep the best mean silhouette; fall back to k=1 below MIN_SILHOUETTE.
+
+    Work shared across candidate k: one pairwise-distance matrix, one set of squared
+    norms, and one k-means++ seeding for max_k whose prefixes seed every smaller k.
+    """
+    n = len(X)
+    x_squared_norms = np.einsum("ij,ij->i", X, X)
+    _, seed_indices = kmeans_plusplus(
+        X, n_clusters=max_k, x_squared_norms=x_squared_norms, random_state=RANDOM_STATE
+    )
+
+    sample = np.arange(n)
+    if n > SILHOUETTE_SAMPLE_SIZE:
+        sample = np.random.default_rng(RANDOM_STATE).choice(
+            n, size=SILHOUETTE_SAMPLE_SIZE, replace=False
+        )
+    distances = pairwise_distances(X[sample], x_squared_norms[sample])
+
+    best: Tuple[float, np.ndarray, np.ndarray] | None = None
+    for k in range(2, max_k + 1):
+        labels, centers = fit_kmeans(X, k, algorithm, init=X[seed_indices[:k]])
+        score = silhouette_from_distances(distances, labels[sample])
+        if best is None or score > best[0]:
+            best = (score, labels, centers)
+
+    if best is None or best[0] < MIN_SILHOUETTE:
+        return np.zeros(n, dtype=np.int64), X.mean(axis=0, keepdims=True)
+    return best[1], best[2]
+
+
+def pairwise_distances(X: np.ndarray, x_squared_norms: np.ndarray | None = None) -> np.ndarray:
+    """Euclidean distance matrix computed with a single matmul."""
+    if x_squared_norms is None:
+        x_squared_norms = np.einsum("ij,ij->i", X, X)
+    squared = x_squared_norms[:, None] - 2.0 * X @ X.T + x_squared_norms[None, :]
+    np.maximum(squared, 0.0, out=squared)
+    np.fill_diagonal(squared, 0.0)
+    return np.sqrt(squared)
+
+
+def silhouette_from_distances(distances: np.ndarray, labels: np.ndarray) -> float:
+    """Mean silhouette over a precomputed distance matrix; singleton members score 0."""
+    _, labels = np.unique(labels, return_inverse=True)
+    k = int(labels.max()) + 1
+    if k < 2:
+        return 0.0
+    n = len(labels)
+    onehot = np.zeros((n, k), dtype=distances.dtype)
+    onehot[np.arange(n), labels] = 1.0
+    counts = onehot.sum(axis=0)
+    sums = distances @ onehot
+
+    own_counts = counts[labels]
+    a = np.where(own_counts > 1, sums[np.arange(n), labels] / np.maximum(own_counts - 1, 1), 0.0)
+    mean_other = sums / counts[None, :]
+    mean_other[np.arange(n), labels] = np.inf
+    b = mean_other.min(axis=1)
+
+    denom = np.maximum(a, b)
+    scores = np.where((own_counts > 1) & (denom > 0), (b - a) / np.where(denom > 0, denom, 1.0), 0.0)
+    return float(scores.mean())
+
+
+def merge_singletons(X: np.ndarray, labels: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Reassign singleton clusters to the nearest centroid of a cluster with >= 2 members."""
+    counts = np.bincount(labels, minlength=len(centers))
+    large_labels = np.flatnonzero(counts >= 2)
+    if large_labels.size == 0:
+        return labels
+
+    singleton_mask = counts[labels] == 1
+    if not singleton_mask.any():
+        return labels
+
+    points = X[singleton_mask]
+    large_centers = centers[large_labels]
+    # squared euclidean via the expansion |a|^2 - 2ab + |b|^2; argmin matches the norm
+    distances = (
+        np.einsum("ij,ij->i", points, points)[:, None]
+        - 2.0 * points @ large_centers.T
+        + np.einsum("ij,ij->i", large_centers, large_centers)[None, :]
+    )
+    merged = labels.copy()
+    merged[singleton_mask] = large_labels[np.argmin(distances, axis=1)]
+    return merged
+
+
+def group_labels(labels: np.ndarray) -> List[List[int]]:
+    """Turn a label vector into index lists sorted by size desc, then first index."""
+    order = np.argsort(labels, kind="stable")
+    _, starts = np.unique(labels[order], return_index=True)
+    groups = [group.tolist() for group in np.split(order, starts[1:])]
+    groups.sort(key=lambda c: (-len(c), c[0]))
+    return groups
@@ -12,6 +12,26 @@ def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / (norm_a * norm_b))
 
 
+def cosine_similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise cosine similarity of rows of a (n, d) and b (m, d); zero-norm rows score 0.0."""
+    a = np.atleast_2d(np.asarray(a, dtype=np.float64))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float64))
+    norm_a = np.linalg.norm(a, axis=1)
+    norm_b = np.linalg.norm(b, axis=1)
+    scores = a @ b.T
+    denom = np.outer(norm_a, norm_b)
+    return np.divide(scores, denom, out=np.zeros_like(scores), where=denom > 0)
+
+
+def select_by_scores(scores: np.ndarray, min_similarity: float, max_results: int) -> List[int]:
+    """Rank indices by score desc (ties by index); keep threshold matches, else top-N."""
+    order = np.lexsort((np.arange(len(scores)), -scores))
+    accepted = order[scores[order] >= min_similarity]
+    if accepted.size:
+        return accepted[:max_results].tolist()
+    return order[: min(max_results, len(scores))].tolist()
+
+
 def filter_by_similarity(
     embeddings: List[np.ndarray], centroid: np.ndarray, min_similarity: float, max_results: int
 ) -> List[int]:
@@ -19,16 +39,5 @@ def filter_by_similarity(
     if not embeddings:
         return []
 
-    scored = []
-    for idx, emb in enumerate(embeddings):
-        score = cosine_similarity(emb, centroid)
-        scored.append((idx, score))
-
-    scored.sort(key=lambda item: (-item[1], item[0]))
-
-    accepted = [idx for idx, score in scored if score >= min_similarity]
-    if accepted:
-        return accepted[:max_results]
-
-    top_indices = [idx for idx, _ in scored[: min(max_results, len(embeddings))]]
-    return top_indices
+    scores = cosine_similarity_matrix(np.stack(embeddings), centroid)[:, 0]
+    return select_by_scores(scores, min_similarity, max_results)
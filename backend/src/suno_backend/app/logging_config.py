@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import itertools
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import IO, List
+
+from suno_backend.app.request_context import current_request_id, current_session_key
+
+LOG_FORMAT = "%(levelname)s:%(name)s:[req=%(request_id)s session=%(session_id)s] %(message)s"
+
+# per-clip lines opt in with extra=SAMPLED and are kept 1-in-N at INFO
+SAMPLED = {"sampled": True}
+
+_listener: logging.handlers.QueueListener | None = None
+_installed: List[logging.Handler] = []
+_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the bound request id / session so messages need not repeat them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        session_key = current_session_key()
+        record.request_id = current_request_id() or "-"
+        record.session_id = "-" if session_key == "anonymous" else session_key
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every Nth record marked `sampled`; everything else passes untouched."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.every = 0 if rate <= 0 else max(1, round(1.0 / min(rate, 1.0)))
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno > logging.INFO:
+            return True
+        if self.every == 0:
+            return False
+        # hot-path records are only kept at INFO; DEBUG shows all of them
+        if logging.getLogger(record.name).isEnabledFor(logging.DEBUG):
+            return True
+        return next(self._counter) % self.every == 0
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that merges args on the emitting thread and defers the rest.
+
+    The message is rendered here, so later mutation of a logged object cannot change it
+    and a bad format string fails in the caller's handleError. The stdlib prepare() also
+    runs the full formatter (LOG_FORMAT, traceback text); that is left to the listener.
+    Records stay in-process (SimpleQueue), so nothing needs to be made picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(
+    level: str | int = "INFO",
+    use_queue: bool = True,
+    sample_rate: float = 0.1,
+    stream: IO[str] | None = None,
+) -> None:
+    """Install root handlers; idempotent so reloads and tests can reconfigure.
+
+    With use_queue, request threads only stamp context, merge the message args and
+    enqueue records; a single listener thread formats and writes them, so neither the
+    formatter nor a slow stdout delays a request.
+    """
+    global _listener
+    with _lock:
+        root = logging.getLogger()
+        _stop_locked()
+        for handler in _installed:
+            root.removeHandler(handler)
+        _installed.clear()
+
+        sink = logging.StreamHandler(stream or sys.stderr)
+        sink.setFormatter(logging.Formatter(LOG_FORMAT))
+        # context must be captured on the emitting thread, before the record is queued
+        front: logging.Handler
+        if use_queue:
+            front = _DeferredQueueHandler(queue.SimpleQueue())
+            _listener = logging.handlers.QueueListener(front.queue, sink, respect_handler_level=False)
+            _listener.start()
+        else:
+            front = sink
+        front.addFilter(RequestContextFilter())
+        front.addFilter(SamplingFilter(sample_rate))
+        root.addHandler(front)
+        _installed.append(front)
+        root.setLevel(level if isinstance(level, int) else level.upper())
+
+
+def stop_logging() -> None:
+    """Flush and stop the queue listener (no-op without one)."""
+    with _lock:
+        _stop_locked()
+
+
+def _stop_locked() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -2,19 +2,48 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 import logging
+from uuid import uuid4
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response
 
+from suno_backend.app.api.deps import (
+    get_media_janitor,
+    shutdown_media_janitor,
+    shutdown_media_transcoder,
+)
+from suno_backend.app.api.media import router as media_router
+from suno_backend.app.api.profiles import router as profiles_router
 from suno_backend.app.api.sessions import router as sessions_router
-from suno_backend.app.media_utils import clear_media_root
+from suno_backend.app.api.streams import router as streams_router
+from suno_backend.app.api.tracks import router as tracks_router
+from suno_backend.app.logging_config import configure_logging
+from suno_backend.app.metrics import CONTENT_TYPE, REGISTRY
+from suno_backend.app.request_context import bind_request_id
 from suno_backend.app.settings import Settings, get_settings
+from suno_backend.app.tracing import JsonlFileSpanExporter, configure_tracing, start_span
+
+
+def _configure_logging() -> None:
+    settings = get_settings()
+    configure_logging(
+        level=settings.log_level,
+        use_queue=settings.log_queue,
+        sample_rate=settings.log_sample_rate,
+    )
 
 
-logging.basicConfig(level=logging.INFO)
+def _configure_tracing() -> None:
+    settings = get_settings()
+    configure_tracing(
+        JsonlFileSpanExporter(settings.tracing_export_path) if settings.tracing_enabled else None
+    )
+
+
+_configure_logging()
+_configure_tracing()
 logger = logging.getLogger(__name__)
 
 
@@ -41,18 +70,22 @@ def _log_settings(settings: Settings) -> None:
         _mask(getattr(settings, "elevenlabs_api_key", None)),
     )
 
-def _mount_media(app: FastAPI) -> None:
+def _prepare_media() -> None:
     settings = get_settings()
     _log_settings(settings)
     settings.media_root.mkdir(parents=True, exist_ok=True)
-    app.mount("/media", StaticFiles(directory=settings.media_root), name="media")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
-    clear_media_root(settings.media_root)
+    janitor = get_media_janitor()
+    if settings.media_clear_on_start:
+        janitor.clear()
+    janitor.start()
     yield
+    shutdown_media_transcoder()
+    shutdown_media_janitor()
 
 
 settings = get_settings()
@@ -64,8 +97,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-_mount_media(app)
+_prepare_media()
 app.include_router(sessions_router)
+app.include_router(media_router)
+app.include_router(profiles_router)
+app.include_router(streams_router)
+app.include_router(tracks_router)
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    # the id rides in a contextvar, so every log line in the request is tagged with it
+    request_id = request.headers.get("x-request-id") or uuid4().hex[:16]
+    with bind_request_id(request_id), start_span(
+        f"{request.method} {request.url.path}",
+        {"http.method": request.method, "http.target": request.url.path, "request.id": request_id},
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        span.set_attributes(
+            {"http.route": getattr(route, "path", None), "http.status_code": response.status_code}
+        )
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 
 @app.exception_handler(RequestValidationError)
@@ -85,4 +139,9 @@ def health() -> dict[str, str]:
     return {
         "status": "ok",
         # "media_root": str(get_settings()),
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, TypeVar
+
+# seconds; spans sub-ms numpy work up to multi-minute generation
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Point-in-time value; either set directly or read from a callback at render time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_function(self, callback: Callable[[], float]) -> None:
+        self._callback = callback
+
+    def value(self, **labels: str) -> float:
+        if self._callback is not None and not labels:
+            return float(self._callback())
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        if self._callback is not None:
+            lines.append(f"{self.name} {_format_value(self.value())}")
+            return lines
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: (non-cumulative bucket counts incl. +Inf, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._series.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[slot] += 1
+            self._series[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = 'le="' + _format_value(bound) + '"'
+                    labels = _format_labels(self.labelnames, key, le)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "suno_stage_duration_seconds",
+        "Wall time per pipeline stage (render, generate, generate_clip, decode, resample, "
+        "embed, embed_forward, prompt_filter, cluster, name, finalize, serialize, transcode).",
+        labelnames=("stage",),
+    )
+)
+CLIPS_GENERATED = REGISTRY.register(
+    Counter("suno_clips_generated_total", "Clips returned by the music provider.")
+)
+CLIPS_REJECTED = REGISTRY.register(
+    Counter(
+        "suno_clips_rejected_similarity_total",
+        "More-like candidates below min_similarity to the parent centroid.",
+    )
+)
+NAMER_FALLBACKS = REGISTRY.register(
+    Counter(
+        "suno_namer_fallbacks_total",
+        "Clusters labelled cluster-{i} instead of by the namer.",
+        labelnames=("reason",),
+    )
+)
+UPSTREAM_RETRIES = REGISTRY.register(
+    Counter(
+        "suno_upstream_retries_total",
+        "Retried upstream music calls by cause.",
+        labelnames=("reason",),
+    )
+)
+HEDGES_FIRED = REGISTRY.register(
+    Counter("suno_hedges_fired_total", "Speculative duplicate clip requests.")
+)
+HEDGES_WON = REGISTRY.register(
+    Counter("suno_hedges_won_total", "Hedged requests that finished before their primary.")
+)
+HEDGE_SECONDS_SAVED = REGISTRY.register(
+    Counter("suno_hedge_latency_saved_seconds_total", "Latency saved by winning hedges.")
+)
+
+TRANSCODE_LAG_SECONDS = REGISTRY.register(
+    Histogram(
+        "suno_transcode_ready_seconds",
+        "Time from track finalize until a compressed rendition is on disk (queue + encode).",
+        labelnames=("rendition",),
+    )
+)
+MEDIA_BYTES_SERVED = REGISTRY.register(
+    Counter(
+        "suno_media_bytes_served_total",
+        "Audio bytes sent from /media by rendition.",
+        labelnames=("rendition",),
+    )
+)
+MEDIA_BYTES_SAVED = REGISTRY.register(
+    Counter(
+        "suno_media_bytes_saved_total",
+        "WAV bytes not sent because a compressed rendition was served instead.",
+    )
+)
+
+MEDIA_DISK_BYTES = REGISTRY.register(
+    Gauge("suno_media_disk_bytes", "Bytes under media_root as of the last janitor sweep.")
+)
+MEDIA_EVICTIONS = REGISTRY.register(
+    Counter(
+        "suno_media_evictions_total",
+        "Media paths deleted by the janitor by reason (quota, tmp, clear, session).",
+        labelnames=("reason",),
+    )
+)
+MEDIA_DELETES_PENDING = REGISTRY.register(
+    Gauge("suno_media_deletes_pending", "Trashed media paths waiting for the janitor thread.")
+)
+
+SESSIONS_RESIDENT = REGISTRY.register(
+    Gauge("suno_sessions_resident", "Sessions held in the in-memory session store.")
+)
+SESSION_STORE_BYTES = REGISTRY.register(
+    Gauge("suno_session_store_bytes", "Estimated bytes held by the in-memory session store.")
+)
+SESSIONS_EVICTED = REGISTRY.register(
+    Counter(
+        "suno_sessions_evicted_total",
+        "Sessions dropped from the session store by reason (ttl, lru, manual).",
+        labelnames=("reason",),
+    )
+)
+
+TEXT_EMBED_CACHE = REGISTRY.register(
+    Counter(
+        "suno_text_embedding_cache_total",
+        "Text embedding lookups by result (hit, miss).",
+        labelnames=("result",),
+    )
+)
+CLIPS_REJECTED_PROMPT = REGISTRY.register(
+    Counter(
+        "suno_clips_rejected_prompt_total",
+        "Initial-batch clips dropped for scoring below the prompt similarity threshold.",
+    )
+)
+
+
+def stage_timer(stage: str):
+    """Context manager observing STAGE_SECONDS for one stage."""
+    return STAGE_SECONDS.time(stage=stage)
@@ -48,3 +48,21 @@ class MoreLikeResponse(BaseModel):
 
 class MusicSettingsUpdate(BaseModel):
     force_instrumental: bool
+
+
+class SimilarTrackOut(BaseModel):
+    id: UUID
+    session_id: UUID
+    audio_url: str
+    score: float
+    created_at: float
+
+
+class SimilarTracksResponse(BaseModel):
+    track_id: UUID
+    results: List[SimilarTrackOut]
+
+
+class SearchTracksResponse(BaseModel):
+    query: str
+    results: List[SimilarTrackOut]
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Set, TypeVar
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+CPROFILE_TOP_N = 60
+
+
+class ProfilerBusyError(RuntimeError):
+    """Another request is already being profiled."""
+
+
+@dataclass
+class ProfileCapture:
+    """Artifacts gathered while one request runs; hot paths append sections to it."""
+
+    profile_id: str
+    label: str
+    started_at: float = field(default_factory=time.time)
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+    worker_profilers: List[cProfile.Profile] = field(default_factory=list, repr=False)
+    _threads: Set[int] = field(default_factory=lambda: {threading.get_ident()}, repr=False)
+    _closed: bool = field(default=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_section(self, artifact: str, text: str) -> None:
+        """Append text to a named artifact (e.g. one torch.profiler table per CLAP call)."""
+        with self._lock:
+            self.sections.setdefault(artifact, []).append(text)
+
+    def _claim_thread(self) -> bool:
+        # a thread already under a profiler (the request thread, or a nested task) keeps it
+        with self._lock:
+            ident = threading.get_ident()
+            if self._closed or ident in self._threads:
+                return False
+            self._threads.add(ident)
+            return True
+
+    def _release_thread(self, profiler: cProfile.Profile | None) -> None:
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+            if profiler is not None and not self._closed:
+                self.worker_profilers.append(profiler)
+
+    def _close(self) -> List[cProfile.Profile]:
+        with self._lock:
+            self._closed = True
+            return list(self.worker_profilers)
+
+
+_active: contextvars.ContextVar[ProfileCapture | None] = contextvars.ContextVar(
+    "suno_profile", default=None
+)
+
+
+def active_profile() -> ProfileCapture | None:
+    """Capture for the current request, or None when it is not being profiled."""
+    return _active.get()
+
+
+def run_profiled(fn: Callable[..., T], *args: Any) -> T:
+    """Call fn, cProfiling this worker thread into the active capture if there is one.
+
+    cProfile only sees the thread that enabled it, so pool tasks run on behalf of a
+    profiled request (they inherit its context) go through here; their stats are merged
+    into cprofile.* when the task finishes before the request does.
+    """
+    capture = _active.get()
+    if capture is None or not capture._claim_thread():
+        return fn(*args)
+    profiler: cProfile.Profile | None = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiling tool owns this thread
+        profiler = None
+    try:
+        return fn(*args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        capture._release_thread(profiler)
+
+
+class ProfileStore:
+    """Profiles on disk under root/{profile_id}/; oldest are pruned beyond max_profiles."""
+
+    def __init__(self, root: Path, max_profiles: int = 20) -> None:
+        self.root = root
+        self.max_profiles = max_profiles
+        # cProfile and torch.profiler both hook process-wide state; one capture at a time
+        self._busy = threading.Lock()
+
+    @contextmanager
+    def capture(self, label: str, metadata: Dict[str, Any] | None = None) -> Iterator[ProfileCapture]:
+        """cProfile the calling thread for the duration of the block and persist the result.
+
+        Pool tasks started through run_profiled() are profiled on their own threads and
+        merged into the same cprofile.pstats / cprofile.txt.
+
+        Raises ProfilerBusyError instead of waiting when another capture is running.
+        """
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusyError("a profile is already being captured")
+        capture = ProfileCapture(profile_id=uuid4().hex, label=label)
+        profiler = cProfile.Profile()
+        token = _active.set(capture)
+        start = time.perf_counter()
+        error: str | None = None
+        try:
+            profiler.enable()
+            try:
+                yield capture
+            finally:
+                profiler.disable()
+        except BaseException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            _active.reset(token)
+            try:
+                self._save(capture, profiler, time.perf_counter() - start, metadata or {}, error)
+            finally:
+                self._busy.release()
+
+    def _save(
+        self,
+        capture: ProfileCapture,
+        profiler: cProfile.Profile,
+        wall_sec: float,
+        metadata: Dict[str, Any],
+        error: str | None,
+    ) -> None:
+        directory = self.root / capture.profile_id
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            workers = capture._close()
+            buffer = io.StringIO()
+            stats = pstats.Stats(profiler, stream=buffer)
+            if workers:
+                stats.add(*workers)
+            stats.dump_stats(str(directory / "cprofile.pstats"))
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(CPROFILE_TOP_N)
+            (directory / "cprofile.txt").write_text(buffer.getvalue(), encoding="utf-8")
+            for artifact, parts in capture.sections.items():
+                (directory / artifact).write_text("\n\n".join(parts), encoding="utf-8")
+            meta = {
+                "profile_id": capture.profile_id,
+                "label": capture.label,
+                "created_at": capture.started_at,
+                "wall_sec": wall_sec,
+                "error": error,
+                "profiled_threads": 1 + len(workers),
+                "artifacts": sorted(p.name for p in directory.iterdir()) + ["meta.json"],
+                **metadata,
+            }
+            (directory / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        except OSError:
+            logger.warning("failed to write profile id=%s", capture.profile_id, exc_info=True)
+            return
+        logger.info(
+            "profile captured id=%s label=%s wall_sec=%.3f", capture.profile_id, capture.label, wall_sec
+        )
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = self.list()
+        for meta in profiles[self.max_profiles :]:
+            shutil.rmtree(self.root / meta["profile_id"], ignore_errors=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata for stored profiles, newest first."""
+        if not self.root.exists():
+            return []
+        profiles = []
+        for meta_path in self.root.glob("*/meta.json"):
+            try:
+                profiles.append(json.loads(meta_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda meta: meta.get("created_at", 0.0), reverse=True)
+        return profiles
+
+    def get(self, profile_id: str) -> Dict[str, Any] | None:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        meta_path = self.root / profile_id / "meta.json"
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def artifact_path(self, profile_id: str, artifact: str) -> Path | None:
+        meta = self.get(profile_id)
+        if meta is None or artifact not in meta.get("artifacts", []):
+            return None
+        return self.root / profile_id / artifact
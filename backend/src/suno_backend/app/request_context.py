@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+from uuid import UUID
+
+# request-scoped state that providers read without widening their protocols
+_session_key: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "suno_session_key", default=None
+)
+_request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "suno_request_id", default=None
+)
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute point on the monotonic clock by which the request must finish."""
+
+    expires_at: float
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, cap: float) -> float:
+        """Per-call timeout: the stage's own cap, shortened to what the request has left."""
+        return min(cap, self.remaining())
+
+
+# a reserve never takes more than this share of what is left, so a reserve as large as
+# the whole deadline cannot leave earlier stages with nothing (every request a 504)
+MAX_RESERVE_SHARE = 0.25
+
+_deadline: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar(
+    "suno_deadline", default=None
+)
+
+
+def current_session_key() -> str:
+    """Key used for per-session fairness; 'anonymous' outside a session-bound call."""
+    return _session_key.get() or "anonymous"
+
+
+@contextmanager
+def bind_session(session_id: UUID | str) -> Iterator[None]:
+    token = _session_key.set(str(session_id))
+    try:
+        yield
+    finally:
+        _session_key.reset(token)
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+@contextmanager
+def bind_request_id(request_id: str) -> Iterator[None]:
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+def current_deadline() -> Deadline | None:
+    return _deadline.get()
+
+
+def deadline_expired() -> bool:
+    deadline = _deadline.get()
+    return deadline is not None and deadline.expired
+
+
+def time_budget(cap: float) -> float:
+    """cap when no deadline is bound, else min(cap, remaining)."""
+    deadline = _deadline.get()
+    return cap if deadline is None else deadline.budget(cap)
+
+
+@contextmanager
+def bind_deadline(seconds: float | None) -> Iterator[Deadline | None]:
+    """Bind a deadline `seconds` from now; an enclosing tighter deadline still wins."""
+    parent = _deadline.get()
+    if seconds is None:
+        yield parent
+        return
+    expires_at = time.monotonic() + seconds
+    if parent is not None:
+        expires_at = min(expires_at, parent.expires_at)
+    token = _deadline.set(Deadline(expires_at))
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def reserve_time(seconds: float) -> Iterator[Deadline | None]:
+    """Shrink the bound deadline by `seconds` so later stages keep that much budget.
+
+    The reserve is clamped to MAX_RESERVE_SHARE of the time remaining.
+    """
+    parent = _deadline.get()
+    if parent is None:
+        yield None
+        return
+    seconds = min(seconds, parent.remaining() * MAX_RESERVE_SHARE)
+    token = _deadline.set(Deadline(parent.expires_at - seconds))
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
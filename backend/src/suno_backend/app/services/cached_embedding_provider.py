@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from suno_backend.app.metrics import TEXT_EMBED_CACHE
+from suno_backend.app.services.providers import EmbeddingProvider
+
+
+class CachingEmbeddingProvider(EmbeddingProvider):
+    """Wrap an EmbeddingProvider with an in-memory LRU of text embeddings keyed by text.
+
+    Audio embeddings pass straight through (every clip is new); anything else the inner
+    provider offers, such as embed_audio_windows, is delegated unchanged. Cached vectors
+    are shared between callers, so they are returned read-only.
+    """
+
+    def __init__(self, inner: EmbeddingProvider, max_text_entries: int = 1024) -> None:
+        self.inner = inner
+        self.max_text_entries = max(1, max_text_entries)
+        self._text: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        # only reached for attributes not defined here
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def embed_audio(self, audio_path: Path) -> np.ndarray:
+        return self.inner.embed_audio(audio_path)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        with self._lock:
+            cached = self._text.get(text)
+            if cached is not None:
+                self._text.move_to_end(text)
+                TEXT_EMBED_CACHE.inc(result="hit")
+                return cached
+        TEXT_EMBED_CACHE.inc(result="miss")
+        embedding = np.array(self.inner.embed_text(text), dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._lock:
+            self._text[text] = embedding
+            self._text.move_to_end(text)
+            while len(self._text) > self.max_text_entries:
+                self._text.popitem(last=False)
+        return embedding
+
+    def text_cache_size(self) -> int:
+        with self._lock:
+            return len(self._text)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import wave
+from pathlib import Path
+from typing import Dict, List
+from uuid import uuid4
+
+from suno_backend.app.services.providers import GeneratedClip, MusicProvider
+from suno_backend.app.services.session_service import GenerationFailedError
+
+logger = logging.getLogger(__name__)
+
+
+class CachingMusicProvider(MusicProvider):
+    """Wrap a MusicProvider with a bounded on-disk pool of clips per generation key.
+
+    Key = (prompt, duration, output_format, force_instrumental). While a key's pool has
+    room, fresh clips are generated and added to it; the rest of the request is served
+    from the pool (round-robin, no repeats within one batch). Served clips are hard links
+    (or copies) under media_root/tmp, so callers may move or delete them freely.
+    """
+
+    def __init__(
+        self,
+        inner: MusicProvider,
+        media_root: Path,
+        cache_root: Path,
+        max_clips_per_key: int = 12,
+    ) -> None:
+        self.inner = inner
+        self.media_root = media_root
+        self.cache_root = cache_root
+        self.max_clips_per_key = max(1, max_clips_per_key)
+        self.tmp_dir = self.media_root / "tmp"
+        self._pools: Dict[str, List[GeneratedClip]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def force_instrumental(self) -> bool:
+        return getattr(self.inner, "force_instrumental")
+
+    @force_instrumental.setter
+    def force_instrumental(self, value: bool) -> None:
+        setattr(self.inner, "force_instrumental", value)
+
+    def cache_key(self, prompt: str, duration_sec: float) -> str:
+        parts = [
+            prompt,
+            f"{duration_sec:.3f}",
+            str(getattr(self.inner, "output_format", None)),
+            str(getattr(self.inner, "force_instrumental", None)),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float) -> List[GeneratedClip]:
+        key = self.cache_key(prompt, duration_sec)
+        with self._lock:
+            pool = self._load_pool(key, prompt, duration_sec)
+            fresh_count = min(num_clips, max(0, self.max_clips_per_key - len(pool)))
+            cached = self._next_from_pool(key, min(len(pool), num_clips - fresh_count))
+        # not enough distinct cached clips to cover the rest of the request
+        fresh_count = num_clips - len(cached)
+
+        fresh: List[GeneratedClip] = []
+        if fresh_count > 0:
+            try:
+                fresh = self.inner.generate_batch(prompt, fresh_count, duration_sec)
+            except GenerationFailedError:
+                with self._lock:
+                    pool = self._load_pool(key, prompt, duration_sec)
+                    # continuing round-robin stays distinct from what was already picked
+                    cached += self._next_from_pool(
+                        key, min(len(pool) - len(cached), num_clips - len(cached))
+                    )
+                if not cached:
+                    raise
+                logger.warning("generation cache serving %s cached clips after failure", len(cached))
+            self._store(key, fresh, prompt, duration_sec)
+
+        served = [self._materialize(clip) for clip in cached]
+        with self._lock:
+            self.hits += len(served)
+            self.misses += len(fresh)
+        logger.info(
+            "generation cache key=%s requested=%s cached=%s fresh=%s",
+            key[:12],
+            num_clips,
+            len(served),
+            len(fresh),
+        )
+        return served + fresh
+
+    def _load_pool(self, key: str, prompt: str, duration_sec: float) -> List[GeneratedClip]:
+        pool = self._pools.get(key)
+        if pool is None:
+            # pick up clips cached by a previous process; the key pins prompt and duration
+            pool = [
+                GeneratedClip(
+                    audio_path=path,
+                    duration_sec=_wav_duration(path, duration_sec),
+                    raw_prompt=prompt,
+                )
+                for path in sorted((self.cache_root / key).glob("*.wav"))
+            ]
+            self._pools[key] = pool
+        pool[:] = [clip for clip in pool if clip.audio_path.exists()]
+        return pool
+
+    def _next_from_pool(self, key: str, count: int) -> List[GeneratedClip]:
+        pool = self._pools[key]
+        if count <= 0 or not pool:
+            return []
+        start = self._cursors.get(key, 0) % len(pool)
+        picked = [pool[(start + offset) % len(pool)] for offset in range(count)]
+        self._cursors[key] = (start + count) % len(pool)
+        return picked
+
+    def _store(
+        self, key: str, clips: List[GeneratedClip], prompt: str, duration_sec: float
+    ) -> None:
+        key_dir = self.cache_root / key
+        with self._lock:
+            pool = self._load_pool(key, prompt, duration_sec)
+            room = self.max_clips_per_key - len(pool)
+            if room <= 0:
+                return
+            key_dir.mkdir(parents=True, exist_ok=True)
+            for clip in clips[:room]:
+                cached_path = key_dir / f"{uuid4().hex}.wav"
+                try:
+                    _link_or_copy(clip.audio_path, cached_path)
+                except OSError:
+                    logger.warning("generation cache store failed for %s", clip.audio_path, exc_info=True)
+                    continue
+                pool.append(
+                    GeneratedClip(
+                        audio_path=cached_path,
+                        duration_sec=clip.duration_sec,
+                        raw_prompt=clip.raw_prompt,
+                    )
+                )
+
+    def _materialize(self, clip: GeneratedClip) -> GeneratedClip:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        served_path = self.tmp_dir / f"cached_{uuid4().hex}.wav"
+        _link_or_copy(clip.audio_path, served_path)
+        return GeneratedClip(
+            audio_path=served_path,
+            duration_sec=clip.duration_sec,
+            raw_prompt=clip.raw_prompt,
+        )
+
+
+def _wav_duration(path: Path, fallback: float) -> float:
+    try:
+        with wave.open(str(path), "rb") as handle:
+            return handle.getnframes() / float(handle.getframerate() or 1) or fallback
+    except Exception:
+        return fallback
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+from uuid import UUID
+
+import numpy as np
+
+from suno_backend.app.core.similarity import cosine_similarity_matrix
+from suno_backend.app.services.providers import GeneratedClip
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledCandidate:
+    clip: GeneratedClip
+    embedding: np.ndarray
+    added_at: float
+    size_bytes: int = 0
+
+
+class CandidatePool:
+    """Per-session store of generated-but-unused clips and their embeddings.
+
+    Audio is moved to media_root/{session_id}/candidates so it survives tmp cleanup and
+    goes away with the session directory. Entries are evicted oldest-first by age, by
+    per-session count and by a global disk quota.
+    """
+
+    def __init__(
+        self,
+        media_root: Path,
+        max_age_sec: float | None = 3600.0,
+        max_per_session: int | None = 50,
+        max_total_bytes: int | None = 512 * 1024 * 1024,
+    ) -> None:
+        self.media_root = media_root
+        self.max_age_sec = max_age_sec
+        self.max_per_session = max_per_session
+        self.max_total_bytes = max_total_bytes
+        self._entries: Dict[UUID, List[PooledCandidate]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, session_id: UUID, clip: GeneratedClip, embedding: np.ndarray) -> None:
+        """Take ownership of a rejected clip; its file is moved into the session pool dir."""
+        pool_dir = self.media_root / str(session_id) / "candidates"
+        pool_dir.mkdir(parents=True, exist_ok=True)
+        pooled_path = pool_dir / clip.audio_path.name
+        shutil.move(str(clip.audio_path), pooled_path)
+        candidate = PooledCandidate(
+            clip=GeneratedClip(
+                audio_path=pooled_path,
+                duration_sec=clip.duration_sec,
+                raw_prompt=clip.raw_prompt,
+            ),
+            embedding=embedding,
+            added_at=time.time(),
+            size_bytes=pooled_path.stat().st_size,
+        )
+        with self._lock:
+            self._entries.setdefault(session_id, []).append(candidate)
+            self._total_bytes += candidate.size_bytes
+            evicted = self._evict_locked(time.time())
+        self._delete_files(evicted)
+
+    def take(
+        self,
+        session_id: UUID,
+        centroid: np.ndarray,
+        min_similarity: float,
+        max_results: int,
+    ) -> List[PooledCandidate]:
+        """Remove and return up to max_results candidates scoring >= min_similarity, best first.
+
+        Scores every pooled embedding for the session in one vectorized pass; the caller
+        owns the returned files. Entries whose file is already gone (the media janitor
+        deleted the session directory) are dropped rather than returned.
+        """
+        with self._lock:
+            evicted = self._evict_locked(time.time())
+            entries = self._drop_missing_locked(session_id)
+            taken: List[PooledCandidate] = []
+            if entries and max_results > 0:
+                scores = cosine_similarity_matrix(
+                    np.stack([entry.embedding for entry in entries]), centroid
+                )[:, 0]
+                order = np.argsort(-scores, kind="stable")
+                chosen = [int(i) for i in order[:max_results] if scores[i] >= min_similarity]
+                if chosen:
+                    taken = [entries[i] for i in chosen]
+                    chosen_set = set(chosen)
+                    remaining = [e for i, e in enumerate(entries) if i not in chosen_set]
+                    if remaining:
+                        self._entries[session_id] = remaining
+                    else:
+                        del self._entries[session_id]
+                    self._total_bytes -= sum(entry.size_bytes for entry in taken)
+        self._delete_files(evicted)
+        return taken
+
+    def get_candidates(self, session_id: UUID) -> List[PooledCandidate]:
+        """Snapshot of pooled candidates for a session, oldest first."""
+        with self._lock:
+            return list(self._entries.get(session_id, []))
+
+    def size(self, session_id: UUID) -> int:
+        with self._lock:
+            return len(self._entries.get(session_id, []))
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def discard_session(self, session_id: UUID) -> None:
+        """Forget a session's candidates and delete their files."""
+        with self._lock:
+            entries = self._entries.pop(session_id, [])
+            self._total_bytes -= sum(entry.size_bytes for entry in entries)
+        self._delete_files(entries)
+
+    def _drop_missing_locked(self, session_id: UUID) -> List[PooledCandidate]:
+        entries = self._entries.get(session_id, [])
+        present: List[PooledCandidate] = []
+        missing: List[PooledCandidate] = []
+        for entry in entries:
+            (present if entry.clip.audio_path.exists() else missing).append(entry)
+        if missing:
+            logger.info(
+                "candidate pool dropped missing files session_id=%s count=%s",
+                session_id,
+                len(missing),
+            )
+            self._total_bytes -= sum(entry.size_bytes for entry in missing)
+            if present:
+                self._entries[session_id] = present
+            else:
+                self._entries.pop(session_id, None)
+        return present
+
+    def _evict_locked(self, now: float) -> List[PooledCandidate]:
+        evicted: List[PooledCandidate] = []
+        for session_id in list(self._entries):
+            entries = self._entries[session_id]
+            if self.max_age_sec is not None:
+                fresh = [e for e in entries if now - e.added_at <= self.max_age_sec]
+                evicted.extend(e for e in entries if now - e.added_at > self.max_age_sec)
+                entries = fresh
+            if self.max_per_session is not None and len(entries) > self.max_per_session:
+                overflow = len(entries) - self.max_per_session
+                evicted.extend(entries[:overflow])
+                entries = entries[overflow:]
+            if entries:
+                self._entries[session_id] = entries
+            else:
+                del self._entries[session_id]
+        self._total_bytes -= sum(entry.size_bytes for entry in evicted)
+
+        if self.max_total_bytes is not None and self._total_bytes > self.max_total_bytes:
+            by_age = sorted(
+                (
+                    (entry.added_at, session_id, entry)
+                    for session_id, entries in self._entries.items()
+                    for entry in entries
+                ),
+                key=lambda item: item[0],
+            )
+            for _, session_id, entry in by_age:
+                if self._total_bytes <= self.max_total_bytes:
+                    break
+                self._entries[session_id].remove(entry)
+                if not self._entries[session_id]:
+                    del self._entries[session_id]
+                self._total_bytes -= entry.size_bytes
+                evicted.append(entry)
+        return evicted
+
+    @staticmethod
+    def _delete_files(entries: List[PooledCandidate]) -> None:
+        for entry in entries:
+            try:
+                entry.clip.audio_path.unlink(missing_ok=True)
+            except Exception:
+                logger.warning("failed to delete pooled clip %s", entry.clip.audio_path, exc_info=True)
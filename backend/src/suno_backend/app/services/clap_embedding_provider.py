@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Tuple
-import wave
+from typing import Iterator, Tuple
 import logging
 
 import numpy as np
@@ -10,7 +10,16 @@ import torch
 import torchaudio
 from transformers import ClapModel, ClapProcessor
 
-from suno_backend.app.services.providers import EmbeddingProvider
+from suno_backend.app.core.audio_windows import (
+    WindowPooling,
+    WindowStrategy,
+    pool_windows,
+    read_wav_windows,
+)
+from suno_backend.app.metrics import stage_timer
+from suno_backend.app.profiling import active_profile
+from suno_backend.app.services.providers import EmbeddingProvider, WindowedEmbedding
+from suno_backend.app.tracing import current_span, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -45,75 +54,139 @@ def _load_model_once(model_name: str = "laion/clap-htsat-unfused") -> Tuple[Clap
     return _processor, _model, _model_dim
 
 
+@contextmanager
+def _torch_profiled(audio_path: Path) -> Iterator[None]:
+    """torch.profiler around feature extraction + forward when the request is being profiled."""
+    capture = active_profile()
+    if capture is None:
+        yield
+        return
+    with torch.profiler.profile(
+        activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True
+    ) as prof:
+        yield
+    table = prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=25)
+    capture.add_section("torch_clap.txt", f"# embed_audio {audio_path.name}\n{table}")
+
+
+def _record(name: str):
+    return torch.profiler.record_function(name) if active_profile() else nullcontext()
+
+
 class ClapEmbeddingProvider(EmbeddingProvider):
-    def __init__(self, model_name: str = "laion/clap-htsat-unfused") -> None:
-        """Load or reuse the global CLAP model and processor."""
+    def __init__(
+        self,
+        model_name: str = "laion/clap-htsat-unfused",
+        window_strategy: WindowStrategy = "full",
+        window_sec: float = 10.0,
+        num_windows: int = 3,
+        window_overlap: float = 0.5,
+        max_windows: int = 16,
+        window_pooling: WindowPooling = "mean",
+    ) -> None:
+        """Load or reuse the global CLAP model and processor.
+
+        window_strategy bounds how much of each clip is decoded and embedded (see
+        plan_windows); all windows go through one batched forward pass and are
+        pooled with window_pooling.
+        """
         self._processor, self._model, self._model_dim = _load_model_once(model_name)
+        self.window_strategy = window_strategy
+        self.window_sec = window_sec
+        self.num_windows = num_windows
+        self.window_overlap = window_overlap
+        self.max_windows = max_windows
+        self.window_pooling = window_pooling
 
     def embed_audio(self, audio_path: Path) -> np.ndarray:
+        return self.embed_audio_windows(audio_path).embedding
+
+    def embed_audio_windows(self, audio_path: Path) -> WindowedEmbedding:
         # NOTE:
         # - we intentionally bypass torchaudio.load/torchcodec; some wheel/env combos
         #   lack working codec backends. WAV-only decode via wave is sufficient
         #   because providers write 16-bit PCM WAV.
         # - if you change music providers to emit other formats/bitrates, add a
         #   decode path here instead of silently ingesting garbage.
-        logger.info("embed_audio start path=%s", audio_path)
-        with wave.open(str(audio_path), "rb") as wf:
-            sample_rate = wf.getframerate()
-            num_channels = wf.getnchannels()
-            num_frames = wf.getnframes()
-            sample_width = wf.getsampwidth()
-            if sample_width != 2:
-                raise ValueError("expected 16-bit PCM WAV input")
-            if num_channels not in (1, 2):
-                raise ValueError("expected mono or stereo PCM WAV input")
-            audio_bytes = wf.readframes(num_frames)
-
-        waveform_np = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32)
-        if num_channels > 1:
-            waveform_np = waveform_np.reshape(-1, num_channels).mean(axis=1)
+        logger.debug("embed_audio start path=%s", audio_path)
+        with stage_timer("decode"):
+            decoded = read_wav_windows(
+                audio_path,
+                self.window_strategy,
+                self.window_sec,
+                self.num_windows,
+                self.window_overlap,
+                self.max_windows,
+            )
+        sample_rate = decoded.sample_rate
+        num_channels = decoded.channels
+        num_frames = decoded.total_frames
+        windows_np = decoded.samples
+
+        decoded_frames = sum(len(window) for window in windows_np)
+        current_span().set_attributes(
+            {
+                "audio.sample_rate": sample_rate,
+                "audio.channels": num_channels,
+                "audio.frames": num_frames,
+                "audio.frames_decoded": decoded_frames,
+                "audio.bytes": decoded_frames * num_channels * 2,
+                "embed.windows": len(windows_np),
+            }
+        )
 
         # int16 PCM -> float32 [-1, 1]
-        waveform = torch.from_numpy(waveform_np) / 32768.0
-        waveform = waveform.unsqueeze(0)
+        waveforms = [torch.from_numpy(window) / 32768.0 for window in windows_np]
 
         if sample_rate != 48000:
-            resample = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=48000)
-            waveform = resample(waveform)
-
-        waveform = waveform.to(torch.float32)
-        if waveform.dim() > 1:
-            waveform = waveform.squeeze(0)
-
-        max_val = waveform.abs().max()
+            with stage_timer("resample"):
+                resample = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=48000)
+                if len({waveform.shape[-1] for waveform in waveforms}) == 1:
+                    # equal-length windows resample as one (num_windows, samples) batch
+                    waveforms = list(resample(torch.stack(waveforms)))
+                else:
+                    waveforms = [resample(waveform.unsqueeze(0)).squeeze(0) for waveform in waveforms]
+
+        # one gain for every window so their relative loudness survives pooling
+        max_val = max(float(waveform.abs().max()) if waveform.numel() else 0.0 for waveform in waveforms)
         if max_val > 0:
-            waveform = waveform / max_val
-
-        audio_inputs = self._processor(
-            audio=[waveform.numpy()],
-            return_tensors="pt",
-            sampling_rate=48000,
-        )
-
-        with torch.no_grad():
-            audio_embeds = self._model.get_audio_features(**audio_inputs)
-
-        embedding = audio_embeds.squeeze().to(torch.float32).cpu().numpy()
-        logger.info(
-            "embed_audio done path=%s sr=%s channels=%s frames=%s shape=%s mean=%.4f std=%.4f first3=%s",
-            audio_path,
-            sample_rate,
-            num_channels,
-            num_frames,
-            embedding.shape,
-            float(embedding.mean()),
-            float(embedding.std()),
-            np.array2string(embedding[:3], precision=4, floatmode="fixed"),
-        )
-        return embedding
+            waveforms = [waveform / max_val for waveform in waveforms]
+
+        with _torch_profiled(audio_path):
+            samples = sum(int(waveform.shape[-1]) for waveform in waveforms)
+            with start_span("clap.features", {"audio.samples": samples}), _record(
+                "clap.features"
+            ):
+                audio_inputs = self._processor(
+                    audio=[waveform.to(torch.float32).numpy() for waveform in waveforms],
+                    return_tensors="pt",
+                    sampling_rate=48000,
+                )
+
+            with stage_timer("embed_forward"), start_span("clap.forward"), _record(
+                "clap.get_audio_features"
+            ), torch.no_grad():
+                audio_embeds = self._model.get_audio_features(**audio_inputs)
+
+        window_embeddings = audio_embeds.to(torch.float32).cpu().numpy()
+        embedding = pool_windows(window_embeddings, self.window_pooling)
+        # summary stats cost an array2string per clip; only pay for them at DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "embed_audio done path=%s sr=%s channels=%s frames=%s shape=%s mean=%.4f std=%.4f first3=%s",
+                audio_path,
+                sample_rate,
+                num_channels,
+                num_frames,
+                embedding.shape,
+                float(embedding.mean()),
+                float(embedding.std()),
+                np.array2string(embedding[:3], precision=4, floatmode="fixed"),
+            )
+        return WindowedEmbedding(embedding, window_embeddings, decoded.spans_sec())
 
     def embed_text(self, text: str) -> np.ndarray:
-        logger.info("embed_text start len=%s", len(text))
+        logger.debug("embed_text start len=%s", len(text))
         text_inputs = self._processor(
             text=[text],
             return_tensors="pt",
@@ -124,12 +197,13 @@ class ClapEmbeddingProvider(EmbeddingProvider):
             text_embeds = self._model.get_text_features(**text_inputs)
 
         embedding = text_embeds.squeeze().to(torch.float32).cpu().numpy()
-        logger.info(
-            "embed_text done len=%s shape=%s mean=%.4f std=%.4f first3=%s",
-            len(text),
-            embedding.shape,
-            float(embedding.mean()),
-            float(embedding.std()),
-            np.array2string(embedding[:3], precision=4, floatmode="fixed"),
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "embed_text done len=%s shape=%s mean=%.4f std=%.4f first3=%s",
+                len(text),
+                embedding.shape,
+                float(embedding.mean()),
+                float(embedding.std()),
+                np.array2string(embedding[:3], precision=4, floatmode="fixed"),
+            )
         return embedding
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import queue
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+from uuid import UUID, uuid4
+
+logger = logging.getLogger(__name__)
+
+
+def streaming_wav_header(sample_rate: int, channels: int, sample_width: int) -> bytes:
+    """RIFF/WAVE header with 'unknown' (max) sizes so players start before the end arrives."""
+    byte_rate = sample_rate * channels * sample_width
+    return (
+        b"RIFF"
+        + struct.pack("<I", 0xFFFFFFFF)
+        + b"WAVEfmt "
+        + struct.pack(
+            "<IHHIIHH",
+            16,
+            1,
+            channels,
+            sample_rate,
+            byte_rate,
+            channels * sample_width,
+            sample_width * 8,
+        )
+        + b"data"
+        + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+@dataclass
+class ClipStream:
+    """PCM of one in-progress clip: the provider appends, any number of readers follow."""
+
+    stream_id: str
+    clip_index: int
+    sample_rate: int
+    channels: int = 1
+    sample_width: int = 2
+    created_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    failed: bool = False
+    source_path: Path | None = None
+    _buffer: bytearray = field(default_factory=bytearray, repr=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        with self._cond:
+            self._buffer.extend(chunk)
+            self._cond.notify_all()
+
+    def finish(self, source_path: Path | None = None) -> None:
+        with self._cond:
+            self.source_path = source_path
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def fail(self) -> None:
+        with self._cond:
+            self.failed = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def read(self, offset: int, timeout: float) -> Tuple[bytes, bool]:
+        """Bytes after `offset` (waiting up to timeout for more) and whether the stream ended."""
+        with self._cond:
+            if offset >= len(self._buffer) and not self.done:
+                self._cond.wait(timeout)
+            return bytes(self._buffer[offset:]), self.done and offset >= len(self._buffer)
+
+    @property
+    def bytes_buffered(self) -> int:
+        with self._cond:
+            return len(self._buffer)
+
+
+class ClipStreamHub:
+    """Registry of in-progress clip streams; finished ones linger briefly for late readers."""
+
+    def __init__(self, linger_sec: float = 120.0, max_streams: int = 256) -> None:
+        self.linger_sec = linger_sec
+        self.max_streams = max_streams
+        self._streams: Dict[str, ClipStream] = {}
+        self._lock = threading.Lock()
+
+    def open(
+        self, clip_index: int, sample_rate: int, channels: int = 1, sample_width: int = 2
+    ) -> ClipStream:
+        stream = ClipStream(uuid4().hex, clip_index, sample_rate, channels, sample_width)
+        with self._lock:
+            self._sweep_locked(reserve=1)
+            self._streams[stream.stream_id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> ClipStream | None:
+        with self._lock:
+            self._sweep_locked()
+            return self._streams.get(stream_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._streams)
+
+    def _sweep_locked(self, reserve: int = 0) -> None:
+        now = time.monotonic()
+        expired = [
+            stream_id
+            for stream_id, stream in self._streams.items()
+            if stream.finished_at is not None and now - stream.finished_at > self.linger_sec
+        ]
+        for stream_id in expired:
+            del self._streams[stream_id]
+        # hard cap: drop the oldest finished streams first, then the oldest overall
+        overflow = len(self._streams) + reserve - self.max_streams
+        if overflow > 0:
+            ordered = sorted(
+                self._streams.values(), key=lambda stream: (not stream.done, stream.created_at)
+            )
+            for stream in ordered[:overflow]:
+                del self._streams[stream.stream_id]
+
+
+class ClipObserver:
+    """Request-scoped hooks: providers announce streams, the service maps them to tracks.
+
+    Events for the client are put on `events` as (event_name, payload) tuples.
+    """
+
+    def __init__(self, hub: ClipStreamHub) -> None:
+        self.hub = hub
+        self.events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self._streams: Dict[Path, ClipStream] = {}
+        self.track_streams: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def clip_started(
+        self, clip_index: int, sample_rate: int, channels: int = 1, sample_width: int = 2
+    ) -> ClipStream:
+        stream = self.hub.open(clip_index, sample_rate, channels, sample_width)
+        payload = {
+            "index": clip_index,
+            "stream_id": stream.stream_id,
+            "stream_url": f"/streams/{stream.stream_id}",
+        }
+        self.events.put(("clip", payload))
+        return stream
+
+    def clip_finished(self, stream: ClipStream, source_path: Path | None) -> None:
+        if source_path is None:
+            stream.fail()
+            payload = {"index": stream.clip_index, "stream_id": stream.stream_id}
+            self.events.put(("clip_failed", payload))
+            return
+        stream.finish(source_path)
+        with self._lock:
+            self._streams[source_path] = stream
+        self.events.put(("clip_done", {"index": stream.clip_index, "stream_id": stream.stream_id}))
+
+    def track_finalized(self, source_path: Path, track_id: UUID) -> None:
+        with self._lock:
+            stream = self._streams.pop(source_path, None)
+            if stream is not None:
+                self.track_streams[stream.stream_id] = str(track_id)
+
+
+_observer: contextvars.ContextVar[ClipObserver | None] = contextvars.ContextVar(
+    "suno_clip_observer", default=None
+)
+
+
+def current_clip_observer() -> ClipObserver | None:
+    return _observer.get()
+
+
+@contextmanager
+def bind_clip_observer(observer: ClipObserver) -> Iterator[ClipObserver]:
+    token = _observer.set(observer)
+    try:
+        yield observer
+    finally:
+        _observer.reset(token)
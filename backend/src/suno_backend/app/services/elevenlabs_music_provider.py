@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import base64
+import contextvars
 import logging
 import wave
+from concurrent.futures import ThreadPoolExecutor, wait
 from email.parser import BytesParser
 from email.policy import default as default_policy
+from functools import partial
 from pathlib import Path
 from typing import List, Optional
 from uuid import uuid4
@@ -12,11 +15,30 @@ from uuid import uuid4
 import numpy as np
 import requests
 
+from suno_backend.app.logging_config import SAMPLED
+from suno_backend.app.metrics import stage_timer
+from suno_backend.app.profiling import run_profiled
+from suno_backend.app.request_context import (
+    current_deadline,
+    current_session_key,
+    deadline_expired,
+    time_budget,
+)
+from suno_backend.app.services.clip_streams import ClipObserver, current_clip_observer
+from suno_backend.app.services.hedging import Hedger
 from suno_backend.app.services.providers import GeneratedClip, MusicProvider
-from suno_backend.app.services.session_service import GenerationFailedError, InvalidRequestError
+from suno_backend.app.services.request_scheduler import RequestScheduler
+from suno_backend.app.services.session_service import (
+    DeadlineExceededError,
+    GenerationFailedError,
+    InvalidRequestError,
+)
+from suno_backend.app.tracing import current_span, start_span
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_BYTES = 16384
+
 
 class ElevenLabsMusicProvider(MusicProvider):
     def __init__(
@@ -27,6 +49,10 @@ class ElevenLabsMusicProvider(MusicProvider):
         timeout_seconds: float = 90.0,
         target_peak: float = 0.98,
         force_instrumental: bool = True,
+        max_concurrency: int = 4,
+        api_url: str = "https://api.elevenlabs.io",
+        scheduler: RequestScheduler | None = None,
+        hedger: Hedger | None = None,
     ) -> None:
         self.media_root = media_root
         self.output_format = output_format
@@ -36,6 +62,10 @@ class ElevenLabsMusicProvider(MusicProvider):
         self.timeout_seconds = timeout_seconds
         self.target_peak = target_peak
         self.force_instrumental = force_instrumental
+        self.max_concurrency = max(1, max_concurrency)
+        self.api_url = api_url.rstrip("/")
+        self.scheduler = scheduler
+        self.hedger = hedger
         self.tmp_dir = self.media_root / "tmp"
         self.tmp_dir.mkdir(parents=True, exist_ok=True)
 
@@ -47,29 +77,95 @@ class ElevenLabsMusicProvider(MusicProvider):
         self, prompt: str, num_clips: int, duration_sec: float
     ) -> List[GeneratedClip]:
         clips: List[GeneratedClip] = []
-        for idx in range(num_clips):
-            try:
-                clip = self._generate_single_clip(prompt, duration_sec, idx)
-            except InvalidRequestError:
+        workers = max(1, min(self.max_concurrency, num_clips))
+        # hedged duplicates would announce two streams for one clip, so streamed batches skip it
+        if self.hedger is not None and current_clip_observer() is None:
+            outcomes = self.hedger.run(
+                [
+                    partial(self._generate_single_clip, prompt, duration_sec, idx)
+                    for idx in range(num_clips)
+                ],
+                max_workers=workers,
+                discard=_discard_clip,
+                deadline=current_deadline(),
+            )
+        else:
+            outcomes = self._run_parallel(prompt, num_clips, duration_sec, workers)
+        for idx, outcome in enumerate(outcomes):
+            if isinstance(outcome, InvalidRequestError):
                 # propagate prompt violations immediately so caller can surface a 400
-                raise
-            except Exception:
-                logger.exception("ElevenLabs clip generation failed (index=%s)", idx)
+                raise outcome
+            if isinstance(outcome, BaseException):
+                logger.error(
+                    "ElevenLabs clip generation failed (index=%s)", idx, exc_info=outcome
+                )
                 continue
+            clip = outcome
             if clip:
                 clips.append(clip)
             else:
                 logger.warning("ElevenLabs clip generation returned None (index=%s)", idx)
 
         if not clips:
+            if deadline_expired():
+                raise DeadlineExceededError("ElevenLabsMusicProvider: deadline exceeded")
             raise GenerationFailedError("ElevenLabsMusicProvider: all generations failed")
+        if len(clips) < num_clips and deadline_expired():
+            logger.warning(
+                "ElevenLabs deadline reached; returning %s of %s clips", len(clips), num_clips
+            )
 
         return clips
 
+    def _run_parallel(
+        self, prompt: str, num_clips: int, duration_sec: float, workers: int
+    ) -> List[Optional[GeneratedClip] | BaseException]:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        # each worker runs in a copy of the caller's context so the session key follows
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run,
+                run_profiled,
+                self._generate_single_clip,
+                prompt,
+                duration_sec,
+                idx,
+            )
+            for idx in range(num_clips)
+        ]
+        deadline = current_deadline()
+        wait(futures, timeout=None if deadline is None else deadline.remaining())
+        pool.shutdown(wait=False, cancel_futures=True)
+        outcomes: List[Optional[GeneratedClip] | BaseException] = []
+        for future in futures:
+            if future.done() and not future.cancelled():
+                outcomes.append(future.exception() or future.result())
+                continue
+            # past the deadline: keep what finished, clean up whatever lands later
+            future.add_done_callback(_discard_late_clip)
+            outcomes.append(DeadlineExceededError("clip not finished before deadline"))
+        return outcomes
+
     def _generate_single_clip(
         self, prompt: str, duration_sec: float, clip_index: int
     ) -> Optional[GeneratedClip]:
-        url = "https://api.elevenlabs.io/v1/music/detailed"
+        with start_span(
+            "elevenlabs.generate_clip",
+            {
+                "clip.index": clip_index,
+                "clip.duration_sec": duration_sec,
+                "audio.format": self.output_format,
+            },
+        ):
+            observer = current_clip_observer()
+            if observer is not None:
+                return self._stream_clip(prompt, duration_sec, clip_index, observer)
+            return self._request_clip(prompt, duration_sec, clip_index)
+
+    def _request_clip(
+        self, prompt: str, duration_sec: float, clip_index: int
+    ) -> Optional[GeneratedClip]:
+        url = f"{self.api_url}/v1/music/detailed"
         params = {"output_format": self.output_format}
         payload = {
             "prompt": prompt,
@@ -78,52 +174,128 @@ class ElevenLabsMusicProvider(MusicProvider):
             "force_instrumental": self.force_instrumental,
         }
         headers = {"xi-api-key": self.api_key, "Content-Type": "application/json"}
+        if deadline_expired():
+            raise DeadlineExceededError("ElevenLabs: deadline exceeded before request")
 
         logger.info(
             "ElevenLabs request clip=%s duration=%.2fs format=%s",
             clip_index,
             duration_sec,
             self.output_format,
+            extra=SAMPLED,
         )
-        resp = requests.post(
-            url, headers=headers, params=params, json=payload, timeout=self.timeout_seconds
-        )
-        if resp.status_code != 200:
-            detail = None
-            suggestion = None
-            try:
-                detail_json = resp.json()
-                detail = detail_json.get("detail") if isinstance(detail_json, dict) else None
-                if isinstance(detail, dict):
-                    suggestion = detail.get("data", {}).get("prompt_suggestion")
-            except Exception:
-                detail_json = resp.text
-
-            logger.error(
-                "ElevenLabs HTTP error clip=%s status=%s body=%s suggestion=%s",
-                clip_index,
-                resp.status_code,
-                detail_json,
-                suggestion,
-            )
 
-            if resp.status_code == 400 and isinstance(detail, dict):
-                message = detail.get("message") or "prompt rejected by ElevenLabs"
-                if suggestion:
-                    message = f"{message} (suggestion: {suggestion})"
-                raise InvalidRequestError(message)
+        def post() -> requests.Response:
+            return requests.post(
+                url,
+                headers=headers,
+                params=params,
+                json=payload,
+                timeout=time_budget(self.timeout_seconds),
+            )
 
-            raise GenerationFailedError(f"ElevenLabs: status {resp.status_code}")
+        with stage_timer("generate_clip"):
+            if self.scheduler is not None:
+                resp = self.scheduler.submit(current_session_key(), post)
+            else:
+                resp = post()
+        current_span().set_attributes(
+            {"http.status_code": resp.status_code, "http.response_bytes": len(resp.content)}
+        )
+        if resp.status_code != 200:
+            self._raise_for_status(resp, clip_index)
 
         audio_bytes = self._extract_audio_bytes(resp)
         if not audio_bytes:
             raise GenerationFailedError("ElevenLabs: no audio in response")
+        return self._write_clip(prompt, clip_index, audio_bytes)
+
+    def _stream_clip(
+        self, prompt: str, duration_sec: float, clip_index: int, observer: ClipObserver
+    ) -> Optional[GeneratedClip]:
+        """Like _request_clip, but relays PCM chunks to the observer as they arrive."""
+        url = f"{self.api_url}/v1/music/stream"
+        params = {"output_format": self.output_format}
+        payload = {
+            "prompt": prompt,
+            "music_length_ms": int(duration_sec * 500),
+            "model_id": "music_v1",
+            "force_instrumental": self.force_instrumental,
+        }
+        headers = {"xi-api-key": self.api_key, "Content-Type": "application/json"}
+        if deadline_expired():
+            raise DeadlineExceededError("ElevenLabs: deadline exceeded before request")
 
+        logger.info(
+            "ElevenLabs stream clip=%s duration=%.2fs format=%s",
+            clip_index,
+            duration_sec,
+            self.output_format,
+            extra=SAMPLED,
+        )
+
+        stream = observer.clip_started(clip_index, self.sample_rate, self.channels, self.sample_width)
+        audio = bytearray()
+
+        def post() -> requests.Response:
+            resp = requests.post(
+                url,
+                headers=headers,
+                params=params,
+                json=payload,
+                stream=True,
+                timeout=time_budget(self.timeout_seconds),
+            )
+            if resp.status_code != 200:
+                return resp  # small error body; the scheduler decides whether to retry
+            # read the body inside the scheduled call so its concurrency slot stays held
+            # until the stream is exhausted or closed, not just until headers arrive
+            with resp:
+                try:
+                    for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                        if deadline_expired():
+                            raise DeadlineExceededError("ElevenLabs: deadline exceeded mid-stream")
+                        audio.extend(chunk)
+                        stream.write(chunk)
+                except requests.RequestException as exc:
+                    # listeners already have the earlier chunks; a retry would repeat them
+                    raise GenerationFailedError(f"ElevenLabs: stream interrupted: {exc}") from exc
+            return resp
+
+        audio_path: Path | None = None
+        try:
+            with stage_timer("generate_clip"):
+                if self.scheduler is not None:
+                    resp = self.scheduler.submit(current_session_key(), post)
+                else:
+                    resp = post()
+            if resp.status_code != 200:
+                with resp:
+                    self._raise_for_status(resp, clip_index)
+            current_span().set_attributes(
+                {"http.status_code": resp.status_code, "http.response_bytes": len(audio)}
+            )
+            if not audio:
+                raise GenerationFailedError("ElevenLabs: no audio in stream")
+            clip = self._write_clip(prompt, clip_index, bytes(audio))
+            audio_path = clip.audio_path
+            return clip
+        finally:
+            observer.clip_finished(stream, audio_path)
+
+    def _write_clip(self, prompt: str, clip_index: int, audio_bytes: bytes) -> GeneratedClip:
         frame_count = len(audio_bytes) // (self.sample_width * self.channels)
         if frame_count <= 0:
             raise GenerationFailedError("ElevenLabs: zero frames")
 
         duration = frame_count / float(self.sample_rate)
+        current_span().set_attributes(
+            {
+                "audio.bytes": len(audio_bytes),
+                "audio.sample_rate": self.sample_rate,
+                "audio.frames": frame_count,
+            }
+        )
         audio_bytes = self._peak_normalize(audio_bytes)
 
         try:
@@ -145,6 +317,7 @@ class ElevenLabsMusicProvider(MusicProvider):
             audio_path,
             frame_count,
             duration,
+            extra=SAMPLED,
         )
         return GeneratedClip(
             audio_path=audio_path,
@@ -152,6 +325,33 @@ class ElevenLabsMusicProvider(MusicProvider):
             raw_prompt=prompt,
         )
 
+    def _raise_for_status(self, resp: requests.Response, clip_index: int) -> None:
+        detail = None
+        suggestion = None
+        try:
+            detail_json = resp.json()
+            detail = detail_json.get("detail") if isinstance(detail_json, dict) else None
+            if isinstance(detail, dict):
+                suggestion = detail.get("data", {}).get("prompt_suggestion")
+        except Exception:
+            detail_json = resp.text
+
+        logger.error(
+            "ElevenLabs HTTP error clip=%s status=%s body=%s suggestion=%s",
+            clip_index,
+            resp.status_code,
+            detail_json,
+            suggestion,
+        )
+
+        if resp.status_code == 400 and isinstance(detail, dict):
+            message = detail.get("message") or "prompt rejected by ElevenLabs"
+            if suggestion:
+                message = f"{message} (suggestion: {suggestion})"
+            raise InvalidRequestError(message)
+
+        raise GenerationFailedError(f"ElevenLabs: status {resp.status_code}")
+
     def _extract_audio_bytes(self, resp: requests.Response) -> bytes | None:
         content_type = resp.headers.get("content-type", "")
         if "multipart" not in content_type:
@@ -214,3 +414,13 @@ class ElevenLabsMusicProvider(MusicProvider):
             np.int16
         )
         return normalized.tobytes()
+
+
+def _discard_clip(clip: Optional[GeneratedClip]) -> None:
+    if clip is not None:
+        clip.audio_path.unlink(missing_ok=True)
+
+
+def _discard_late_clip(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _discard_clip(future.result())
@@ -1,11 +1,13 @@
 import hashlib
 from typing import List
 
+from suno_backend.app.services.fake_latency import FakeLatency
 from suno_backend.app.services.providers import ClusterNamingProvider
 
 
 class FakeClusterNamingProvider(ClusterNamingProvider):
-    def __init__(self) -> None:
+    def __init__(self, latency: FakeLatency | None = None) -> None:
+        self.latency = latency
         self._words = [
             "cluster",
             "alpha",
@@ -20,6 +22,8 @@ class FakeClusterNamingProvider(ClusterNamingProvider):
         ]
 
     def name_cluster(self, prompts: List[str]) -> str:
+        if self.latency is not None:
+            self.latency.pause("naming")
         combined = "|".join(prompts)
         digest = hashlib.sha256(combined.encode("utf-8")).digest()
 
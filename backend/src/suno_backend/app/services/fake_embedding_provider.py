@@ -3,14 +3,17 @@ from pathlib import Path
 
 import numpy as np
 
+from suno_backend.app.services.fake_latency import FakeLatency
 from suno_backend.app.services.providers import EmbeddingProvider
 
 
 class FakeEmbeddingProvider(EmbeddingProvider):
-    def __init__(self) -> None:
-        pass
+    def __init__(self, latency: FakeLatency | None = None) -> None:
+        self.latency = latency
 
     def embed_audio(self, audio_path: Path) -> np.ndarray:
+        if self.latency is not None:
+            self.latency.pause("embedding")
         return self._vector_from_string(str(audio_path))
 
     def embed_text(self, text: str) -> np.ndarray:
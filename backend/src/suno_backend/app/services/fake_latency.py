@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+
+@dataclass
+class FakeLatency:
+    """Latency and failure model for fake providers (benchmarks and load tests).
+
+    distribution: "fixed" (always mean_sec), "uniform" (0..2*mean_sec) or "lognormal"
+    (median mean_sec, spread sigma). Each call fails independently with failure_rate.
+    """
+
+    mean_sec: float = 0.0
+    distribution: str = "fixed"
+    sigma: float = 0.5
+    failure_rate: float = 0.0
+    seed: int | None = None
+    sleep: Callable[[float], None] = time.sleep
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"unsupported latency distribution '{self.distribution}'")
+        if not 0.0 <= self.failure_rate <= 1.0:
+            raise ValueError("failure_rate must be within [0, 1]")
+        self._rng = random.Random(self.seed)
+
+    def sample(self) -> float:
+        if self.mean_sec <= 0:
+            return 0.0
+        with self._lock:
+            if self.distribution == "uniform":
+                return self._rng.uniform(0.0, 2.0 * self.mean_sec)
+            if self.distribution == "lognormal":
+                return self.mean_sec * self._rng.lognormvariate(0.0, self.sigma)
+        return self.mean_sec
+
+    def fails(self) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    def pause(self, what: str) -> None:
+        """Sleep one sampled delay, then raise RuntimeError if this call is a failure."""
+        self.sleep(self.sample())
+        if self.fails():
+            raise RuntimeError(f"simulated {what} failure")
+
+    def pause_parallel(self, count: int) -> List[bool]:
+        """Model `count` concurrent calls: sleep the slowest, return per-call success."""
+        delays = [self.sample() for _ in range(count)]
+        self.sleep(max(delays, default=0.0))
+        return [not self.fails() for _ in range(count)]
@@ -5,23 +5,37 @@ import wave
 
 import numpy as np
 
+from suno_backend.app.services.clip_streams import current_clip_observer
+from suno_backend.app.services.fake_latency import FakeLatency
 from suno_backend.app.services.providers import GeneratedClip, MusicProvider
+from suno_backend.app.services.session_service import GenerationFailedError
 
 
 class FakeMusicProvider(MusicProvider):
-    def __init__(self, media_root: Path) -> None:
+    def __init__(self, media_root: Path, latency: FakeLatency | None = None) -> None:
         self.media_root = media_root
+        # clips are "generated" concurrently: the batch waits for the slowest, failures drop clips
+        self.latency = latency
 
     def generate_batch(self, prompt: str, num_clips: int, duration_sec: float) -> List[GeneratedClip]:
+        succeeded = self.latency.pause_parallel(num_clips) if self.latency else [True] * num_clips
+        if not any(succeeded):
+            raise GenerationFailedError("no clips generated")
         tmp_dir = self.media_root / "tmp"
         tmp_dir.mkdir(parents=True, exist_ok=True)
 
         sample_rate = 16000
         frame_count = max(1, int(duration_sec * sample_rate))
         silence = np.zeros(frame_count, dtype=np.int16)
+        observer = current_clip_observer()
 
         clips: List[GeneratedClip] = []
         for i in range(num_clips):
+            stream = observer.clip_started(i, sample_rate) if observer else None
+            if not succeeded[i]:
+                if stream is not None:
+                    observer.clip_finished(stream, None)
+                continue
             filename = f"tmp_{i}_{uuid4().hex}.wav"
             audio_path = tmp_dir / filename
             with wave.open(str(audio_path), "wb") as wf:
@@ -29,6 +43,9 @@ class FakeMusicProvider(MusicProvider):
                 wf.setsampwidth(2)
                 wf.setframerate(sample_rate)
                 wf.writeframes(silence.tobytes())
+            if stream is not None:
+                stream.write(silence.tobytes())
+                observer.clip_finished(stream, audio_path)
 
             clips.append(
                 GeneratedClip(
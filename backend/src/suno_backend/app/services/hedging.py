@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Dict, Generic, List, Optional, TypeVar
+
+import numpy as np
+
+from suno_backend.app.metrics import HEDGE_SECONDS_SAVED, HEDGES_FIRED, HEDGES_WON
+from suno_backend.app.profiling import run_profiled
+from suno_backend.app.request_context import Deadline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+POLL_INTERVAL_SEC = 0.05
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies; p90 once enough samples exist."""
+
+    def __init__(self, window: int = 200, min_samples: int = 10) -> None:
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_sec: float) -> None:
+        with self._lock:
+            self._samples.append(latency_sec)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            return float(np.percentile(np.fromiter(self._samples, dtype=np.float64), q))
+
+
+@dataclass
+class HedgeStats:
+    batches: int = 0
+    requests: int = 0
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    # measured once the slower attempt of a hedged pair finishes
+    latency_saved_sec: float = 0.0
+
+
+@dataclass
+class _Attempt(Generic[T]):
+    index: int
+    hedge: bool
+    future: "Future[T] | None" = None
+    # set on the worker thread, so time spent queued for a worker is not counted as running
+    started: float | None = None
+    finished: float | None = None
+
+    def elapsed(self, now: float) -> float:
+        return 0.0 if self.started is None else now - self.started
+
+
+class Hedger:
+    """Run one callable per slot and race a duplicate for stragglers.
+
+    A slot gets a single speculative duplicate when at most `hedge_when_remaining` slots
+    are still outstanding (after at least one finished), or when its primary has run
+    longer than the rolling p90. Duplicates per batch are capped by `max_hedges_per_batch`.
+    The first success wins; the losing attempt is cancelled if it has not started, and
+    its result is passed to `discard` if it completes later. Stats are shared across
+    batches.
+    """
+
+    def __init__(
+        self,
+        max_hedges_per_batch: int = 2,
+        hedge_when_remaining: int = 1,
+        tracker: LatencyTracker | None = None,
+    ) -> None:
+        self.max_hedges_per_batch = max(0, max_hedges_per_batch)
+        self.hedge_when_remaining = max(0, hedge_when_remaining)
+        self.tracker = tracker or LatencyTracker()
+        self.stats = HedgeStats()
+        self._stats_lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return asdict(self.stats)
+
+    def run(
+        self,
+        tasks: List[Callable[[], T]],
+        max_workers: int,
+        discard: Optional[Callable[[T], None]] = None,
+        deadline: Deadline | None = None,
+    ) -> List[T | BaseException]:
+        """Return one outcome per task, in order: its value or the exception it raised.
+
+        Slots still running when the deadline passes resolve to TimeoutError; their
+        attempts are abandoned and discarded if they complete.
+        """
+        n = len(tasks)
+        outcomes: Dict[int, T | BaseException] = {}
+        errors: Dict[int, BaseException] = {}
+        attempts: Dict[Future, _Attempt] = {}
+        by_index: Dict[int, List[_Attempt]] = {i: [] for i in range(n)}
+        hedges = 0
+        # primaries never exceed max_workers; hedges get their own threads so a duplicate
+        # starts at once instead of queueing behind primaries that have not started
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        hedge_executor = (
+            ThreadPoolExecutor(max_workers=self.max_hedges_per_batch)
+            if self.max_hedges_per_batch
+            else None
+        )
+
+        def submit(index: int, hedge: bool) -> None:
+            attempt: _Attempt = _Attempt(index=index, hedge=hedge)
+            context = contextvars.copy_context()
+
+            def timed() -> T:
+                attempt.started = time.perf_counter()
+                try:
+                    return context.run(run_profiled, tasks[index])
+                finally:
+                    attempt.finished = time.perf_counter()
+
+            future = (hedge_executor if hedge and hedge_executor else executor).submit(timed)
+            attempt.future = future
+            attempts[future] = attempt
+            by_index[index].append(attempt)
+
+        try:
+            for index in range(n):
+                submit(index, hedge=False)
+            pending = set(attempts)
+            while len(outcomes) < n:
+                if deadline is not None and deadline.expired:
+                    for index in range(n):
+                        if index in outcomes:
+                            continue
+                        outcomes[index] = TimeoutError("deadline exceeded")
+                        for attempt in by_index[index]:
+                            if not attempt.future.cancel() and discard is not None:
+                                attempt.future.add_done_callback(
+                                    lambda fut: self._on_loser_done(fut, 0.0, False, discard)
+                                )
+                    break
+                p90 = self.tracker.percentile(90)
+                poll = POLL_INTERVAL_SEC
+                if deadline is not None:
+                    poll = min(poll, deadline.remaining())
+                done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+                now = time.perf_counter()
+                for future in done:
+                    attempt = attempts[future]
+                    if attempt.index in outcomes:
+                        continue
+                    exc = future.exception()
+                    if exc is None:
+                        assert attempt.started is not None and attempt.finished is not None
+                        self.tracker.record(attempt.finished - attempt.started)
+                        outcomes[attempt.index] = future.result()
+                        self._settle(attempt, by_index[attempt.index], now, discard)
+                    elif not any(not a.future.done() for a in by_index[attempt.index]):
+                        outcomes[attempt.index] = errors.get(attempt.index, exc)
+                    else:
+                        errors.setdefault(attempt.index, exc)
+
+                remaining = [i for i in range(n) if i not in outcomes]
+                for index in remaining:
+                    if hedges >= self.max_hedges_per_batch:
+                        break
+                    if len(by_index[index]) > 1:
+                        continue
+                    primary = by_index[index][0]
+                    tail = len(remaining) <= self.hedge_when_remaining and len(remaining) < n
+                    slow = p90 is not None and primary.elapsed(now) > p90
+                    if tail or slow:
+                        hedges += 1
+                        submit(index, hedge=True)
+                        pending.add(by_index[index][-1].future)
+                        logger.info(
+                            "hedge fired index=%s elapsed=%.2fs p90=%s reason=%s",
+                            index,
+                            primary.elapsed(now),
+                            f"{p90:.2f}s" if p90 is not None else None,
+                            "tail" if tail else "p90",
+                        )
+        finally:
+            # never block on losers; queued-but-unstarted attempts are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+            if hedge_executor is not None:
+                hedge_executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._stats_lock:
+            self.stats.batches += 1
+            self.stats.requests += sum(len(group) for group in by_index.values())
+            self.stats.hedges_fired += hedges
+        HEDGES_FIRED.inc(hedges)
+        return [outcomes[i] for i in range(n)]
+
+    def _settle(
+        self,
+        winner: _Attempt,
+        group: List[_Attempt],
+        finished: float,
+        discard: Optional[Callable[[T], None]],
+    ) -> None:
+        for loser in group:
+            if loser is winner:
+                continue
+            if winner.hedge:
+                HEDGES_WON.inc()
+                with self._stats_lock:
+                    self.stats.hedges_won += 1
+            if loser.future.cancel():
+                continue
+            loser.future.add_done_callback(
+                lambda fut, hedged=winner.hedge: self._on_loser_done(fut, finished, hedged, discard)
+            )
+
+    def _on_loser_done(
+        self,
+        future: Future,
+        winner_finished: float,
+        hedge_won: bool,
+        discard: Optional[Callable[[T], None]],
+    ) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        if hedge_won:
+            saved = max(0.0, time.perf_counter() - winner_finished)
+            HEDGE_SECONDS_SAVED.inc(saved)
+            with self._stats_lock:
+                self.stats.latency_saved_sec += saved
+        if discard is not None:
+            try:
+                discard(future.result())
+            except Exception:
+                logger.warning("failed to discard losing hedge result", exc_info=True)
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from uuid import UUID, uuid4
+
+from suno_backend.app.metrics import MEDIA_DELETES_PENDING, MEDIA_DISK_BYTES, MEDIA_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+TRASH_DIR = ".trash"
+TMP_DIR = "tmp"
+# evict down to this share of the quota so one new session does not trigger another pass
+LOW_WATERMARK = 0.9
+# persist plays to the session dir's mtime at most this often
+TOUCH_PERSIST_SEC = 60.0
+_STOP = object()
+
+
+@dataclass
+class _SessionUsage:
+    session_id: str
+    path: Path
+    bytes: int
+    last_used: float
+
+
+def _tree_bytes(path: Path) -> int:
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _tree_bytes(Path(entry.path))
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return total
+
+
+def _is_session_dir(name: str) -> bool:
+    try:
+        UUID(name)
+    except ValueError:
+        return False
+    return True
+
+
+class MediaJanitor:
+    """Background upkeep of media_root: async deletes, tmp sweeps and a disk quota.
+
+    Deletes are a rename into media_root/.trash (instant, the path disappears from /media)
+    followed by removal on the janitor thread, so no request waits on a large tree.
+    Every `interval_sec` the thread unlinks media_root/tmp files older than
+    `tmp_max_age_sec` (clips orphaned by failed generations) and, above `quota_bytes`,
+    evicts whole session directories least-recently-played first. Sessions used within
+    `min_idle_sec` are never evicted, which keeps in-flight generations safe.
+    `on_delete(session_id)` runs whenever a session directory is scheduled for deletion
+    (quota, session eviction or clear), so derived state such as the track index can follow.
+    """
+
+    def __init__(
+        self,
+        media_root: Path,
+        quota_bytes: int | None = None,
+        tmp_max_age_sec: float = 3600.0,
+        min_idle_sec: float = 600.0,
+        interval_sec: float = 60.0,
+        on_delete: Callable[[str], None] | None = None,
+    ) -> None:
+        self.media_root = media_root
+        self.quota_bytes = quota_bytes
+        self.tmp_max_age_sec = tmp_max_age_sec
+        self.min_idle_sec = min_idle_sec
+        self.interval_sec = interval_sec
+        self.on_delete = on_delete
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._played: Dict[str, float] = {}
+        self._persisted: Dict[str, float] = {}
+        # session dir -> ((dir mtime, candidates mtime), bytes); files are written once, so
+        # sizes only change when a directory entry does
+        self._sizes: Dict[str, Tuple[Tuple[int, int], int]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def trash_dir(self) -> Path:
+        return self.media_root / TRASH_DIR
+
+    @property
+    def total_bytes(self) -> int:
+        """media_root usage as of the last sweep, excluding trash awaiting deletion."""
+        return self._total_bytes
+
+    def start(self) -> None:
+        """Start the janitor thread (idempotent); trash left by a previous run is queued."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.media_root.mkdir(parents=True, exist_ok=True)
+            self.trash_dir.mkdir(exist_ok=True)
+            for leftover in self.trash_dir.iterdir():
+                self._queue.put(leftover)
+            self._thread = threading.Thread(target=self._run, name="media-janitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after the deletions queued so far; whatever is left is purged on next start."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued deletion has finished (tests, shutdown hooks)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def touch(self, session_id: str) -> None:
+        """Record a play; cheap enough to call on every /media request."""
+        now = time.time()
+        self._played[session_id] = now
+        if now - self._persisted.get(session_id, 0.0) < TOUCH_PERSIST_SEC:
+            return
+        self._persisted[session_id] = now
+        try:
+            # the dir mtime carries last-played across restarts
+            os.utime(self.media_root / session_id, (now, now))
+        except OSError:
+            pass
+
+    def schedule_delete(self, path: Path, reason: str = "clear") -> bool:
+        """Move `path` out of sight now and delete it on the janitor thread."""
+        self.start()
+        target = self.trash_dir / f"{uuid4().hex}-{path.name}"
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            logger.warning("media janitor could not move %s to trash; deleting in place", path)
+            target = path
+        self._played.pop(path.name, None)
+        self._persisted.pop(path.name, None)
+        self._sizes.pop(path.name, None)
+        MEDIA_EVICTIONS.inc(reason=reason)
+        self._queue.put(target)
+        MEDIA_DELETES_PENDING.set(self._queue.qsize())
+        if path.parent == self.media_root and _is_session_dir(path.name):
+            self._notify_delete(path.name)
+        return True
+
+    def clear(self) -> int:
+        """Schedule everything under media_root for deletion; returns the entries moved."""
+        self.start()
+        moved = 0
+        for child in list(self.media_root.iterdir()):
+            if child.name != TRASH_DIR and self.schedule_delete(child, reason="clear"):
+                moved += 1
+        logger.info("media janitor cleared media_root=%s entries=%s", self.media_root, moved)
+        return moved
+
+    def sweep(self) -> None:
+        """One pass: drop stale tmp files, then enforce the quota."""
+        now = time.time()
+        tmp_bytes = self._sweep_tmp(now)
+        sessions = self._scan_sessions()
+        total = tmp_bytes + sum(usage.bytes for usage in sessions)
+        if self.quota_bytes is not None and total > self.quota_bytes:
+            total = self._evict(sessions, total, now)
+        self._total_bytes = total
+        MEDIA_DISK_BYTES.set(total)
+
+    def _sweep_tmp(self, now: float) -> int:
+        remaining = 0
+        removed = 0
+        tmp_dir = self.media_root / TMP_DIR
+        try:
+            entries = list(os.scandir(tmp_dir))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                stale = now - stat.st_mtime > self.tmp_max_age_sec
+                if stale and entry.is_file(follow_symlinks=False):
+                    os.unlink(entry.path)
+                    removed += 1
+                else:
+                    remaining += stat.st_size
+            except FileNotFoundError:
+                continue
+        if removed:
+            MEDIA_EVICTIONS.inc(removed, reason="tmp")
+            logger.info("media janitor removed stale tmp files=%s", removed)
+        return remaining
+
+    def _scan_sessions(self) -> List[_SessionUsage]:
+        usages: List[_SessionUsage] = []
+        try:
+            entries = list(os.scandir(self.media_root))
+        except FileNotFoundError:
+            return usages
+        seen = set()
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False) or not _is_session_dir(entry.name):
+                continue
+            path = Path(entry.path)
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            stamp = (stat.st_mtime_ns, self._candidates_mtime(path))
+            cached = self._sizes.get(entry.name)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, _tree_bytes(path))
+                self._sizes[entry.name] = cached
+            seen.add(entry.name)
+            last_used = max(stat.st_mtime, self._played.get(entry.name, 0.0))
+            usages.append(_SessionUsage(entry.name, path, cached[1], last_used))
+        # forget sessions whose directory went away by other means
+        for cache in (self._sizes, self._played, self._persisted):
+            for name in set(cache) - seen:
+                cache.pop(name, None)
+        return usages
+
+    @staticmethod
+    def _candidates_mtime(path: Path) -> int:
+        try:
+            return (path / "candidates").stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _evict(self, sessions: List[_SessionUsage], total: int, now: float) -> int:
+        assert self.quota_bytes is not None
+        target = self.quota_bytes * LOW_WATERMARK
+        evicted = 0
+        for usage in sorted(sessions, key=lambda usage: usage.last_used):
+            if total <= target:
+                break
+            if now - usage.last_used < self.min_idle_sec:
+                continue
+            if self.schedule_delete(usage.path, reason="quota"):
+                total -= usage.bytes
+                evicted += 1
+        logger.info(
+            "media janitor evicted sessions=%s usage_bytes=%s quota_bytes=%s",
+            evicted,
+            total,
+            self.quota_bytes,
+        )
+        if total > self.quota_bytes:
+            logger.warning(
+                "media still over quota (%s > %s bytes); the remaining sessions were used "
+                "in the last %.0fs",
+                total,
+                self.quota_bytes,
+                self.min_idle_sec,
+            )
+        return total
+
+    def _notify_delete(self, session_id: str) -> None:
+        if self.on_delete is None:
+            return
+        try:
+            self.on_delete(session_id)
+        except Exception:
+            logger.warning("media on_delete failed session_id=%s", session_id, exc_info=True)
+
+    def _delete(self, path: Path) -> None:
+        try:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+        except Exception:
+            logger.warning("failed to delete media path %s", path, exc_info=True)
+
+    def _run(self) -> None:
+        next_sweep = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_sweep - time.monotonic()))
+            except queue.Empty:
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception("media janitor sweep failed")
+                next_sweep = time.monotonic() + self.interval_sec
+                continue
+            try:
+                if item is _STOP:
+                    return
+                self._delete(item)  # type: ignore[arg-type]
+            finally:
+                self._queue.task_done()
+                MEDIA_DELETES_PENDING.set(self._queue.qsize())
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from suno_backend.app.metrics import TRANSCODE_LAG_SECONDS, stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    suffix: str
+    media_type: str
+    codec_args: Sequence[str]
+
+
+RENDITIONS: Dict[str, Rendition] = {
+    "opus": Rendition(
+        "opus", ".opus", "audio/ogg", ("-c:a", "libopus", "-b:a", "{bitrate}k", "-f", "ogg")
+    ),
+    "mp3": Rendition(
+        "mp3", ".mp3", "audio/mpeg", ("-c:a", "libmp3lame", "-b:a", "{bitrate}k", "-f", "mp3")
+    ),
+}
+WAV_MEDIA_TYPE = "audio/wav"
+
+
+def rendition_path(wav_path: Path, rendition: str) -> Path:
+    return wav_path.with_suffix(RENDITIONS[rendition].suffix)
+
+
+class MediaTranscoder:
+    """Encode finalized WAVs to compressed renditions next to them, off the request path.
+
+    The WAV stays as the embedding source and the fallback rendition; encoded files appear
+    atomically (tmp + rename) so the media route never serves a partial file. Without an
+    ffmpeg binary the transcoder disables itself and only WAV is served.
+    """
+
+    def __init__(
+        self,
+        formats: Sequence[str] = ("opus", "mp3"),
+        max_workers: int = 2,
+        ffmpeg_path: str = "ffmpeg",
+        bitrates_kbps: Dict[str, int] | None = None,
+        timeout_sec: float = 120.0,
+    ) -> None:
+        unknown = [name for name in formats if name not in RENDITIONS]
+        if unknown:
+            raise ValueError(f"unsupported renditions {unknown}; expected {sorted(RENDITIONS)}")
+        self.formats = list(formats)
+        self.bitrates_kbps = {"opus": 64, "mp3": 128, **(bitrates_kbps or {})}
+        self.timeout_sec = timeout_sec
+        self.ffmpeg = shutil.which(ffmpeg_path)
+        if self.formats and self.ffmpeg is None:
+            logger.warning("ffmpeg not found (%s); serving WAV only", ffmpeg_path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcode")
+        self._pending: Dict[Path, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats) and self.ffmpeg is not None
+
+    def submit(self, wav_path: Path) -> Future | None:
+        """Queue all configured renditions for one finalized track."""
+        if not self.enabled:
+            return None
+        future = self._executor.submit(self._encode_all, wav_path, time.monotonic())
+        with self._lock:
+            self._pending[wav_path] = future
+        future.add_done_callback(lambda _: self._forget(wav_path))
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _forget(self, wav_path: Path) -> None:
+        with self._lock:
+            self._pending.pop(wav_path, None)
+
+    def _encode_all(self, wav_path: Path, queued_at: float) -> List[Path]:
+        written: List[Path] = []
+        for name in self.formats:
+            target = self._encode(wav_path, RENDITIONS[name])
+            if target is not None:
+                written.append(target)
+                TRANSCODE_LAG_SECONDS.observe(time.monotonic() - queued_at, rendition=name)
+        return written
+
+    def _encode(self, wav_path: Path, rendition: Rendition) -> Path | None:
+        if not wav_path.exists():
+            # deleted (session evicted / cache cleared) before its turn in the queue
+            return None
+        target = rendition_path(wav_path, rendition.name)
+        tmp = target.with_name(f".{target.name}.tmp")
+        bitrate = self.bitrates_kbps[rendition.name]
+        codec_args = [arg.format(bitrate=bitrate) for arg in rendition.codec_args]
+        command = [
+            self.ffmpeg or "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            str(wav_path),
+            *codec_args,
+            str(tmp),
+        ]
+        try:
+            with stage_timer("transcode"):
+                subprocess.run(command, check=True, capture_output=True, timeout=self.timeout_sec)
+            os.replace(tmp, target)
+        except (OSError, subprocess.SubprocessError) as exc:
+            stderr = getattr(exc, "stderr", b"") or b""
+            logger.warning(
+                "transcode failed path=%s rendition=%s error=%s stderr=%s",
+                wav_path,
+                rendition.name,
+                exc,
+                stderr.decode("utf-8", "replace")[-500:],
+            )
+            tmp.unlink(missing_ok=True)
+            return None
+        if not wav_path.exists():
+            target.unlink(missing_ok=True)
+            return None
+        logger.debug(
+            "transcoded path=%s rendition=%s bytes=%s",
+            wav_path,
+            rendition.name,
+            target.stat().st_size,
+        )
+        return target
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
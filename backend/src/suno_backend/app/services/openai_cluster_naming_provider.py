@@ -7,15 +7,17 @@ from typing import List
 
 import httpx
 
+from suno_backend.app.request_context import time_budget
 from suno_backend.app.services.providers import ClusterNamingProvider
+from suno_backend.app.tracing import current_span
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAiClusterNamingProvider(ClusterNamingProvider):
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, api_url: str = "https://api.openai.com"):
         self._api_key = api_key
-        self._api_url = "https://api.openai.com/v1/chat/completions"
+        self._api_url = f"{api_url.rstrip('/')}/v1/chat/completions"
         self._model = "gpt-4o-mini"
         self._timeout = 10.0
 
@@ -65,9 +67,12 @@ class OpenAiClusterNamingProvider(ClusterNamingProvider):
             self._api_url,
             headers={"Authorization": f"Bearer {self._api_key}"},
             json=payload,
-            timeout=self._timeout,
+            timeout=time_budget(self._timeout),
         )
 
+        current_span().set_attributes(
+            {"http.status_code": response.status_code, "namer.model": self._model}
+        )
         if response.status_code >= 400:
             raise ValueError(f"openai api error status {response.status_code}")
 
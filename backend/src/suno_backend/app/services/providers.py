@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Protocol
+from typing import List, Protocol, Tuple
 
 import numpy as np
 
@@ -17,6 +17,17 @@ class MusicProvider(Protocol):
         ...
 
 
+@dataclass
+class WindowedEmbedding:
+    """Pooled clip embedding plus the per-window embeddings it was pooled from."""
+
+    embedding: np.ndarray
+    # (num_windows, dim); a single row when the clip was embedded whole
+    windows: np.ndarray
+    # (start_sec, end_sec) of each window within the clip
+    spans_sec: List[Tuple[float, float]]
+
+
 class EmbeddingProvider(Protocol):
     def embed_audio(self, audio_path: Path) -> np.ndarray:
         ...
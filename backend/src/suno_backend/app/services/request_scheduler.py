@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque
+
+import requests
+
+from suno_backend.app.metrics import UPSTREAM_RETRIES
+from suno_backend.app.request_context import current_deadline
+from suno_backend.app.services.session_service import DeadlineExceededError, GenerationFailedError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(GenerationFailedError):
+    ...
+
+
+class FairTokenBucket:
+    """Concurrency tokens handed out round-robin across keys (FIFO within a key)."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self._available = self.capacity
+        self._queues: "OrderedDict[str, Deque[object]]" = OrderedDict()
+        self._cond = threading.Condition()
+
+    def acquire(self, key: str, timeout: float | None = None) -> bool:
+        """Block until a token is free and it is this caller's turn; False on timeout."""
+        ticket = object()
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queues.setdefault(key, deque()).append(ticket)
+            while not (self._available > 0 and self._is_next(ticket)):
+                remaining = None if expires_at is None else expires_at - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._drop_ticket(key, ticket)
+                    return False
+                self._cond.wait(remaining)
+            self._available -= 1
+            queue = self._queues.pop(key)
+            queue.popleft()
+            if queue:
+                # served key goes to the back so other sessions get the next token
+                self._queues[key] = queue
+            self._cond.notify_all()
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._available = min(self.capacity, self._available + 1)
+            self._cond.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        return self.capacity - self._available
+
+    def _drop_ticket(self, key: str, ticket: object) -> None:
+        queue = self._queues[key]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[key]
+        self._cond.notify_all()
+
+    def _is_next(self, ticket: object) -> bool:
+        head = next(iter(self._queues.values()), None)
+        return bool(head) and head[0] is ticket
+
+
+class CircuitBreaker:
+    """Open after N consecutive failures; allow one trial call after reset_timeout_sec."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout_sec: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_sec = reset_timeout_sec
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def abandon(self) -> None:
+        """An allowed call never reached upstream; let another caller take the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = self._clock()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout_sec:
+            return "half_open"
+        return "open"
+
+
+class RequestScheduler:
+    """Run upstream HTTP calls under a shared concurrency budget with retries.
+
+    - FairTokenBucket caps in-flight calls across all sessions, round-robin per key.
+    - 429/5xx and transport errors are retried with full-jitter exponential backoff
+      capped at max_backoff_sec. A Retry-After header (seconds or HTTP date) takes
+      precedence and is never shortened: if it asks for longer than max_backoff_sec or
+      the request deadline allows, that response is returned instead of retrying early.
+    - 5xx/transport failures feed a CircuitBreaker; while open, calls fail fast.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_backoff_sec: float = 0.5,
+        max_backoff_sec: float = 20.0,
+        breaker: CircuitBreaker | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.bucket = FairTokenBucket(max_concurrency)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max(0, max_retries)
+        self.base_backoff_sec = base_backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        # submit() runs on many worker threads; += on an int attribute is not atomic
+        self._counter_lock = threading.Lock()
+        self.retries = 0
+        self.throttled = 0
+
+    def submit(self, key: str, call: Callable[[], requests.Response]) -> requests.Response:
+        """Return the first non-retryable response, or the last one once retries run out.
+
+        The concurrency token is held for as long as `call` runs, so a call that also
+        reads a streamed body keeps its slot until the body is consumed.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("upstream circuit open; failing fast")
+
+            deadline = current_deadline()
+            if not self.bucket.acquire(key, None if deadline is None else deadline.remaining()):
+                self.breaker.abandon()
+                raise DeadlineExceededError("deadline exceeded waiting for upstream capacity")
+            try:
+                resp = call()
+            except requests.RequestException:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning("upstream transport error key=%s attempt=%s", key, attempt, exc_info=True)
+                delay = self._retry_delay(attempt, None)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                UPSTREAM_RETRIES.inc(reason="transport")
+                continue
+            except Exception:
+                # the call failed on our side (e.g. mid-body); free a half-open trial slot
+                self.breaker.abandon()
+                raise
+            finally:
+                self.bucket.release()
+
+            if resp.status_code not in RETRYABLE_STATUS:
+                self.breaker.record_success()
+                return resp
+
+            if resp.status_code == 429:
+                with self._counter_lock:
+                    self.throttled += 1
+                # throttling says nothing about upstream health: keep the failure count and
+                # only hand a half-open trial slot back
+                self.breaker.abandon()
+            else:
+                self.breaker.record_failure()
+            if attempt >= self.max_retries:
+                return resp
+            logger.warning(
+                "upstream status=%s key=%s attempt=%s; retrying", resp.status_code, key, attempt
+            )
+            delay = self._retry_delay(attempt, resp.headers.get("retry-after"))
+            if delay is None:
+                return resp
+            # free the pooled connection (a streamed body would otherwise pin it)
+            resp.close()
+            self._sleep(delay)
+            UPSTREAM_RETRIES.inc(reason="throttled" if resp.status_code == 429 else "server_error")
+        raise AssertionError("unreachable")
+
+    def _retry_delay(self, attempt: int, retry_after: str | None) -> float | None:
+        """Seconds to wait before the next attempt; None if there is no room to retry.
+
+        The cap applies to computed backoff only; a server's Retry-After is honoured as
+        given or not at all.
+        """
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            cap = min(self.max_backoff_sec, self.base_backoff_sec * (2**attempt))
+            delay = self._rng.uniform(0.0, cap)
+        elif delay > self.max_backoff_sec:
+            return None
+        deadline = current_deadline()
+        if deadline is not None and delay >= deadline.remaining():
+            return None
+        with self._counter_lock:
+            self.retries += 1
+        return delay
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
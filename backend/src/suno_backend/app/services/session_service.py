@@ -1,22 +1,46 @@
 from __future__ import annotations
 
+import math
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from uuid import UUID, uuid4
 
 import numpy as np
 import logging
 
-from suno_backend.app.core.clustering import cluster_embeddings
-from suno_backend.app.core.similarity import filter_by_similarity
+from suno_backend.app.core.clustering import (
+    ClusterAlgorithm,
+    KSelection,
+    cluster_embeddings,
+)
+from suno_backend.app.core.similarity import (
+    cosine_similarity_matrix,
+    filter_by_similarity,
+    select_by_scores,
+)
+from suno_backend.app.metrics import (
+    CLIPS_GENERATED,
+    CLIPS_REJECTED,
+    CLIPS_REJECTED_PROMPT,
+    NAMER_FALLBACKS,
+    stage_timer,
+)
 from suno_backend.app.models.domain import Batch, BriefParams, ClusterSummary, Session, Track
+from suno_backend.app.request_context import bind_session, deadline_expired, reserve_time
+from suno_backend.app.services.candidate_pool import CandidatePool
+from suno_backend.app.services.clip_streams import current_clip_observer
+from suno_backend.app.services.media_transcoder import MediaTranscoder
 from suno_backend.app.services.providers import (
     ClusterNamingProvider,
     EmbeddingProvider,
     GeneratedClip,
     MusicProvider,
+    WindowedEmbedding,
 )
-from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.services.session_store import SessionEvictedError, SessionStore
+from suno_backend.app.services.track_index import IndexedTrack, TrackIndex
+from suno_backend.app.tracing import current_span, start_span
 
 
 logger = logging.getLogger(__name__)
@@ -34,6 +58,10 @@ class GenerationFailedError(Exception):
     ...
 
 
+class DeadlineExceededError(GenerationFailedError):
+    ...
+
+
 class SessionService:
     def __init__(
         self,
@@ -45,6 +73,18 @@ class SessionService:
         max_batch_size: int,
         default_max_k: int,
         min_similarity: float,
+        cluster_algorithm: ClusterAlgorithm = "auto",
+        k_selection: KSelection = "fixed",
+        more_like_assignment: str = "new_cluster",
+        oversample: bool = False,
+        oversample_max_factor: float = 3.0,
+        candidate_pool: CandidatePool | None = None,
+        deadline_reserve_sec: float = 0.0,
+        transcoder: MediaTranscoder | None = None,
+        prompt_filter: str = "off",
+        prompt_min_similarity: float = 0.0,
+        prompt_min_keep: int = 1,
+        track_index: TrackIndex | None = None,
     ) -> None:
         self.store = store
         self.music = music
@@ -54,6 +94,21 @@ class SessionService:
         self.max_batch_size = max_batch_size
         self.default_max_k = default_max_k
         self.min_similarity = min_similarity
+        self.cluster_algorithm = cluster_algorithm
+        self.k_selection = k_selection
+        self.more_like_assignment = more_like_assignment
+        self.oversample = oversample
+        self.oversample_max_factor = oversample_max_factor
+        self.candidate_pool = candidate_pool
+        # share of the request deadline held back from generation for embed/cluster/name
+        self.deadline_reserve_sec = deadline_reserve_sec
+        self.transcoder = transcoder
+        # "drop" removes initial-batch clips scoring below prompt_min_similarity against the
+        # prompt's text embedding (keeping at least prompt_min_keep); "rank" only reorders
+        self.prompt_filter = prompt_filter
+        self.prompt_min_similarity = prompt_min_similarity
+        self.prompt_min_keep = max(1, prompt_min_keep)
+        self.track_index = track_index
         logger.info(
             "SessionService initialized music=%s embedder=%s namer=%s media_root=%s max_batch_size=%s default_max_k=%s min_similarity=%.2f",
             type(music).__name__,
@@ -81,15 +136,29 @@ class SessionService:
     ) -> Session:
         self._validate_num_clips(num_clips)
 
-        session = self.store.create_session(brief, params)
-        prompt_text = self.render_prompt(brief, params)
+        # pinned so TTL/LRU eviction cannot drop the session while this request writes to it
+        session = self.store.create_session(brief, params, pin=True)
+        try:
+            return self._create_initial_batch(session, brief, params, num_clips)
+        except SessionEvictedError as exc:
+            raise GenerationFailedError("session was evicted during generation") from exc
+        finally:
+            self.store.unpin(session.id)
+
+    def _create_initial_batch(
+        self, session: Session, brief: str, params: BriefParams, num_clips: int
+    ) -> Session:
+        current_span().set_attribute("session.id", str(session.id))
+        with stage_timer("render"):
+            prompt_text = self.render_prompt(brief, params)
         logger.info(
             "create_initial_batch session_id=%s prompt=%s num_clips=%s",
             session.id,
             prompt_text,
             num_clips,
         )
-        clips = self.music.generate_batch(prompt_text, num_clips, params.duration_sec)
+        with bind_session(session.id), reserve_time(self.deadline_reserve_sec):
+            clips = self._generate_clips(prompt_text, num_clips, params.duration_sec)
         logger.info(
             "music provider returned %s clips session_id=%s", len(clips), session.id
         )
@@ -98,9 +167,26 @@ class SessionService:
 
         batch_id = uuid4()
         track_infos = self._prepare_track_infos(clips)
+        if self.prompt_filter != "off":
+            track_infos = self._filter_by_prompt(prompt_text, track_infos)
         embeddings = [info["embedding"] for info in track_infos]
 
-        cluster_assignments = cluster_embeddings(embeddings, max_k=self.default_max_k)
+        with stage_timer("cluster"), start_span(
+            "cluster",
+            {
+                "cluster.n": len(embeddings),
+                "cluster.max_k": self.default_max_k,
+                "cluster.algorithm": self.cluster_algorithm,
+                "cluster.k_selection": self.k_selection,
+            },
+        ) as cluster_span:
+            cluster_assignments = cluster_embeddings(
+                embeddings,
+                max_k=self.default_max_k,
+                algorithm=self.cluster_algorithm,
+                k_selection=self.k_selection,
+            )
+            cluster_span.set_attribute("cluster.k", len(cluster_assignments))
         clusters: List[ClusterSummary] = []
         centroids: Dict[UUID, np.ndarray] = {}
 
@@ -109,10 +195,20 @@ class SessionService:
             prompts_for_label = [
                 track_infos[i]["clip"].raw_prompt for i in member_indices[:3]
             ]
-            try:
-                label = self.namer.name_cluster(prompts_for_label)
-            except Exception:
+            if deadline_expired():
+                NAMER_FALLBACKS.inc(reason="deadline")
                 label = f"cluster-{cluster_index}"
+            else:
+                with start_span(
+                    "name", {"cluster.index": cluster_index, "cluster.size": len(member_indices)}
+                ) as name_span:
+                    try:
+                        with stage_timer("name"):
+                            label = self.namer.name_cluster(prompts_for_label)
+                    except Exception as exc:
+                        NAMER_FALLBACKS.inc(reason="error")
+                        name_span.set_attribute("name.fallback_reason", type(exc).__name__)
+                        label = f"cluster-{cluster_index}"
 
             centroid = np.mean([embeddings[i] for i in member_indices], axis=0)
             centroids[cluster_id] = centroid
@@ -129,11 +225,12 @@ class SessionService:
                 )
             )
 
-        tracks = self._finalize_tracks(
-            session_id=session.id,
-            batch_id=batch_id,
-            track_infos=track_infos,
-        )
+        with stage_timer("finalize"), start_span("finalize", {"tracks": len(track_infos)}):
+            tracks = self._finalize_tracks(
+                session_id=session.id,
+                batch_id=batch_id,
+                track_infos=track_infos,
+            )
         logger.info(
             "initial batch created session_id=%s batch_id=%s num_tracks=%s num_clusters=%s",
             session.id,
@@ -162,9 +259,21 @@ class SessionService:
     ) -> Batch:
         self._validate_num_clips(num_clips)
 
-        session = self.store.get_session(session_id)
+        session = self.store.pin(session_id)
         if session is None:
             raise NotFoundError("session not found")
+        try:
+            return self._more_like_cluster(session, cluster_id, num_clips)
+        except SessionEvictedError as exc:
+            raise NotFoundError("session was evicted") from exc
+        finally:
+            self.store.unpin(session_id)
+
+    def _more_like_cluster(self, session: Session, cluster_id: UUID, num_clips: int) -> Batch:
+        session_id = session.id
+        current_span().set_attributes(
+            {"session.id": str(session_id), "cluster.parent_id": str(cluster_id)}
+        )
 
         parent_cluster = self.store.get_cluster(session_id, cluster_id)
         if parent_cluster is None:
@@ -174,54 +283,109 @@ class SessionService:
         if centroid is None:
             raise NotFoundError("centroid not found")
 
-        prompt_text = self.render_prompt(session.brief_text, session.params)
-        clips = self.music.generate_batch(prompt_text, num_clips, session.params.duration_sec)
+        with stage_timer("render"):
+            prompt_text = self.render_prompt(session.brief_text, session.params)
+        track_infos = self._take_pooled_candidates(session_id, centroid, num_clips)
+        pooled_count = len(track_infos)
+        if pooled_count < num_clips:
+            try:
+                track_infos.extend(
+                    self._generate_candidates(
+                        session_id,
+                        prompt_text,
+                        session.params.duration_sec,
+                        num_clips - pooled_count,
+                        centroid,
+                    )
+                )
+            except GenerationFailedError:
+                if not track_infos:
+                    raise
+                logger.warning(
+                    "more_like generation failed; serving %s pooled clips session_id=%s",
+                    pooled_count,
+                    session_id,
+                )
         logger.info(
-            "more_like generate session_id=%s cluster_id=%s clips=%s",
+            "more_like generate session_id=%s cluster_id=%s clips=%s pooled=%s",
             session_id,
             cluster_id,
-            len(clips),
+            len(track_infos),
+            pooled_count,
         )
-        if len(clips) == 0:
+        if len(track_infos) == 0:
             raise GenerationFailedError("no clips generated")
 
         batch_id = uuid4()
-        track_infos = self._prepare_track_infos(clips)
         embeddings = [info["embedding"] for info in track_infos]
 
-        accepted_indices = filter_by_similarity(
-            embeddings, centroid, min_similarity=self.min_similarity, max_results=num_clips
-        )
+        incremental = self.more_like_assignment == "incremental"
+        with start_span(
+            "score", {"candidates": len(embeddings), "assignment": self.more_like_assignment}
+        ) as score_span:
+            if incremental:
+                # score every new clip against every session centroid in one pass
+                centroid_ids, centroid_matrix = self.store.get_centroid_matrix(session_id)
+                session_scores = cosine_similarity_matrix(np.stack(embeddings), centroid_matrix)
+                accepted_indices = select_by_scores(
+                    session_scores[:, centroid_ids.index(cluster_id)],
+                    min_similarity=self.min_similarity,
+                    max_results=num_clips,
+                )
+            else:
+                accepted_indices = filter_by_similarity(
+                    embeddings, centroid, min_similarity=self.min_similarity, max_results=num_clips
+                )
+            score_span.set_attribute("accepted", len(accepted_indices))
         accepted_set = set(accepted_indices)
+        CLIPS_REJECTED.inc(len(track_infos) - len(accepted_set))
         for idx, info in enumerate(track_infos):
             if idx not in accepted_set:
-                try:
-                    info["clip"].audio_path.unlink(missing_ok=True)
-                except Exception:
-                    pass
+                self._discard_candidate(session_id, info)
 
         accepted_tracks = [track_infos[idx] for idx in accepted_indices]
-        new_cluster_id = uuid4()
-        track_ids: List[UUID] = []
-        for info in accepted_tracks:
-            info["cluster_id"] = new_cluster_id
-            track_ids.append(info["track_id"])
-
-        centroid_new = np.mean([info["embedding"] for info in accepted_tracks], axis=0)
-        centroids = {new_cluster_id: centroid_new}
+        track_ids: List[UUID] = [info["track_id"] for info in accepted_tracks]
+        centroids: Dict[UUID, np.ndarray] = {}
+        # cluster id -> member track ids, in first-seen order
+        groups: Dict[UUID, List[UUID]] = {}
+        if incremental:
+            # every track joins its nearest existing cluster once; no new centroid is made
+            nearest = np.argmax(session_scores[accepted_indices], axis=1)
+            updates: Dict[UUID, Tuple[np.ndarray, int]] = {}
+            for info, column in zip(accepted_tracks, nearest):
+                target_id = centroid_ids[int(column)]
+                total, count = updates.get(target_id, (0.0, 0))
+                updates[target_id] = (total + info["embedding"], count + 1)
+                info["cluster_id"] = target_id
+                groups.setdefault(target_id, []).append(info["track_id"])
+            self.store.update_centroids(session.id, updates)
+        else:
+            new_cluster_id = uuid4()
+            for info in accepted_tracks:
+                info["cluster_id"] = new_cluster_id
+            groups[new_cluster_id] = track_ids
+            centroids[new_cluster_id] = np.mean(
+                [info["embedding"] for info in accepted_tracks], axis=0
+            )
 
-        self._finalize_tracks(
-            session_id=session.id,
-            batch_id=batch_id,
-            track_infos=accepted_tracks,
-        )
+        with stage_timer("finalize"), start_span("finalize", {"tracks": len(accepted_tracks)}):
+            self._finalize_tracks(
+                session_id=session.id,
+                batch_id=batch_id,
+                track_infos=accepted_tracks,
+            )
 
-        cluster_summary = ClusterSummary(
-            id=new_cluster_id,
-            batch_id=batch_id,
-            label=parent_cluster.label,
-            track_ids=track_ids,
-        )
+        clusters = []
+        for group_id, group_track_ids in groups.items():
+            existing = self.store.get_cluster(session_id, group_id)
+            clusters.append(
+                ClusterSummary(
+                    id=group_id,
+                    batch_id=batch_id,
+                    label=existing.label if existing is not None else parent_cluster.label,
+                    track_ids=group_track_ids,
+                )
+            )
 
         batch = Batch(
             id=batch_id,
@@ -229,32 +393,200 @@ class SessionService:
             prompt_text=prompt_text,
             num_requested=num_clips,
             num_generated=len(track_ids),
-            clusters=[cluster_summary],
+            clusters=clusters,
         )
 
         self.store.add_batch(session.id, batch, centroids)
+        if incremental:
+            self.store.assign_tracks(
+                session.id, {info["track_id"]: info["cluster_id"] for info in accepted_tracks}
+            )
         return batch
 
+    def _take_pooled_candidates(
+        self, session_id: UUID, centroid: np.ndarray, num_clips: int
+    ) -> List[Dict[str, object]]:
+        """Reuse pooled clips that already clear min_similarity for this centroid."""
+        if self.candidate_pool is None:
+            return []
+        taken = self.candidate_pool.take(
+            session_id, centroid, min_similarity=self.min_similarity, max_results=num_clips
+        )
+        return [
+            {"clip": candidate.clip, "embedding": candidate.embedding, "track_id": uuid4()}
+            for candidate in taken
+        ]
+
+    def _generate_candidates(
+        self,
+        session_id: UUID,
+        prompt_text: str,
+        duration_sec: float,
+        num_clips: int,
+        centroid: np.ndarray,
+    ) -> List[Dict[str, object]]:
+        """Generate and embed candidates; with oversampling, run waves sized by acceptance rate."""
+        with bind_session(session_id), reserve_time(self.deadline_reserve_sec):
+            return self._generate_candidate_waves(
+                session_id, prompt_text, duration_sec, num_clips, centroid
+            )
+
+    def _generate_candidate_waves(
+        self,
+        session_id: UUID,
+        prompt_text: str,
+        duration_sec: float,
+        num_clips: int,
+        centroid: np.ndarray,
+    ) -> List[Dict[str, object]]:
+        if not self.oversample:
+            clips = self._generate_clips(prompt_text, num_clips, duration_sec)
+            return self._prepare_track_infos(clips)
+
+        budget = max(num_clips, math.ceil(num_clips * self.oversample_max_factor))
+        track_infos: List[Dict[str, object]] = []
+        attempted = 0
+        passed = 0
+        while attempted < budget and passed < num_clips:
+            if track_infos and deadline_expired():
+                break
+            rate = self.store.get_acceptance_rate(session_id)
+            request = min(budget - attempted, math.ceil((num_clips - passed) / rate))
+            try:
+                clips = self._generate_clips(prompt_text, request, duration_sec)
+            except GenerationFailedError:
+                if track_infos:
+                    break
+                raise
+            attempted += request
+            if not clips:
+                break
+            wave = self._prepare_track_infos(clips)
+            scores = cosine_similarity_matrix(
+                np.stack([info["embedding"] for info in wave]), centroid
+            )[:, 0]
+            wave_passed = int(np.count_nonzero(scores >= self.min_similarity))
+            self.store.record_acceptance(session_id, len(wave), wave_passed)
+            passed += wave_passed
+            track_infos.extend(wave)
+            logger.info(
+                "oversample wave session_id=%s requested=%s returned=%s passed=%s rate=%.2f",
+                session_id,
+                request,
+                len(wave),
+                wave_passed,
+                rate,
+            )
+        return track_infos
+
+    def _generate_clips(
+        self, prompt_text: str, num_clips: int, duration_sec: float
+    ) -> List[GeneratedClip]:
+        with stage_timer("generate"), start_span(
+            "generate",
+            {"clips.requested": num_clips, "music.provider": type(self.music).__name__},
+        ) as span:
+            clips = self.music.generate_batch(prompt_text, num_clips, duration_sec)
+            span.set_attribute("clips.returned", len(clips))
+        CLIPS_GENERATED.inc(len(clips))
+        return clips
+
+    def _discard_candidate(self, session_id: UUID, info: Dict[str, object]) -> None:
+        clip: GeneratedClip = info["clip"]  # type: ignore[assignment]
+        try:
+            if self.candidate_pool is not None:
+                self.candidate_pool.add(session_id, clip, info["embedding"])  # type: ignore[arg-type]
+            else:
+                clip.audio_path.unlink(missing_ok=True)
+        except Exception:
+            logger.warning("failed to discard candidate %s", clip.audio_path, exc_info=True)
+
     def _validate_num_clips(self, num_clips: int) -> None:
         if num_clips < 1 or num_clips > self.max_batch_size:
             raise InvalidRequestError("invalid num_clips")
 
     def _prepare_track_infos(self, clips: List[GeneratedClip]) -> List[Dict[str, object]]:
         track_infos: List[Dict[str, object]] = []
-        for clip in clips:
-            logger.info(
+        for position, clip in enumerate(clips):
+            if track_infos and deadline_expired():
+                # keep what is already embedded; the rest cannot make the deadline
+                logger.warning(
+                    "deadline reached; embedded %s of %s clips", len(track_infos), len(clips)
+                )
+                for late in clips[position:]:
+                    late.audio_path.unlink(missing_ok=True)
+                break
+            logger.debug(
                 "embedding clip prompt_len=%s path=%s", len(clip.raw_prompt), clip.audio_path
             )
-            embedding = self.embedder.embed_audio(clip.audio_path)
+            with stage_timer("embed"), start_span(
+                "embed", {"clip.index": position, "audio.path": str(clip.audio_path)}
+            ) as span:
+                windowed = self._embed_clip(clip)
+                span.set_attributes(
+                    {
+                        "embedding.dim": int(np.asarray(windowed.embedding).shape[-1]),
+                        "embedding.windows": len(windowed.spans_sec),
+                    }
+                )
             track_infos.append(
                 {
                     "clip": clip,
-                    "embedding": embedding,
+                    "embedding": windowed.embedding,
+                    "windows": windowed,
                     "track_id": uuid4(),
                 }
             )
         return track_infos
 
+    def _filter_by_prompt(
+        self, prompt_text: str, track_infos: List[Dict[str, object]]
+    ) -> List[Dict[str, object]]:
+        """Score clips against the prompt's text embedding in one pass; drop or reorder."""
+        if len(track_infos) <= 1 or deadline_expired():
+            return track_infos
+        with stage_timer("prompt_filter"), start_span(
+            "prompt_filter", {"prompt_filter.mode": self.prompt_filter, "clips": len(track_infos)}
+        ) as span:
+            try:
+                text_embedding = np.asarray(self.embedder.embed_text(prompt_text))
+                audio = np.stack([np.asarray(info["embedding"]) for info in track_infos])
+                scores = cosine_similarity_matrix(audio, text_embedding.reshape(1, -1))[:, 0]
+            except Exception:
+                logger.warning("prompt filter skipped: could not score clips", exc_info=True)
+                return track_infos
+            for info, score in zip(track_infos, scores):
+                info["prompt_score"] = float(score)
+            order = np.lexsort((np.arange(len(scores)), -scores)).tolist()
+            if self.prompt_filter == "rank":
+                return [track_infos[i] for i in order]
+
+            keep = {i for i in order if scores[i] >= self.prompt_min_similarity}
+            if len(keep) < self.prompt_min_keep:
+                keep = set(order[: self.prompt_min_keep])
+            dropped = [info for i, info in enumerate(track_infos) if i not in keep]
+            for info in dropped:
+                info["clip"].audio_path.unlink(missing_ok=True)  # type: ignore[attr-defined]
+            CLIPS_REJECTED_PROMPT.inc(len(dropped))
+            span.set_attributes(
+                {"prompt_filter.dropped": len(dropped), "prompt_filter.max_score": float(scores.max())}
+            )
+            if dropped:
+                logger.info(
+                    "prompt filter dropped %s of %s clips (min_similarity=%.2f)",
+                    len(dropped),
+                    len(track_infos),
+                    self.prompt_min_similarity,
+                )
+            return [info for i, info in enumerate(track_infos) if i in keep]
+
+    def _embed_clip(self, clip: GeneratedClip) -> WindowedEmbedding:
+        # providers without per-window output count as one window over the whole clip
+        embed_windows = getattr(self.embedder, "embed_audio_windows", None)
+        if embed_windows is not None:
+            return embed_windows(clip.audio_path)
+        return _single_window(self.embedder.embed_audio(clip.audio_path), clip.duration_sec)
+
     def _finalize_tracks(
         self,
         session_id: UUID,
@@ -264,7 +596,9 @@ class SessionService:
         final_dir = self.media_root / str(session_id)
         final_dir.mkdir(parents=True, exist_ok=True)
 
+        observer = current_clip_observer()
         tracks: List[Track] = []
+        embeddings: Dict[UUID, WindowedEmbedding] = {}
         for info in track_infos:
             cluster_id = info.get("cluster_id")
             if cluster_id is None:
@@ -272,8 +606,13 @@ class SessionService:
             track_id: UUID = info["track_id"]
             clip: GeneratedClip = info["clip"]  # type: ignore[assignment]
             final_path = final_dir / f"{track_id}.wav"
+            if observer is not None:
+                observer.track_finalized(clip.audio_path, track_id)
             clip.audio_path.rename(final_path)
-            logger.info(
+            if self.transcoder is not None:
+                # the WAV stays put for embedding; compressed renditions appear beside it
+                self.transcoder.submit(final_path)
+            logger.debug(
                 "finalized track session_id=%s batch_id=%s track_id=%s cluster_id=%s path=%s",
                 session_id,
                 batch_id,
@@ -290,5 +629,30 @@ class SessionService:
                 raw_prompt=clip.raw_prompt,
             )
             tracks.append(track)
+            embeddings[track_id] = info.get("windows") or _single_window(  # type: ignore[assignment]
+                info["embedding"], clip.duration_sec  # type: ignore[arg-type]
+            )
 
+        self.store.add_track_embeddings(session_id, embeddings)
+        if self.track_index is not None and tracks:
+            self._index_tracks(session_id, tracks, embeddings)
         return tracks
+
+    def _index_tracks(
+        self, session_id: UUID, tracks: List[Track], embeddings: Dict[UUID, WindowedEmbedding]
+    ) -> None:
+        assert self.track_index is not None
+        now = time.time()
+        entries = [
+            IndexedTrack(str(track.id), str(session_id), now, track.audio_url) for track in tracks
+        ]
+        try:
+            self.track_index.add(entries, [embeddings[track.id].embedding for track in tracks])
+        except Exception:
+            # the index is an optional library view; never fail the batch over it
+            logger.warning("track index insert failed session_id=%s", session_id, exc_info=True)
+
+
+def _single_window(embedding: np.ndarray, duration_sec: float) -> WindowedEmbedding:
+    embedding = np.asarray(embedding)
+    return WindowedEmbedding(embedding, embedding.reshape(1, -1), [(0.0, duration_sec)])
@@ -1,33 +1,167 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
 from uuid import UUID
 
 import numpy as np
 
+from suno_backend.app.metrics import SESSIONS_EVICTED
 from suno_backend.app.models.domain import Batch, BriefParams, ClusterSummary, Session
+from suno_backend.app.services.providers import WindowedEmbedding
 
+logger = logging.getLogger(__name__)
+
+# rough resident cost of the pydantic models and dict slots around the numpy payloads
+SESSION_OVERHEAD_BYTES = 2048
+BATCH_OVERHEAD_BYTES = 1024
+CLUSTER_OVERHEAD_BYTES = 512
+ENTRY_BYTES = 128
+
+
+class SessionEvictedError(ValueError):
+    """A write targeted a session that is no longer resident."""
 
-class SessionStore:
     def __init__(self) -> None:
+        super().__init__("session not found")
+
+
+class SessionStore:
+    """In-memory sessions with optional TTL and LRU caps on count and estimated bytes.
+
+    A session is "used" when created, fetched or written to. Idle sessions past `ttl_sec`
+    are dropped, and the least recently used go first whenever `max_sessions` or
+    `max_bytes` is exceeded (the session being written is never the one evicted).
+    Pinned sessions (a request is in flight, see `pin`) are skipped by TTL and LRU
+    eviction, so caps can be exceeded for the duration of those requests.
+    `on_evict(session_id)` runs after each eviction, outside the store lock.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int | None = None,
+        max_bytes: int | None = None,
+        ttl_sec: float | None = None,
+        on_evict: Callable[[UUID], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.on_evict = on_evict
+        self._clock = clock
+        self._lock = threading.RLock()
+        # least recently used first
+        self._last_used: OrderedDict[UUID, float] = OrderedDict()
+        # session id -> number of in-flight requests holding it
+        self._pins: Dict[UUID, int] = {}
+        self._bytes: Dict[UUID, int] = {}
+        self._total_bytes = 0
         self._sessions: Dict[UUID, Session] = {}
         self._centroids: Dict[Tuple[UUID, UUID], np.ndarray] = {}
+        # running-mean state: centroid = sum / count, updated without revisiting members
+        self._centroid_sums: Dict[Tuple[UUID, UUID], np.ndarray] = {}
+        self._centroid_counts: Dict[Tuple[UUID, UUID], int] = {}
+        # per-session stacked centroids for one-pass assignment; row order follows the id list.
+        # The matrix has spare capacity (doubled when full); only len(ids) rows are live.
+        self._centroid_ids: Dict[UUID, List[UUID]] = {}
+        self._centroid_rows: Dict[Tuple[UUID, UUID], int] = {}
+        self._centroid_matrix: Dict[UUID, np.ndarray] = {}
+        self._memberships: Dict[UUID, Dict[UUID, UUID]] = {}
+        # (candidates scored, candidates passing min_similarity) for "more like" requests
+        self._acceptance: Dict[UUID, Tuple[int, int]] = {}
+        # finalized tracks' pooled + per-window embeddings, for segment-level similarity
+        self._track_embeddings: Dict[UUID, Dict[UUID, WindowedEmbedding]] = {}
+
+    def session_count(self) -> int:
+        return len(self._sessions)
 
-    def create_session(self, brief: str, params: BriefParams) -> Session:
-        """Create and store empty session."""
+    @property
+    def resident_bytes(self) -> int:
+        """Estimated bytes held for all sessions (numpy payloads exact, models approximated)."""
+        return self._total_bytes
+
+    def session_bytes(self, session_id: UUID) -> int:
+        return self._bytes.get(session_id, 0)
+
+    def create_session(self, brief: str, params: BriefParams, pin: bool = False) -> Session:
+        """Create and store empty session; with `pin`, it is pinned before any eviction runs."""
         session = Session(brief_text=brief, params=params, batches=[])
-        self._sessions[session.id] = session
+        with self._lock:
+            self._sessions[session.id] = session
+            self._bytes[session.id] = 0
+            if pin:
+                self._pins[session.id] = 1
+            self._charge(session.id, SESSION_OVERHEAD_BYTES + len(brief))
+            evicted = self._touch_and_enforce(session.id)
+        self._notify(evicted)
         return session
 
     def get_session(self, session_id: UUID) -> Session | None:
-        """Fetch session or None."""
-        return self._sessions.get(session_id)
+        """Fetch session or None; counts as a use, and an expired session is evicted instead."""
+        evicted: List[UUID] = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if session_id not in self._pins and self._expired(session_id, self._clock()):
+                    self._evict_locked(session_id, "ttl")
+                    evicted, session = [session_id], None
+                else:
+                    self._touch(session_id)
+        self._notify(evicted)
+        return session
+
+    def pin(self, session_id: UUID) -> Session | None:
+        """get_session, and keep the session resident until the matching `unpin`."""
+        with self._lock:
+            session = self.get_session(session_id)
+            if session is not None:
+                self._pins[session_id] = self._pins.get(session_id, 0) + 1
+            return session
+
+    def unpin(self, session_id: UUID) -> None:
+        """Release one pin; the session becomes evictable again once none remain."""
+        with self._lock:
+            count = self._pins.get(session_id, 0) - 1
+            if count > 0:
+                self._pins[session_id] = count
+            else:
+                self._pins.pop(session_id, None)
 
-    def add_batch(self, session_id: UUID, batch: Batch, centroids: Dict[UUID, np.ndarray]) -> None:
-        """Attach batch and store centroids."""
+    def evict(self, session_id: UUID) -> bool:
+        """Drop a session and everything stored for it; False if it was not resident."""
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._evict_locked(session_id, "manual")
+        self._notify([session_id])
+        return True
+
+    def evict_expired(self) -> int:
+        """Drop every session idle for longer than ttl_sec; returns how many went."""
+        with self._lock:
+            evicted = self._expire_locked(self._clock(), keep=None)
+        self._notify(evicted)
+        return len(evicted)
+
+    def add_batch(
+        self,
+        session_id: UUID,
+        batch: Batch,
+        centroids: Dict[UUID, np.ndarray],
+        counts: Dict[UUID, int] | None = None,
+    ) -> None:
+        """Attach batch and store centroids; counts default to each cluster's track count.
+
+        Clusters that already have a centroid in this session (tracks folded into an
+        existing cluster) need no entry in `centroids`; their running means are left as is.
+        """
         session = self._sessions.get(session_id)
         if session is None:
-            raise ValueError("session not found")
+            raise SessionEvictedError()
         if batch.session_id != session_id:
             raise ValueError("batch session_id mismatch")
 
@@ -38,13 +172,38 @@ class SessionStore:
         if extra_centroids:
             raise ValueError("extra centroids provided")
 
-        missing_centroids = cluster_ids_from_batch - centroid_keys
+        missing_centroids = {
+            cluster_id
+            for cluster_id in cluster_ids_from_batch - centroid_keys
+            if (session_id, cluster_id) not in self._centroids
+        }
         if missing_centroids:
             raise ValueError("missing centroids for clusters")
 
-        session.batches.append(batch)
-        for cluster_id, centroid in centroids.items():
-            self._centroids[(session_id, cluster_id)] = centroid
+        with self._lock:
+            if session_id not in self._sessions:
+                raise SessionEvictedError()
+            session.batches.append(batch)
+            memberships = self._memberships.setdefault(session_id, {})
+            added = BATCH_OVERHEAD_BYTES + len(batch.prompt_text)
+            for cluster in batch.clusters:
+                added += 2 * ENTRY_BYTES * len(cluster.track_ids)
+                for track_id in cluster.track_ids:
+                    memberships.setdefault(track_id, cluster.id)
+                if cluster.id not in centroids:
+                    continue
+                centroid = np.asarray(centroids[cluster.id])
+                count = (counts or {}).get(cluster.id) or max(len(cluster.track_ids), 1)
+                key = (session_id, cluster.id)
+                self._centroids[key] = centroid
+                self._centroid_sums[key] = centroid.astype(np.float64) * count
+                self._centroid_counts[key] = count
+                self._append_centroid_row(session_id, cluster.id, centroid)
+                # centroid, float64 running sum and its matrix row
+                added += CLUSTER_OVERHEAD_BYTES + centroid.nbytes + 2 * centroid.size * 8
+            self._charge(session_id, added)
+            evicted = self._touch_and_enforce(session_id)
+        self._notify(evicted)
 
     def get_cluster(self, session_id: UUID, cluster_id: UUID) -> ClusterSummary | None:
         """Fetch cluster summary by ids."""
@@ -60,3 +219,182 @@ class SessionStore:
     def get_centroid(self, session_id: UUID, cluster_id: UUID) -> np.ndarray | None:
         """Fetch stored centroid or None."""
         return self._centroids.get((session_id, cluster_id))
+
+    def get_centroid_count(self, session_id: UUID, cluster_id: UUID) -> int:
+        """Number of embeddings folded into the cluster's running mean (0 if unknown)."""
+        return self._centroid_counts.get((session_id, cluster_id), 0)
+
+    def get_centroid_matrix(self, session_id: UUID) -> Tuple[List[UUID], np.ndarray | None]:
+        """All session centroids stacked (k, d) with their cluster ids in row order.
+
+        Returns a copy, so callers may score against it while other requests fold updates.
+        """
+        with self._lock:
+            ids = list(self._centroid_ids.get(session_id, []))
+            matrix = self._centroid_matrix.get(session_id)
+            if matrix is None:
+                return ids, None
+            return ids, matrix[: len(ids)].copy()
+
+    def update_centroids(
+        self, session_id: UUID, updates: Dict[UUID, Tuple[np.ndarray, int]]
+    ) -> None:
+        """Fold (embedding_sum, count) deltas into running means; O(updated clusters)."""
+        with self._lock:
+            if session_id not in self._sessions:
+                raise SessionEvictedError()
+            matrix = self._centroid_matrix.get(session_id)
+            for cluster_id, (delta_sum, delta_count) in updates.items():
+                key = (session_id, cluster_id)
+                if key not in self._centroid_sums:
+                    raise ValueError("cluster not found")
+                if delta_count <= 0:
+                    continue
+                self._centroid_sums[key] = self._centroid_sums[key] + delta_sum
+                self._centroid_counts[key] += delta_count
+                centroid = self._centroid_sums[key] / self._centroid_counts[key]
+                self._centroids[key] = centroid
+                if matrix is not None:
+                    matrix[self._centroid_rows[key]] = centroid
+
+    def assign_tracks(self, session_id: UUID, assignments: Dict[UUID, UUID]) -> None:
+        """Record session-wide cluster membership (track_id -> cluster_id)."""
+        with self._lock:
+            if session_id not in self._sessions:
+                raise SessionEvictedError()
+            memberships = self._memberships.setdefault(session_id, {})
+            fresh = sum(1 for track_id in assignments if track_id not in memberships)
+            memberships.update(assignments)
+            self._charge(session_id, ENTRY_BYTES * fresh)
+
+    def get_cluster_members(self, session_id: UUID, cluster_id: UUID) -> List[UUID]:
+        """Track ids currently assigned to a cluster across the whole session."""
+        memberships = self._memberships.get(session_id, {})
+        return [track_id for track_id, cid in memberships.items() if cid == cluster_id]
+
+    def add_track_embeddings(
+        self, session_id: UUID, embeddings: Dict[UUID, WindowedEmbedding]
+    ) -> None:
+        """Keep embeddings of finalized tracks (track_id -> WindowedEmbedding)."""
+        with self._lock:
+            if session_id not in self._sessions:
+                raise SessionEvictedError()
+            stored = self._track_embeddings.setdefault(session_id, {})
+            delta = 0
+            for track_id, embedding in embeddings.items():
+                previous = stored.get(track_id)
+                if previous is not None:
+                    delta -= _embedding_bytes(previous)
+                delta += _embedding_bytes(embedding)
+            stored.update(embeddings)
+            self._charge(session_id, delta)
+            evicted = self._touch_and_enforce(session_id)
+        self._notify(evicted)
+
+    def get_track_embedding(self, session_id: UUID, track_id: UUID) -> WindowedEmbedding | None:
+        return self._track_embeddings.get(session_id, {}).get(track_id)
+
+    def record_acceptance(self, session_id: UUID, attempted: int, accepted: int) -> None:
+        """Accumulate how many scored candidates passed the similarity threshold."""
+        with self._lock:
+            if session_id not in self._sessions:
+                raise SessionEvictedError()
+            prev_attempted, prev_accepted = self._acceptance.get(session_id, (0, 0))
+            self._acceptance[session_id] = (prev_attempted + attempted, prev_accepted + accepted)
+
+    def get_acceptance_rate(self, session_id: UUID) -> float:
+        """Laplace-smoothed acceptance rate; 0.5 before any candidates were scored."""
+        attempted, accepted = self._acceptance.get(session_id, (0, 0))
+        return (accepted + 1) / (attempted + 2)
+
+    def _append_centroid_row(self, session_id: UUID, cluster_id: UUID, centroid: np.ndarray) -> None:
+        ids = self._centroid_ids.setdefault(session_id, [])
+        matrix = self._centroid_matrix.get(session_id)
+        size = len(ids)
+        if matrix is None or size == matrix.shape[0]:
+            # double the capacity so k appends copy O(k) rows in total
+            grown = np.empty((max(2 * size, 4), centroid.size), dtype=np.float64)
+            if matrix is not None:
+                grown[:size] = matrix
+            matrix = grown
+            self._centroid_matrix[session_id] = matrix
+        matrix[size] = centroid.reshape(-1)
+        self._centroid_rows[(session_id, cluster_id)] = size
+        ids.append(cluster_id)
+
+    def _charge(self, session_id: UUID, delta: int) -> None:
+        if session_id in self._bytes:
+            self._bytes[session_id] += delta
+            self._total_bytes += delta
+
+    def _touch(self, session_id: UUID) -> None:
+        self._last_used[session_id] = self._clock()
+        self._last_used.move_to_end(session_id)
+
+    def _expired(self, session_id: UUID, now: float) -> bool:
+        last_used = self._last_used.get(session_id)
+        if self.ttl_sec is None or last_used is None:
+            return False
+        return now - last_used > self.ttl_sec
+
+    def _touch_and_enforce(self, session_id: UUID) -> List[UUID]:
+        self._touch(session_id)
+        evicted = self._expire_locked(self._clock(), keep=session_id)
+        while (self.max_sessions is not None and len(self._sessions) > self.max_sessions) or (
+            self.max_bytes is not None and self._total_bytes > self.max_bytes
+        ):
+            oldest = next(
+                (sid for sid in self._last_used if sid != session_id and sid not in self._pins),
+                None,
+            )
+            if oldest is None:
+                break
+            self._evict_locked(oldest, "lru")
+            evicted.append(oldest)
+        return evicted
+
+    def _expire_locked(self, now: float, keep: UUID | None) -> List[UUID]:
+        evicted: List[UUID] = []
+        if self.ttl_sec is None:
+            return evicted
+        for session_id, last_used in list(self._last_used.items()):
+            if now - last_used <= self.ttl_sec:
+                break  # ordered by last use, so the rest are fresher
+            if session_id != keep and session_id not in self._pins:
+                self._evict_locked(session_id, "ttl")
+                evicted.append(session_id)
+        return evicted
+
+    def _evict_locked(self, session_id: UUID, reason: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        self._total_bytes -= self._bytes.pop(session_id, 0)
+        for cluster_id in self._centroid_ids.pop(session_id, []):
+            key = (session_id, cluster_id)
+            self._centroids.pop(key, None)
+            self._centroid_sums.pop(key, None)
+            self._centroid_counts.pop(key, None)
+            self._centroid_rows.pop(key, None)
+        self._centroid_matrix.pop(session_id, None)
+        self._memberships.pop(session_id, None)
+        self._acceptance.pop(session_id, None)
+        self._track_embeddings.pop(session_id, None)
+        SESSIONS_EVICTED.inc(reason=reason)
+
+    def _notify(self, evicted: List[UUID]) -> None:
+        if self.on_evict is None:
+            return
+        for session_id in evicted:
+            try:
+                self.on_evict(session_id)
+            except Exception:
+                logger.warning("session on_evict failed session_id=%s", session_id, exc_info=True)
+
+
+def _embedding_bytes(embedding: WindowedEmbedding) -> int:
+    return (
+        ENTRY_BYTES
+        + np.asarray(embedding.embedding).nbytes
+        + np.asarray(embedding.windows).nbytes
+        + 64 * len(embedding.spans_sec)
+    )
@@ -0,0 +1,510 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from suno_backend.app.core.clustering import fit_kmeans
+
+logger = logging.getLogger(__name__)
+
+# below this many rows a flat scan beats probing inverted lists
+MIN_TRAIN_ROWS = 4096
+# retrain the coarse quantizer once the index has grown this much since the last training
+RETRAIN_GROWTH = 4.0
+# rows sampled per list when training centroids
+TRAIN_SAMPLES_PER_LIST = 32
+_ASSIGN_CHUNK = 65536
+
+
+@dataclass(frozen=True)
+class IndexedTrack:
+    track_id: str
+    session_id: str
+    created_at: float
+    audio_url: str
+
+
+@dataclass(frozen=True)
+class TrackMatch:
+    track: IndexedTrack
+    score: float
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _grow(array: np.ndarray, used: int, rows: int) -> np.ndarray:
+    """`array` with room for `rows` leading rows; reallocates (doubling) instead of resizing."""
+    if rows <= len(array):
+        return array
+    grown = np.empty((max(rows, len(array) * 2, 64),) + array.shape[1:], dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class _InvertedList:
+    """Vectors of one list stored contiguously, so probing it is a single matmul."""
+
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        self.vectors = vectors
+        self.rows = rows
+        self.size = len(rows)
+
+    def append(self, vectors: np.ndarray, rows: np.ndarray) -> int:
+        """Append and return the position of the first new vector.
+
+        Positions below `size` are never rewritten (growth copies into a new array), so
+        views taken earlier stay valid without holding the index lock.
+        """
+        start, end = self.size, self.size + len(rows)
+        self.vectors = _grow(self.vectors, start, end)
+        self.rows = _grow(self.rows, start, end)
+        self.vectors[start:end] = vectors
+        self.rows[start:end] = rows
+        self.size = end
+        return start
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.vectors[: self.size], self.rows[: self.size]
+
+
+class TrackIndex:
+    """Cosine IVF-flat index over every finalized track, across sessions.
+
+    Vectors are unit-normalized float32, stored contiguously per inverted list. Below
+    MIN_TRAIN_ROWS there is one list and queries scan everything; past it a coarse k-means
+    quantizer (~sqrt(n) lists) is trained in a background thread and queries score only
+    the `nprobe` nearest lists. With a `root`, inserts are appended to files under it
+    (vectors, metadata, list assignments), so restarts reload without re-embedding or
+    re-training. Removed tracks are tombstoned: their rows keep their slot (row ids stay
+    stable for the files) but are never returned, and the removal is appended to disk too.
+    """
+
+    def __init__(self, root: Path | None = None, nprobe: int = 16) -> None:
+        self.root = root
+        self.nprobe = max(1, nprobe)
+        self.dim: int | None = None
+        self._size = 0
+        self._tracks: List[IndexedTrack] = []
+        self._rows: Dict[str, int] = {}
+        self._session_code_map: Dict[str, int] = {}
+        # per-row columns, indexed by insertion order
+        self._session_codes = np.zeros(0, dtype=np.int32)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._row_list = np.zeros(0, dtype=np.int32)
+        self._row_pos = np.zeros(0, dtype=np.int64)
+        self._dead = np.zeros(0, dtype=bool)
+        self._removed = 0
+        self._centroids: np.ndarray | None = None
+        self._lists: List[_InvertedList] = []
+        self._trained_size = 0
+        self._training = False
+        self._lock = threading.RLock()
+        if root is not None:
+            root.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        """Live (not removed) tracks."""
+        with self._lock:
+            return self._size - self._removed
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def get(self, track_id: str) -> IndexedTrack | None:
+        with self._lock:
+            row = self._rows.get(track_id)
+            return None if row is None else self._tracks[row]
+
+    def add(
+        self,
+        tracks: Sequence[IndexedTrack],
+        embeddings: Sequence[np.ndarray],
+    ) -> None:
+        """Insert tracks (already-indexed ids are skipped); O(batch) plus amortized growth."""
+        if not tracks:
+            return
+        vectors = _normalize(np.stack([np.asarray(e).reshape(-1) for e in embeddings]))
+        with self._lock:
+            if self.dim is None:
+                self._init_dim(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"embedding dim {vectors.shape[1]} != index dim {self.dim}")
+            fresh: Dict[str, int] = {}
+            for i, track in enumerate(tracks):
+                if track.track_id not in self._rows:
+                    fresh.setdefault(track.track_id, i)
+            if not fresh:
+                return
+            picked = list(fresh.values())
+            tracks = [tracks[i] for i in picked]
+            vectors = vectors[picked]
+            rows = np.arange(self._size, self._size + len(tracks))
+            self._reserve(self._size + len(tracks))
+            for row, track in zip(rows.tolist(), tracks):
+                self._tracks.append(track)
+                self._rows[track.track_id] = row
+                self._session_codes[row] = self._session_code(track.session_id)
+                self._created[row] = track.created_at
+                self._dead[row] = False
+            assign = self._insert(vectors, rows)
+            self._size += len(tracks)
+            self._append_files(tracks, vectors, assign)
+            should_train = not self._training and self._size >= MIN_TRAIN_ROWS and (
+                self._trained_size == 0 or self._size >= self._trained_size * RETRAIN_GROWTH
+            )
+            if should_train:
+                self._training = True
+        if should_train:
+            threading.Thread(target=self._train, name="track-index-train", daemon=True).start()
+
+    def remove(self, track_ids: Iterable[str]) -> int:
+        """Tombstone tracks (e.g. their audio was deleted); returns how many were indexed."""
+        with self._lock:
+            rows = [self._rows.pop(track_id) for track_id in track_ids if track_id in self._rows]
+            self._tombstone(np.asarray(rows, dtype=np.int64))
+            return len(rows)
+
+    def remove_session(self, session_id: str) -> int:
+        """Tombstone every track of one session; returns how many were removed."""
+        with self._lock:
+            code = self._session_code_map.get(session_id)
+            if code is None:
+                return 0
+            size = self._size
+            rows = np.flatnonzero((self._session_codes[:size] == code) & ~self._dead[:size])
+            for row in rows.tolist():
+                self._rows.pop(self._tracks[row].track_id, None)
+            self._tombstone(rows)
+            return len(rows)
+
+    def similar(self, track_id: str, k: int = 10) -> List[TrackMatch] | None:
+        """Nearest tracks to an indexed track (itself excluded); None if it is not indexed."""
+        with self._lock:
+            row = self._rows.get(track_id)
+            if row is None:
+                return None
+            query = self._gather(np.array([row]))[0]
+        return self.search(query, k, exclude=track_id)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        session_id: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        exclude: str | None = None,
+    ) -> List[TrackMatch]:
+        """Top-k tracks by cosine similarity, optionally within one session / a time range.
+
+        A session filter scores that session's rows exactly; otherwise the probed lists are
+        scored and, if a time filter leaves fewer than k hits there, every list is.
+        """
+        query = _normalize(np.asarray(query).reshape(-1))
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"query dim {query.shape[0]} != index dim {self.dim}")
+            excluded = self._rows.get(exclude, -1) if exclude is not None else -1
+            if session_id is not None:
+                code = self._session_code_map.get(session_id)
+                if code is None:
+                    return []
+                rows = np.flatnonzero(self._session_codes[: self._size] == code)
+                rows = rows[self._keep_mask(rows, since, until, excluded)]
+                scores = self._gather(rows) @ query
+            else:
+                rows, scores = self._scan(query, self._probe(query), since, until, excluded)
+                timed = since is not None or until is not None
+                if timed and len(rows) < k and len(self._lists) > 1:
+                    rows, scores = self._scan(query, range(len(self._lists)), since, until, excluded)
+            if len(rows) == 0:
+                return []
+            best = _top_k(scores, k)
+            return [TrackMatch(self._tracks[rows[i]], float(scores[i])) for i in best]
+
+    def _scan(
+        self,
+        query: np.ndarray,
+        list_ids: Iterable[int],
+        since: float | None,
+        until: float | None,
+        excluded: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        row_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for list_id in list_ids:
+            vectors, rows = self._lists[list_id].view()
+            if len(rows) == 0:
+                continue
+            scores = vectors @ query
+            keep = self._keep_mask(rows, since, until, excluded)
+            row_parts.append(rows[keep])
+            score_parts.append(scores[keep])
+        if not row_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(row_parts), np.concatenate(score_parts)
+
+    def _keep_mask(
+        self, rows: np.ndarray, since: float | None, until: float | None, excluded: int
+    ) -> np.ndarray:
+        mask = (rows != excluded) & ~self._dead[rows]
+        if since is not None:
+            mask &= self._created[rows] >= since
+        if until is not None:
+            mask &= self._created[rows] <= until
+        return mask
+
+    def _probe(self, query: np.ndarray) -> Iterable[int]:
+        if self._centroids is None:
+            return range(len(self._lists))
+        nprobe = min(self.nprobe, len(self._centroids))
+        return _top_k(self._centroids @ query, nprobe).tolist()
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        assert self.dim is not None
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        list_ids = self._row_list[rows]
+        for list_id in np.unique(list_ids).tolist():
+            hit = list_ids == list_id
+            out[hit] = self._lists[list_id].vectors[self._row_pos[rows[hit]]]
+        return out
+
+    def _insert(self, vectors: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Route rows to their lists; returns the list id per row."""
+        assign = self._assign_rows(vectors)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.flatnonzero(np.diff(assign[order])) + 1
+        for group in np.split(order, bounds):
+            list_id = int(assign[group[0]])
+            first = self._lists[list_id].append(vectors[group], rows[group])
+            self._row_list[rows[group]] = list_id
+            self._row_pos[rows[group]] = np.arange(first, first + len(group))
+        return assign
+
+    def _assign_rows(self, vectors: np.ndarray, centroids: np.ndarray | None = None) -> np.ndarray:
+        centroids = self._centroids if centroids is None else centroids
+        if centroids is None:
+            return np.zeros(len(vectors), dtype=np.int32)
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), _ASSIGN_CHUNK):
+            chunk = vectors[start : start + _ASSIGN_CHUNK]
+            out[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return out
+
+    def _build_lists(
+        self,
+        pieces: Sequence[Tuple[np.ndarray, np.ndarray]],
+        centroids: np.ndarray,
+        assign: np.ndarray | None = None,
+    ) -> Tuple[List[_InvertedList], np.ndarray, np.ndarray, np.ndarray]:
+        """Bucket (vectors, rows) pieces into one list-ordered matrix sliced per list.
+
+        Returns the lists plus the rows, their list ids and positions (for the row columns).
+        """
+        assert self.dim is not None
+        if assign is None:
+            parts = [self._assign_rows(vectors, centroids) for vectors, _ in pieces]
+            assign = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+        rows = np.concatenate([r for _, r in pieces]) if pieces else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        dest = np.empty(len(order), dtype=np.int64)
+        dest[order] = np.arange(len(order))
+        # scatter straight into the ordered matrix so peak memory is old lists + new lists
+        ordered = np.empty((len(order), self.dim), dtype=np.float32)
+        offset = 0
+        for vectors, _ in pieces:
+            ordered[dest[offset : offset + len(vectors)]] = vectors
+            offset += len(vectors)
+        starts = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+        sorted_rows = rows[order]
+        lists = [
+            _InvertedList(ordered[starts[i] : starts[i + 1]], sorted_rows[starts[i] : starts[i + 1]])
+            for i in range(len(centroids))
+        ]
+        return lists, rows, assign, dest - starts[assign]
+
+    def _train(self) -> None:
+        try:
+            with self._lock:
+                size = self._size
+                nlist = int(min(4096, max(16, round(math.sqrt(size)))))
+                rng = np.random.default_rng(size)
+                sample_rows = rng.choice(size, size=min(size, nlist * TRAIN_SAMPLES_PER_LIST), replace=False)
+                sample = self._gather(np.sort(sample_rows))
+                snapshot = [inverted.view() for inverted in self._lists]
+            started = time.monotonic()
+            _, centers = fit_kmeans(sample, nlist, algorithm="minibatch")
+            centroids = _normalize(centers)
+            lists, rows, assign, positions = self._build_lists(snapshot, centroids)
+            with self._lock:
+                # rows inserted while training live past the snapshot in the old lists
+                late = np.arange(size, self._size)
+                late_vectors = self._gather(late)
+                self._lists = lists
+                self._centroids = centroids
+                self._row_list[rows] = assign
+                self._row_pos[rows] = positions
+                if len(late):
+                    self._insert(late_vectors, late)
+                self._trained_size = size
+                self._save_quantizer()
+            logger.info(
+                "track index trained rows=%s lists=%s in %.2fs",
+                size,
+                nlist,
+                time.monotonic() - started,
+            )
+        except Exception:
+            logger.exception("track index training failed")
+        finally:
+            with self._lock:
+                self._training = False
+
+    def _init_dim(self, dim: int) -> None:
+        self.dim = dim
+        self._lists = [_InvertedList(np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.int64))]
+        if self.root is not None:
+            (self.root / "index.json").write_text(json.dumps({"dim": dim}))
+
+    def _tombstone(self, rows: np.ndarray) -> None:
+        if len(rows) == 0:
+            return
+        self._dead[rows] = True
+        self._removed += len(rows)
+        if self.root is not None:
+            with open(self.root / "removed.i64", "ab") as handle:
+                rows.astype(np.int64).tofile(handle)
+
+    def _reserve(self, rows: int) -> None:
+        for name in ("_session_codes", "_created", "_row_list", "_row_pos", "_dead"):
+            setattr(self, name, _grow(getattr(self, name), self._size, rows))
+
+    def _session_code(self, session_id: str) -> int:
+        code = self._session_code_map.get(session_id)
+        if code is None:
+            code = len(self._session_code_map)
+            self._session_code_map[session_id] = code
+        return code
+
+    def _append_files(
+        self, tracks: Sequence[IndexedTrack], vectors: np.ndarray, assign: np.ndarray
+    ) -> None:
+        if self.root is None:
+            return
+        with open(self.root / "vectors.f32", "ab") as handle:
+            vectors.astype(np.float32).tofile(handle)
+        with open(self.root / "assign.i32", "ab") as handle:
+            assign.astype(np.int32).tofile(handle)
+        with open(self.root / "tracks.jsonl", "a", encoding="utf-8") as handle:
+            for track in tracks:
+                handle.write(json.dumps(track.__dict__) + "\n")
+
+    def _save_quantizer(self) -> None:
+        if self.root is None or self._centroids is None:
+            return
+        tmp = self.root / "centroids.tmp.npy"
+        np.save(tmp, self._centroids)
+        tmp.replace(self.root / "centroids.npy")
+        tmp = self.root / "assign.i32.tmp"
+        self._row_list[: self._size].astype(np.int32).tofile(tmp)
+        tmp.replace(self.root / "assign.i32")
+
+    def _load(self) -> None:
+        assert self.root is not None
+        header = self.root / "index.json"
+        if not header.exists():
+            return
+        dim = int(json.loads(header.read_text())["dim"])
+        vectors_path = self.root / "vectors.f32"
+        vectors = np.zeros(0, dtype=np.float32)
+        if vectors_path.exists():
+            vectors = np.fromfile(vectors_path, dtype=np.float32)
+        vectors = vectors[: len(vectors) // dim * dim].reshape(-1, dim)
+        tracks: List[IndexedTrack] = []
+        meta = self.root / "tracks.jsonl"
+        if meta.exists():
+            with open(meta, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        tracks.append(IndexedTrack(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        break  # torn final line after a crash
+        # a crash can leave the files at different lengths; keep the common prefix
+        n = min(len(vectors), len(tracks))
+        self._init_dim(dim)
+        self._reserve(n)
+        for row, track in enumerate(tracks[:n]):
+            self._tracks.append(track)
+            self._rows[track.track_id] = row
+            self._session_codes[row] = self._session_code(track.session_id)
+            self._created[row] = track.created_at
+        self._size = n
+        self._dead[:n] = False
+        removed_path = self.root / "removed.i64"
+        if removed_path.exists():
+            removed = np.fromfile(removed_path, dtype=np.int64)
+            removed = np.unique(removed[(removed >= 0) & (removed < n)])
+            self._dead[removed] = True
+            self._removed = len(removed)
+            for row in removed.tolist():
+                track_id = self._tracks[row].track_id
+                if self._rows.get(track_id) == row:
+                    del self._rows[track_id]
+        rows = np.arange(n)
+
+        assign_path = self.root / "assign.i32"
+        centroids_path = self.root / "centroids.npy"
+        if centroids_path.exists():
+            self._centroids = np.load(centroids_path)
+            assign = np.zeros(0, dtype=np.int32)
+            if assign_path.exists():
+                assign = np.fromfile(assign_path, dtype=np.int32)[:n]
+            if len(assign) < n:
+                assign = np.concatenate([assign, self._assign_rows(vectors[len(assign) : n])])
+            # a crash between saving centroids and assignments leaves ids from the old quantizer
+            bad = (assign < 0) | (assign >= len(self._centroids))
+            if bad.any():
+                assign[bad] = self._assign_rows(vectors[:n][bad])
+            lists, rows, assign, positions = self._build_lists(
+                [(vectors[:n], rows)], self._centroids, assign
+            )
+            self._lists = lists
+            self._row_list[rows] = assign
+            self._row_pos[rows] = positions
+            self._trained_size = n
+        else:
+            self._lists = [_InvertedList(np.ascontiguousarray(vectors[:n]), rows)]
+            self._row_list[:n] = 0
+            self._row_pos[:n] = rows
+        # rewrite files that ran ahead of the common prefix
+        if len(vectors) != n or len(tracks) != n:
+            vectors[:n].tofile(vectors_path)
+            with open(meta, "w", encoding="utf-8") as handle:
+                for track in self._tracks:
+                    handle.write(json.dumps(track.__dict__) + "\n")
+            self._row_list[:n].astype(np.int32).tofile(assign_path)
+        logger.info("track index loaded rows=%s dim=%s trained=%s", n, dim, self.trained)
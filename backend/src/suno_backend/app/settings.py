@@ -36,9 +36,57 @@ def _parse_origins(value: str | list[str] | None) -> list[str]:
 
 class Settings(BaseSettings):
     media_root: Path = BASE_DIR / "media"
+    # compressed renditions encoded after finalize, in server preference order; "" = WAV only
+    media_renditions: str = "mp3,opus"
+    media_transcode_workers: int = Field(default=2, ge=1)
+    media_ffmpeg_path: str = "ffmpeg"
+    media_opus_bitrate_kbps: int = Field(default=64, gt=0)
+    media_mp3_bitrate_kbps: int = Field(default=128, gt=0)
+    media_cache_max_age_sec: int = Field(default=31536000, ge=0)
+    # e.g. "/_media": let nginx serve the bytes from an internal location aliased to media_root
+    media_accel_redirect_prefix: str | None = None
+    # media janitor: evict least-recently-played sessions above the quota (None = unbounded),
+    # never ones used within media_evict_min_idle_sec; drop tmp clips older than the max age
+    media_quota_bytes: int | None = Field(default=None, ge=0)
+    media_evict_min_idle_sec: float = Field(default=600.0, ge=0.0)
+    media_tmp_max_age_sec: float = Field(default=3600.0, gt=0.0)
+    media_janitor_interval_sec: float = Field(default=60.0, gt=0.0)
+    media_clear_on_start: bool = False
+    # in-memory session store bounds (None = unbounded); evicted sessions' media is deleted
+    # too unless session_evict_media is off
+    session_ttl_sec: float | None = Field(default=None, gt=0.0)
+    session_max_sessions: int | None = Field(default=None, ge=1)
+    session_max_bytes: int | None = Field(default=512 * 1024 * 1024, ge=0)
+    session_evict_media: bool = True
+    # POST /sessions/stream: how long finished clip streams stay readable, and how many are kept
+    stream_linger_sec: float = Field(default=120.0, gt=0)
+    stream_max_streams: int = Field(default=256, ge=1)
+    stream_keepalive_sec: float = Field(default=15.0, gt=0)
     max_batch_size: int = 6
     default_max_k: int = 3
+    cluster_algorithm: str = "auto"
+    cluster_k_selection: str = "fixed"
+    more_like_assignment: str = "new_cluster"
+    more_like_oversample: bool = False
+    oversample_max_factor: float = Field(default=3.0, ge=1.0)
+    candidate_pool_enabled: bool = False
+    candidate_pool_max_age_sec: float = Field(default=3600.0, gt=0.0)
+    candidate_pool_max_per_session: int = Field(default=50, ge=1)
+    candidate_pool_max_bytes: int = Field(default=512 * 1024 * 1024, ge=0)
     min_similarity: float = 0.3
+    # cross-session IVF index over every finalized track (GET /tracks/{id}/similar)
+    track_index_enabled: bool = False
+    track_index_root: Path = BASE_DIR / "track_index"
+    track_index_nprobe: int = Field(default=16, ge=1)
+    # score initial-batch clips against the prompt's text embedding: off | drop | rank
+    prompt_filter: str = "off"
+    prompt_filter_min_similarity: float = 0.1
+    prompt_filter_min_keep: int = Field(default=2, ge=1)
+    text_embedding_cache_size: int = Field(default=1024, ge=1)
+    # end-to-end budget for POST /sessions and /more; unset = no deadline
+    request_deadline_sec: float | None = Field(default=None, gt=0.0)
+    # kept back for embed/cluster/name; capped at a quarter of the time left
+    deadline_reserve_sec: float = Field(default=5.0, ge=0.0)
     cors_allow_origins_raw: str | None = Field(
         default=None,
         alias=AliasChoices(
@@ -53,6 +101,7 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("MUSIC_PROVIDER", "suno_lab_music_provider"),
     )
     openai_api_key: str | None = None
+    openai_api_url: str = "https://api.openai.com"
     elevenlabs_api_key: str | None = Field(
         default=None,
         validation_alias=AliasChoices(
@@ -71,8 +120,50 @@ class Settings(BaseSettings):
             "ELEVENLABS_FORCE_INSTRUMENTAL", "suno_lab_elevenlabs_force_instrumental"
         ),
     )
+    elevenlabs_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        validation_alias=AliasChoices(
+            "ELEVENLABS_MAX_CONCURRENCY", "suno_lab_elevenlabs_max_concurrency"
+        ),
+    )
+    elevenlabs_api_url: str = "https://api.elevenlabs.io"
+    # shared across sessions: our plan's concurrent-request limit, handed out fairly
+    elevenlabs_concurrency_limit: int = Field(default=4, ge=1)
+    elevenlabs_max_retries: int = Field(default=3, ge=0)
+    elevenlabs_backoff_base_sec: float = Field(default=0.5, ge=0)
+    elevenlabs_backoff_max_sec: float = Field(default=20.0, ge=0)
+    elevenlabs_circuit_failure_threshold: int = Field(default=5, ge=1)
+    elevenlabs_circuit_reset_sec: float = Field(default=30.0, ge=0)
+    # speculative duplicate for straggling clips; capped per batch
+    elevenlabs_hedge_enabled: bool = False
+    elevenlabs_hedge_max_per_batch: int = Field(default=2, ge=0)
+    elevenlabs_hedge_when_remaining: int = Field(default=1, ge=0)
+    generation_cache_enabled: bool = False
+    generation_cache_root: Path = BASE_DIR / "gen_cache"
+    generation_cache_max_clips_per_key: int = Field(default=12, ge=1)
     clap_enabled: bool = Field(default=False)
     clap_model_name: str = Field(default="laion/clap-htsat-unfused")
+    # how much of each clip CLAP decodes and embeds: full | first | spread | sliding
+    clap_window_strategy: str = "full"
+    clap_window_sec: float = Field(default=10.0, gt=0)
+    clap_num_windows: int = Field(default=3, ge=1)
+    clap_window_overlap: float = Field(default=0.5, ge=0.0, lt=1.0)
+    clap_max_windows: int = Field(default=16, ge=1)
+    # how window embeddings collapse into the track embedding: mean | attention | max
+    clap_window_pooling: str = "mean"
+    log_level: str = "INFO"
+    # enqueue records on request threads; a listener thread does the formatting and I/O
+    log_queue: bool = True
+    # fraction of per-clip INFO lines kept (all of them at DEBUG)
+    log_sample_rate: float = Field(default=0.1, ge=0.0, le=1.0)
+    # one span tree per request, appended as JSON lines to tracing_export_path
+    tracing_enabled: bool = False
+    tracing_export_path: Path = BASE_DIR / "traces.jsonl"
+    # allow ?profile=1 / X-Profile: 1 on generation requests; off in production by default
+    profiling_enabled: bool = False
+    profiling_root: Path = BASE_DIR / "profiles"
+    profiling_max_profiles: int = Field(default=20, ge=1)
     use_fake_namer: bool = Field(
         default=False,
         validation_alias=AliasChoices("USE_FAKE_NAMER", "suno_lab_use_fake_namer"),
@@ -120,6 +211,61 @@ class Settings(BaseSettings):
             raise ValueError("music_provider must be 'fake' or 'elevenlabs'")
         return value
 
+    @field_validator("cluster_algorithm")
+    @classmethod
+    def _validate_cluster_algorithm(cls, value: str) -> str:
+        if value not in {"auto", "kmeans", "minibatch"}:
+            raise ValueError("cluster_algorithm must be 'auto', 'kmeans' or 'minibatch'")
+        return value
+
+    @field_validator("cluster_k_selection")
+    @classmethod
+    def _validate_cluster_k_selection(cls, value: str) -> str:
+        if value not in {"fixed", "silhouette"}:
+            raise ValueError("cluster_k_selection must be 'fixed' or 'silhouette'")
+        return value
+
+    @field_validator("clap_window_strategy")
+    @classmethod
+    def _validate_clap_window_strategy(cls, value: str) -> str:
+        if value not in {"full", "first", "spread", "sliding"}:
+            raise ValueError("clap_window_strategy must be 'full', 'first', 'spread' or 'sliding'")
+        return value
+
+    @field_validator("clap_window_pooling")
+    @classmethod
+    def _validate_clap_window_pooling(cls, value: str) -> str:
+        if value not in {"mean", "attention", "max"}:
+            raise ValueError("clap_window_pooling must be 'mean', 'attention' or 'max'")
+        return value
+
+    @field_validator("prompt_filter")
+    @classmethod
+    def _validate_prompt_filter(cls, value: str) -> str:
+        if value not in {"off", "drop", "rank"}:
+            raise ValueError("prompt_filter must be 'off', 'drop' or 'rank'")
+        return value
+
+    @field_validator("more_like_assignment")
+    @classmethod
+    def _validate_more_like_assignment(cls, value: str) -> str:
+        if value not in {"new_cluster", "incremental"}:
+            raise ValueError("more_like_assignment must be 'new_cluster' or 'incremental'")
+        return value
+
+    @field_validator("media_renditions")
+    @classmethod
+    def _validate_media_renditions(cls, value: str) -> str:
+        names = [name.strip().lower() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in {"opus", "mp3"}]
+        if unknown:
+            raise ValueError("media_renditions entries must be 'opus' or 'mp3'")
+        return ",".join(dict.fromkeys(names))
+
+    @property
+    def media_rendition_list(self) -> list[str]:
+        return [name for name in self.media_renditions.split(",") if name]
+
     @computed_field
     @property
     def cors_allow_origins(self) -> list[str]:
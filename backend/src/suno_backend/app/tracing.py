@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Protocol
+
+logger = logging.getLogger(__name__)
+
+AttributeValue = str | int | float | bool
+
+
+@dataclass
+class Span:
+    """OpenTelemetry-shaped span: ids are hex strings, times are unix nanoseconds."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time_unix_nano: int
+    end_time_unix_nano: int | None = None
+    attributes: Dict[str, AttributeValue] = field(default_factory=dict)
+    status: str = "UNSET"
+    status_message: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value if isinstance(value, (str, int, float, bool)) else str(value)
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_time_unix_nano is None:
+            return None
+        return (self.end_time_unix_nano - self.start_time_unix_nano) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None:
+        ...
+
+
+class InMemorySpanExporter:
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def by_name(self, name: str) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+
+class JsonlFileSpanExporter:
+    """Append one JSON object per finished span; a local stand-in for a collector.
+
+    export() only enqueues the span's dict, so request threads never touch the file. One
+    writer thread serializes whatever is queued, appends it through a handle kept open,
+    and flushes once per drained batch. shutdown() writes the backlog and closes the file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.SimpleQueue[Dict[str, Any] | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span.to_dict())
+
+    def shutdown(self) -> None:
+        """Write every span exported so far and stop the writer; idempotent."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join()
+
+    def _run(self) -> None:
+        handle = None
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            lines = "".join(
+                json.dumps(item, separators=(",", ":")) + "\n" for item in batch if item is not None
+            )
+            if not lines:
+                continue
+            try:
+                if handle is None:
+                    handle = self.path.open("a", encoding="utf-8")
+                handle.write(lines)
+                handle.flush()
+            except OSError:
+                logger.warning("span export failed path=%s", self.path, exc_info=True)
+                if handle is not None:
+                    handle.close()
+                    handle = None
+        if handle is not None:
+            handle.close()
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "suno_current_span", default=None
+)
+_exporter: SpanExporter | None = None
+
+
+def configure_tracing(exporter: SpanExporter | None) -> None:
+    """Install the process-wide exporter; None disables tracing (spans become no-ops).
+
+    The exporter being replaced is shut down, so its queued spans are on disk on return.
+    """
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    shutdown = getattr(previous, "shutdown", None)
+    if previous is not exporter and shutdown is not None:
+        shutdown()
+
+
+def shutdown_tracing() -> None:
+    """Flush and disable the installed exporter."""
+    configure_tracing(None)
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def start_span(
+    name: str, attributes: Dict[str, Any] | None = None
+) -> Iterator[Span | _NoopSpan]:
+    """Child of the current span (or a new trace root); exported when the block exits."""
+    exporter = _exporter
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    span = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+        span_id=os.urandom(8).hex(),
+        parent_span_id=parent.span_id if parent else None,
+        start_time_unix_nano=time.time_ns(),
+    )
+    span.set_attributes(attributes or {})
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.status = "ERROR"
+        span.status_message = f"{type(exc).__name__}: {exc}"
+        raise
+    else:
+        if span.status == "UNSET":
+            span.status = "OK"
+    finally:
+        _current_span.reset(token)
+        span.end_time_unix_nano = time.time_ns()
+        exporter.export(span)
+
+
+atexit.register(shutdown_tracing)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from suno_backend.app.api.deps import get_media_janitor
+from suno_backend.app.api.media import negotiate
+from suno_backend.app.main import app
+from suno_backend.app.services.media_janitor import MediaJanitor
+from suno_backend.app.settings import get_settings
+
+CANDIDATES = [("mp3", "audio/mpeg"), ("opus", "audio/ogg"), ("wav", "audio/wav")]
+FIREFOX = "audio/webm,audio/ogg,audio/wav,audio/*;q=0.9,application/ogg;q=0.7,video/*;q=0.6,*/*;q=0.5"
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, "mp3"),
+        ("*/*", "mp3"),
+        (FIREFOX, "opus"),
+        ("audio/wav", "wav"),
+        ("audio/*;q=0.5, audio/wav", "wav"),
+        ("audio/mpeg;q=0, */*", "opus"),
+        ("text/html", None),
+    ],
+)
+def test_negotiate(accept: str | None, expected: str | None) -> None:
+    assert negotiate(accept, CANDIDATES) == expected
+
+
+@pytest.fixture
+def media(tmp_path: Path):
+    settings = get_settings().model_copy(update={"media_root": tmp_path, "media_renditions": "mp3,opus"})
+    app.dependency_overrides[get_settings] = lambda: settings
+    session_id, track_id = str(uuid4()), str(uuid4())
+    directory = tmp_path / session_id
+    directory.mkdir()
+    (directory / f"{track_id}.wav").write_bytes(b"W" * 1000)
+    (directory / f"{track_id}.opus").write_bytes(b"O" * 100)
+    yield TestClient(app), directory, f"/media/{session_id}/{track_id}"
+    app.dependency_overrides.clear()
+
+
+def test_wav_url_serves_negotiated_rendition(media) -> None:
+    client, _, base = media
+    opus = client.get(f"{base}.wav", headers={"Accept": FIREFOX})
+    assert opus.status_code == 200
+    assert opus.headers["content-type"] == "audio/ogg"
+    assert opus.headers["vary"] == "Accept"
+    assert opus.content == b"O" * 100
+
+    # mp3 not encoded (yet): wildcard clients fall through to the next available rendition
+    wildcard = client.get(f"{base}.wav", headers={"Accept": "*/*"})
+    assert wildcard.headers["content-type"] == "audio/ogg"
+
+    wav = client.get(f"{base}.wav", params={"format": "wav"})
+    assert wav.headers["content-type"] == "audio/wav"
+    assert len(wav.content) == 1000
+
+
+def test_explicit_rendition_and_missing_files(media) -> None:
+    client, directory, base = media
+    assert client.get(f"{base}.opus").content == b"O" * 100
+    assert client.get(f"{base}.mp3").status_code == 404
+    assert client.get(f"/media/{directory.name}/../secret.wav").status_code == 404
+    assert client.get(f"/media/tmp/{directory.name}.wav").status_code == 404
+    assert client.get(f"{base}.wav", headers={"Accept": "text/html"}).status_code == 406
+
+
+def test_head_returns_headers_only(media) -> None:
+    client, _, base = media
+    response = client.head(f"{base}.wav", headers={"Accept": "audio/wav"})
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1000"
+    assert response.content == b""
+
+
+def test_cache_headers_and_conditional_requests(media) -> None:
+    client, _, base = media
+    explicit = client.get(f"{base}.opus")
+    assert explicit.headers["cache-control"] == "public, max-age=31536000, immutable"
+    etag = explicit.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    not_modified = client.get(f"{base}.opus", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # mp3 may still be encoded, so the negotiated URL must revalidate
+    negotiated = client.get(f"{base}.wav", headers={"Accept": "*/*"})
+    assert negotiated.headers["cache-control"] == "public, no-cache"
+    assert negotiated.headers["etag"] == etag
+
+
+def test_negotiated_url_becomes_immutable_once_all_renditions_exist(media) -> None:
+    client, directory, base = media
+    (directory / f"{base.rsplit('/', 1)[1]}.mp3").write_bytes(b"M" * 200)
+    response = client.get(f"{base}.wav", headers={"Accept": "*/*"})
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["cache-control"].endswith("immutable")
+
+
+def test_range_requests_for_seeking(media) -> None:
+    client, _, base = media
+    partial = client.get(f"{base}.wav", params={"format": "wav"}, headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 100-199/1000"
+    assert len(partial.content) == 100
+
+    etag = partial.headers["etag"]
+    stale = client.get(
+        f"{base}.wav", params={"format": "wav"}, headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+    )
+    assert stale.status_code == 200 and len(stale.content) == 1000
+    fresh = client.get(
+        f"{base}.wav", params={"format": "wav"}, headers={"Range": "bytes=0-9", "If-Range": etag}
+    )
+    assert fresh.status_code == 206
+
+
+def test_accel_redirect_hands_bytes_to_proxy(tmp_path: Path) -> None:
+    settings = get_settings().model_copy(
+        update={"media_root": tmp_path, "media_accel_redirect_prefix": "/_media/"}
+    )
+    app.dependency_overrides[get_settings] = lambda: settings
+    session_id, track_id = str(uuid4()), str(uuid4())
+    (tmp_path / session_id).mkdir()
+    (tmp_path / session_id / f"{track_id}.mp3").write_bytes(b"M" * 50)
+    try:
+        response = TestClient(app).get(f"/media/{session_id}/{track_id}.mp3")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"] == f"/_media/{session_id}/{track_id}.mp3"
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b""
+
+
+def test_get_records_play_for_the_janitor(media, tmp_path: Path) -> None:
+    client, directory, base = media
+    janitor = MediaJanitor(tmp_path)
+    app.dependency_overrides[get_media_janitor] = lambda: janitor
+    old = directory.stat().st_mtime - 3600
+    os.utime(directory, (old, old))
+
+    assert client.get(f"{base}.wav").status_code == 200
+    assert directory.stat().st_mtime > old + 3000
+
+
+def test_delete_media_cache_hides_everything_at_once(tmp_path: Path) -> None:
+    janitor = MediaJanitor(tmp_path, interval_sec=3600.0)
+    app.dependency_overrides[get_media_janitor] = lambda: janitor
+    (tmp_path / str(uuid4())).mkdir()
+    (tmp_path / "tmp").mkdir()
+    try:
+        assert TestClient(app).delete("/media-cache").status_code == 204
+        assert [p.name for p in tmp_path.iterdir()] == [".trash"]
+        assert janitor.drain()
+        assert list((tmp_path / ".trash").iterdir()) == []
+    finally:
+        janitor.stop()
+        app.dependency_overrides.clear()
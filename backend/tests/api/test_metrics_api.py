@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from suno_backend.app.api.deps import get_session_service
+from suno_backend.app.main import app
+from suno_backend.app.metrics import CLIPS_GENERATED, STAGE_SECONDS
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+
+
+def test_metrics_endpoint_reports_stage_timings(tmp_path: Path) -> None:
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.3,
+    )
+    generated_before = CLIPS_GENERATED.value()
+    embeds_before = STAGE_SECONDS.count(stage="embed")
+    app.dependency_overrides[get_session_service] = lambda: service
+    client = TestClient(app)
+    try:
+        response = client.post(
+            "/sessions",
+            json={
+                "brief": "warm lofi",
+                "params": {"energy": 0.5, "density": 0.5, "duration_sec": 4.0},
+                "num_clips": 3,
+            },
+        )
+        assert response.status_code == 200
+        metrics = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = metrics.text
+    for stage in ("render", "generate", "embed", "cluster", "name", "finalize", "serialize"):
+        assert f'suno_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert CLIPS_GENERATED.value() == generated_before + 3
+    assert STAGE_SECONDS.count(stage="embed") == embeds_before + 3
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from suno_backend.app.api.deps import get_profile_store, get_session_service
+from suno_backend.app.main import app
+from suno_backend.app.profiling import ProfileStore
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.settings import get_settings
+
+BODY = {
+    "brief": "warm lofi",
+    "params": {"energy": 0.5, "density": 0.5, "duration_sec": 4.0},
+    "num_clips": 3,
+}
+
+
+def _client(tmp_path: Path, profiling_enabled: bool) -> TestClient:
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path / "media"),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path / "media",
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.3,
+    )
+    settings = get_settings().model_copy(update={"profiling_enabled": profiling_enabled})
+    store = ProfileStore(tmp_path / "profiles")
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_profile_store] = lambda: store
+    return TestClient(app)
+
+
+def test_profile_flag_captures_downloadable_profile(tmp_path: Path) -> None:
+    client = _client(tmp_path, profiling_enabled=True)
+    try:
+        plain = client.post("/sessions", json=BODY)
+        response = client.post("/sessions?profile=1", json=BODY)
+        profile_id = response.headers["X-Profile-ID"]
+        listing = client.get("/profiles")
+        meta = client.get(f"/profiles/{profile_id}")
+        report = client.get(f"/profiles/{profile_id}/cprofile.txt")
+        missing = client.get(f"/profiles/{profile_id}/nope.txt")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert plain.status_code == 200
+    assert "X-Profile-ID" not in plain.headers
+    assert response.status_code == 200
+    assert [entry["profile_id"] for entry in listing.json()] == [profile_id]
+    assert meta.json()["label"] == "POST /sessions"
+    assert "create_initial_batch" in report.text
+    assert missing.status_code == 404
+
+
+def test_profile_flag_rejected_when_disabled(tmp_path: Path) -> None:
+    client = _client(tmp_path, profiling_enabled=False)
+    try:
+        response = client.post("/sessions", json=BODY, headers={"X-Profile": "1"})
+        listing = client.get("/profiles")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 403
+    assert listing.status_code == 403
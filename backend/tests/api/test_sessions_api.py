@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from uuid import UUID, uuid4
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 
@@ -10,11 +11,14 @@ from suno_backend.app.api import deps
 from suno_backend.app.api.deps import get_session_service
 from suno_backend.app.main import app
 from suno_backend.app.models.domain import BriefParams
+from suno_backend.app.services.candidate_pool import CandidatePool
 from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
 from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
 from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.media_janitor import MediaJanitor
 from suno_backend.app.services.providers import MusicProvider
-from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.request_context import current_deadline
+from suno_backend.app.services.session_service import DeadlineExceededError, SessionService
 from suno_backend.app.services.session_store import SessionStore
 from suno_backend.app.settings import get_settings
 from suno_backend.app.services.openai_cluster_naming_provider import OpenAiClusterNamingProvider
@@ -26,6 +30,15 @@ class EmptyMusicProvider(MusicProvider):
         return []
 
 
+class DeadlineMusicProvider(MusicProvider):
+    def __init__(self) -> None:
+        self.seen_deadline = None
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float):
+        self.seen_deadline = current_deadline()
+        raise DeadlineExceededError("deadline exceeded")
+
+
 def make_service(
     media_root: Path,
     store: SessionStore | None = None,
@@ -175,6 +188,22 @@ def test_zero_generation_yields_500(tmp_path: Path) -> None:
         app.dependency_overrides.clear()
 
 
+def test_request_deadline_reaches_provider_and_maps_to_504(tmp_path: Path) -> None:
+    music = DeadlineMusicProvider()
+    service = make_service(tmp_path, music_provider=music)
+    settings = get_settings().model_copy(update={"request_deadline_sec": 30.0})
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[get_settings] = lambda: settings
+    try:
+        response = _create_session(TestClient(app), num_clips=1)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 504
+    assert music.seen_deadline is not None
+    assert 0 < music.seen_deadline.remaining() <= 30.0
+
+
 def test_dependency_singletons() -> None:
     store_one = deps.get_session_store()
     store_two = deps.get_session_store()
@@ -238,3 +267,75 @@ def test_create_session_uses_openai_namer(tmp_path: Path, monkeypatch: pytest.Mo
         assert "uplifting trance" in sent
     finally:
         app.dependency_overrides.clear()
+
+
+def test_request_id_is_echoed(client_with_service) -> None:
+    client, _, _ = client_with_service
+
+    supplied = client.get("/health", headers={"X-Request-ID": "abc123"})
+    generated = client.get("/health")
+
+    assert supplied.headers["x-request-id"] == "abc123"
+    assert generated.headers["x-request-id"]
+
+
+def test_evicted_session_media_is_handed_to_the_janitor(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    janitor = MediaJanitor(tmp_path, interval_sec=3600.0)
+    monkeypatch.setattr(deps, "_media_janitor", janitor)
+    store = SessionStore(max_sessions=1, on_evict=deps._release_session)
+    params = BriefParams(energy=0.5, density=0.5, duration_sec=1.0)
+    first = store.create_session("first", params)
+    (tmp_path / str(first.id)).mkdir()
+    try:
+        second = store.create_session("second", params)
+
+        assert store.get_session(first.id) is None
+        assert not (tmp_path / str(first.id)).exists()
+        assert janitor.drain()
+        assert store.get_session(second.id) is second
+    finally:
+        janitor.stop()
+
+
+def test_pooled_more_like_after_media_cache_clear(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pool = CandidatePool(tmp_path)
+    janitor = MediaJanitor(tmp_path, interval_sec=3600.0, on_delete=deps._forget_media)
+    monkeypatch.setattr(deps, "get_candidate_pool", lambda: pool)
+    monkeypatch.setattr(deps, "get_track_index", lambda: None)
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=4,
+        default_max_k=3,
+        min_similarity=-1.0,
+        candidate_pool=pool,
+    )
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[deps.get_media_janitor] = lambda: janitor
+    try:
+        client = TestClient(app)
+        created = _create_session(client, num_clips=2).json()
+        session_id, cluster_id = created["session_id"], created["batch"]["clusters"][0]["id"]
+        for clip in FakeMusicProvider(tmp_path).generate_batch("extra", 2, 1.0):
+            pool.add(UUID(session_id), clip, np.ones(8, dtype=np.float32))
+
+        assert client.delete("/media-cache").status_code == 204
+        assert pool.size(UUID(session_id)) == 0
+
+        response = client.post(
+            f"/sessions/{session_id}/clusters/{cluster_id}/more", json={"num_clips": 2}
+        )
+        assert response.status_code == 200
+        for cluster in response.json()["batch"]["clusters"]:
+            for track in cluster["tracks"]:
+                assert (tmp_path / session_id / f"{track['id']}.wav").exists()
+    finally:
+        app.dependency_overrides.clear()
+        janitor.stop()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from suno_backend.app.api.deps import get_clip_stream_hub, get_session_service
+from suno_backend.app.api.streams import _to_big_endian
+from suno_backend.app.main import app
+from suno_backend.app.services.clip_streams import ClipStreamHub
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+
+
+def _parse_sse(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def streaming_client(tmp_path: Path):
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=4,
+        default_max_k=3,
+        min_similarity=0.0,
+    )
+    hub = ClipStreamHub()
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[get_clip_stream_hub] = lambda: hub
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _post_stream(client: TestClient, num_clips: int = 3, duration_sec: float = 0.5):
+    params = {"energy": 0.5, "density": 0.5, "duration_sec": duration_sec}
+    return client.post(
+        "/sessions/stream", json={"brief": "lofi", "num_clips": num_clips, "params": params}
+    )
+
+
+def test_stream_session_emits_clips_then_batch(streaming_client: TestClient) -> None:
+    response = _post_stream(streaming_client)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names.count("clip") == 3 and names.count("clip_done") == 3
+    assert names[-1] == "batch"
+    assert names.index("clip") < names.index("batch")
+
+    batch = events[-1][1]
+    UUID(batch["session_id"])
+    track_ids = {t["id"] for c in batch["batch"]["clusters"] for t in c["tracks"]}
+    started = {payload["stream_id"] for name, payload in events if name == "clip"}
+    assert set(batch["streams"]) == started
+    assert set(batch["streams"].values()) == track_ids
+
+
+def test_stream_relays_wav_and_pcm(streaming_client: TestClient) -> None:
+    events = _parse_sse(_post_stream(streaming_client, num_clips=1).text)
+    url = next(payload["stream_url"] for name, payload in events if name == "clip")
+
+    wav = streaming_client.get(url)
+    assert wav.status_code == 200
+    assert wav.headers["content-type"] == "audio/wav"
+    assert wav.content[:4] == b"RIFF"
+    assert len(wav.content) == 44 + int(0.5 * 16000) * 2
+
+    pcm = streaming_client.get(url, params={"format": "pcm"})
+    assert pcm.headers["content-type"] == "audio/L16;rate=16000;channels=1"
+    # audio/L16 is big-endian; the WAV body is little-endian
+    samples = np.frombuffer(wav.content[44:], dtype="<i2")
+    assert pcm.content == samples.astype(">i2").tobytes()
+
+
+def test_pcm_byteswap_carries_odd_bytes_across_chunks() -> None:
+    data = np.arange(-50, 50, dtype="<i2").tobytes()
+    out, carry = b"", b""
+    for start in range(0, len(data), 7):
+        swapped, carry = _to_big_endian(carry + data[start : start + 7])
+        out += swapped
+    assert carry == b""
+    assert out == np.arange(-50, 50, dtype=">i2").tobytes()
+
+
+def test_stream_session_reports_errors_as_events(streaming_client: TestClient) -> None:
+    events = _parse_sse(_post_stream(streaming_client, num_clips=5).text)
+    assert events == [("error", {"status": 400, "detail": events[0][1]["detail"]})]
+
+
+def test_unknown_stream_is_404(streaming_client: TestClient) -> None:
+    assert streaming_client.get("/streams/" + "0" * 32).status_code == 404
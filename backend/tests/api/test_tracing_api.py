@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from suno_backend.app.api.deps import get_session_service
+from suno_backend.app.main import app
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.tracing import InMemorySpanExporter, configure_tracing
+
+
+def test_create_session_emits_one_trace_with_stage_spans(tmp_path: Path) -> None:
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.3,
+    )
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    app.dependency_overrides[get_session_service] = lambda: service
+    client = TestClient(app)
+    try:
+        response = client.post(
+            "/sessions",
+            json={
+                "brief": "warm lofi",
+                "params": {"energy": 0.5, "density": 0.5, "duration_sec": 4.0},
+                "num_clips": 3,
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+        configure_tracing(None)
+
+    assert response.status_code == 200
+    (root,) = [span for span in exporter.spans if span.parent_span_id is None]
+    assert root.attributes["http.route"] == "/sessions"
+    assert root.attributes["http.status_code"] == 200
+    assert root.attributes["session.id"] == response.json()["session_id"]
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+
+    embeds = exporter.by_name("embed")
+    assert len(embeds) == 3
+    assert all(span.attributes["embedding.dim"] > 0 for span in embeds)
+    names = {span.name for span in exporter.spans}
+    assert {"generate", "cluster", "name", "finalize"} <= names
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import numpy as np
+
+from suno_backend.app.api import deps
+from suno_backend.app.api.deps import get_embedding_provider, get_session_service, get_track_index
+from suno_backend.app.main import app
+from suno_backend.app.services.cached_embedding_provider import CachingEmbeddingProvider
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.media_janitor import MediaJanitor
+from suno_backend.app.services.session_service import SessionService
+from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.services.track_index import IndexedTrack, TrackIndex
+
+
+@pytest.fixture
+def indexed_client(tmp_path: Path):
+    index = TrackIndex(tmp_path / "index")
+    service = SessionService(
+        store=SessionStore(),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.0,
+        track_index=index,
+    )
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[get_track_index] = lambda: index
+    try:
+        yield TestClient(app), index
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _create(client: TestClient, num_clips: int) -> dict:
+    params = {"energy": 0.5, "density": 0.5, "duration_sec": 0.2}
+    response = client.post("/sessions", json={"brief": "dub", "num_clips": num_clips, "params": params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_similar_tracks_span_sessions(indexed_client) -> None:
+    client, index = indexed_client
+    first = _create(client, 3)
+    second = _create(client, 3)
+    assert len(index) == 6
+
+    track_id = first["batch"]["clusters"][0]["tracks"][0]["id"]
+    response = client.get(f"/tracks/{track_id}/similar", params={"k": 10})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["track_id"] == track_id
+    results = body["results"]
+    assert len(results) == 5 and track_id not in {r["id"] for r in results}
+    assert {r["session_id"] for r in results} == {first["session_id"], second["session_id"]}
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert all(r["audio_url"].startswith("/media/") for r in results)
+
+
+def test_unknown_track_is_404(indexed_client) -> None:
+    client, _ = indexed_client
+    assert client.get(f"/tracks/{uuid4()}/similar").status_code == 404
+
+
+def test_evicted_session_leaves_the_index(tmp_path: Path, monkeypatch) -> None:
+    index = TrackIndex(tmp_path / "index")
+    janitor = MediaJanitor(tmp_path, on_delete=deps._forget_media)
+    monkeypatch.setattr(deps, "_media_janitor", janitor)
+    monkeypatch.setattr(deps, "get_track_index", lambda: index)
+    service = SessionService(
+        store=SessionStore(max_sessions=1, on_evict=deps._release_session),
+        music=FakeMusicProvider(tmp_path),
+        embedder=FakeEmbeddingProvider(),
+        namer=FakeClusterNamingProvider(),
+        media_root=tmp_path,
+        max_batch_size=6,
+        default_max_k=3,
+        min_similarity=0.0,
+        track_index=index,
+    )
+    app.dependency_overrides[get_session_service] = lambda: service
+    app.dependency_overrides[get_track_index] = lambda: index
+    try:
+        client = TestClient(app)
+        first = _create(client, 3)
+        second = _create(client, 3)  # evicts the first session and deletes its media
+        assert not (tmp_path / first["session_id"]).exists()
+        assert len(index) == 3
+
+        evicted_id = first["batch"]["clusters"][0]["tracks"][0]["id"]
+        assert client.get(f"/tracks/{evicted_id}/similar").status_code == 404
+        live_id = second["batch"]["clusters"][0]["tracks"][0]["id"]
+        response = client.get(f"/tracks/{live_id}/similar", params={"k": 10})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 2
+        assert {r["session_id"] for r in results} == {second["session_id"]}
+    finally:
+        app.dependency_overrides.clear()
+        janitor.stop()
+
+
+def test_disabled_index_is_503() -> None:
+    app.dependency_overrides[get_track_index] = lambda: None
+    try:
+        assert TestClient(app).get(f"/tracks/{uuid4()}/similar").status_code == 503
+    finally:
+        app.dependency_overrides.clear()
+
+
+class KeywordEmbedder(FakeEmbeddingProvider):
+    """Text embeddings point at fixed axes so search results are predictable."""
+
+    AXES = {"drums": 0, "strings": 1, "bass": 2}
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.text_calls = 0
+
+    def embed_text(self, text: str) -> np.ndarray:
+        self.text_calls += 1
+        vector = np.zeros(8, dtype=np.float32)
+        vector[self.AXES[text]] = 1.0
+        return vector
+
+
+@pytest.fixture
+def search_client(tmp_path: Path):
+    index = TrackIndex()
+    embedder = KeywordEmbedder()
+    session_a, session_b = str(uuid4()), str(uuid4())
+    rows = [
+        (session_a, 100.0, [1.0, 0.1, 0, 0, 0, 0, 0, 0]),
+        (session_a, 100.0, [0.1, 1.0, 0, 0, 0, 0, 0, 0]),
+        (session_b, 200.0, [1.0, 0.3, 0, 0, 0, 0, 0, 0]),
+        (session_b, 200.0, [0.0, 0.2, 1.0, 0, 0, 0, 0, 0]),
+    ]
+    tracks = [
+        IndexedTrack(str(uuid4()), sid, at, f"/media/{sid}/{i}.wav")
+        for i, (sid, at, _) in enumerate(rows)
+    ]
+    index.add(tracks, [np.array(v, dtype=np.float32) for _, _, v in rows])
+    app.dependency_overrides[get_track_index] = lambda: index
+    cached = CachingEmbeddingProvider(embedder)
+    app.dependency_overrides[get_embedding_provider] = lambda: cached
+    try:
+        yield TestClient(app), embedder, tracks
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_search_ranks_tracks_by_text_similarity(search_client) -> None:
+    client, _, tracks = search_client
+    response = client.get("/search", params={"q": "drums", "k": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["query"] == "drums"
+    assert [r["id"] for r in body["results"]] == [tracks[0].track_id, tracks[2].track_id]
+    assert body["results"][0]["score"] > body["results"][1]["score"]
+
+
+def test_search_filters_by_session_and_time(search_client) -> None:
+    client, _, tracks = search_client
+    by_session = client.get("/search", params={"q": "drums", "session_id": tracks[2].session_id}).json()
+    assert [r["id"] for r in by_session["results"]] == [tracks[2].track_id, tracks[3].track_id]
+
+    early = client.get("/search", params={"q": "strings", "until": 150}).json()
+    assert [r["id"] for r in early["results"]] == [tracks[1].track_id, tracks[0].track_id]
+
+    late = client.get("/search", params={"q": "strings", "since": "1970-01-01T00:02:30Z"}).json()
+    assert {r["id"] for r in late["results"]} == {tracks[2].track_id, tracks[3].track_id}
+
+    assert client.get("/search", params={"q": "bass", "since": 300, "until": 100}).status_code == 400
+
+
+def test_search_reuses_cached_text_embedding(search_client) -> None:
+    client, embedder, _ = search_client
+    for _ in range(3):
+        assert client.get("/search", params={"q": "bass"}).status_code == 200
+    assert embedder.text_calls == 1
+
+
+def test_search_finds_generated_tracks(indexed_client) -> None:
+    client, _ = indexed_client
+    created = _create(client, 3)
+    response = client.get("/search", params={"q": "dub", "session_id": created["session_id"]})
+
+    assert response.status_code == 200
+    generated = {t["id"] for c in created["batch"]["clusters"] for t in c["tracks"]}
+    assert {r["id"] for r in response.json()["results"]} == generated
+
+
+def test_search_disabled_index_is_503() -> None:
+    app.dependency_overrides[get_track_index] = lambda: None
+    try:
+        assert TestClient(app).get("/search", params={"q": "drums"}).status_code == 503
+    finally:
+        app.dependency_overrides.clear()
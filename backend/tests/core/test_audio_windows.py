@@ -0,0 +1,95 @@
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from suno_backend.app.core.audio_windows import plan_windows, pool_windows, read_wav_windows
+
+
+def _write_ramp(path: Path, frames: int, sample_rate: int = 1000, stereo: bool = False) -> None:
+    samples = np.arange(frames, dtype=np.int16)
+    if stereo:
+        samples = np.stack([samples, samples], axis=1).flatten()
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2 if stereo else 1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+
+
+def test_plan_windows_strategies():
+    assert plan_windows(30000, 1000, "full") == [(0, 30000)]
+    assert plan_windows(30000, 1000, "first", window_sec=10) == [(0, 10000)]
+    assert plan_windows(30000, 1000, "spread", window_sec=10, num_windows=3) == [
+        (0, 10000),
+        (10000, 10000),
+        (20000, 10000),
+    ]
+
+
+def test_plan_windows_sliding_overlaps_and_ends_at_clip_end():
+    assert plan_windows(25000, 1000, "sliding", window_sec=10, overlap=0.5) == [
+        (0, 10000),
+        (5000, 10000),
+        (10000, 10000),
+        (15000, 10000),
+    ]
+    capped = plan_windows(100000, 1000, "sliding", window_sec=10, overlap=0.5, max_windows=4)
+    assert [start for start, _ in capped] == [0, 30000, 60000, 90000]
+
+
+def test_plan_windows_short_clip_is_read_whole():
+    assert plan_windows(5000, 1000, "spread", window_sec=10, num_windows=3) == [(0, 5000)]
+    assert plan_windows(5000, 1000, "first", window_sec=10) == [(0, 5000)]
+
+
+def test_plan_windows_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        plan_windows(30000, 1000, "middle")
+
+
+def test_read_wav_windows_seeks_to_planned_frames(tmp_path: Path):
+    path = tmp_path / "ramp.wav"
+    _write_ramp(path, 3000, stereo=True)
+
+    decoded = read_wav_windows(path, "spread", window_sec=1.0, num_windows=2)
+    windows = decoded.samples
+
+    assert (decoded.sample_rate, decoded.channels, decoded.total_frames) == (1000, 2, 3000)
+    assert decoded.spans_sec() == [(0.0, 1.0), (2.0, 3.0)]
+    assert [len(window) for window in windows] == [1000, 1000]
+    assert windows[0][0] == 0 and windows[1][0] == 2000
+    assert windows[1].dtype == np.float32
+
+
+def test_read_wav_windows_rejects_8bit(tmp_path: Path):
+    path = tmp_path / "u8.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(1)
+        wf.setframerate(1000)
+        wf.writeframes(b"\x80" * 100)
+    with pytest.raises(ValueError):
+        read_wav_windows(path)
+
+
+def test_pool_windows_mean_and_max():
+    windows = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    assert np.allclose(pool_windows(windows, "mean"), [2 / 3, 2 / 3])
+    assert np.allclose(pool_windows(windows, "max"), [1.0, 1.0])
+    assert np.allclose(pool_windows(windows[:1], "attention"), [1.0, 0.0])
+
+
+def test_pool_windows_attention_downweights_outlier_window():
+    windows = np.array([[1.0, 0.0], [0.98, 0.2], [1.0, -0.1], [0.0, 1.0]])
+    attention = pool_windows(windows, "attention")
+    mean = pool_windows(windows, "mean")
+    # the odd window pulls the mean towards it; attention mostly ignores it
+    assert attention[1] / attention[0] < mean[1] / mean[0]
+    assert attention[1] < 0.1
+
+
+def test_pool_windows_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        pool_windows(np.ones((2, 3)), "median")
@@ -1,6 +1,12 @@
 import numpy as np
+import pytest
 
-from suno_backend.app.core.clustering import cluster_embeddings
+from suno_backend.app.core.clustering import (
+    cluster_embeddings,
+    merge_singletons,
+    pairwise_distances,
+    silhouette_from_distances,
+)
 
 
 def test_single_embedding_returns_single_cluster():
@@ -62,3 +68,81 @@ def test_clusters_are_sorted_by_size_then_index():
     clusters = cluster_embeddings(embeddings)
 
     assert clusters == [[0, 1, 2], [3, 4], [5, 6]]
+
+
+def test_minibatch_matches_kmeans_on_separated_blobs():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    embeddings = [centers[i % 3] + rng.normal(scale=0.1, size=2) for i in range(60)]
+
+    full = cluster_embeddings(embeddings, max_k=3, algorithm="kmeans")
+    mini = cluster_embeddings(embeddings, max_k=3, algorithm="minibatch")
+
+    assert full == mini
+    assert [len(c) for c in full] == [20, 20, 20]
+
+
+def test_clustering_is_deterministic():
+    rng = np.random.default_rng(1)
+    embeddings = list(rng.normal(size=(200, 16)))
+
+    first = cluster_embeddings(embeddings, max_k=3)
+    second = cluster_embeddings(embeddings, max_k=3)
+
+    assert first == second
+    assert sorted(idx for c in first for idx in c) == list(range(200))
+
+
+def test_merge_singletons_picks_nearest_large_centroid():
+    X = np.array([[0.0], [0.2], [9.8], [10.0], [4.0], [6.0]])
+    labels = np.array([0, 0, 1, 1, 2, 3])
+    centers = np.array([[0.1], [9.9], [4.0], [6.0]])
+
+    merged = merge_singletons(X, labels, centers)
+
+    assert merged.tolist() == [0, 0, 1, 1, 0, 1]
+
+
+def test_unknown_algorithm_raises():
+    embeddings = [np.array([0.0]), np.array([1.0])]
+
+    with pytest.raises(ValueError):
+        cluster_embeddings(embeddings, max_k=2, algorithm="dbscan")
+
+
+def test_silhouette_selection_keeps_near_identical_clips_together():
+    rng = np.random.default_rng(2)
+    base = rng.normal(size=16)
+    embeddings = [base + rng.normal(scale=1e-3, size=16) for _ in range(6)]
+
+    assert cluster_embeddings(embeddings, max_k=3, k_selection="silhouette") == [
+        [0, 1, 2, 3, 4, 5]
+    ]
+
+
+def test_silhouette_selection_finds_true_k():
+    embeddings = [
+        np.array([0.0, 0.0]),
+        np.array([0.1, 0.0]),
+        np.array([0.0, 0.1]),
+        np.array([10.0, 10.0]),
+        np.array([10.1, 10.0]),
+        np.array([10.0, 10.1]),
+    ]
+
+    clusters = cluster_embeddings(embeddings, max_k=3, k_selection="silhouette")
+
+    assert clusters == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_silhouette_from_distances_matches_sklearn():
+    from sklearn.metrics import silhouette_score
+
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(40, 5))
+    labels = rng.integers(0, 3, size=40)
+    labels[0] = 3  # include a singleton cluster
+
+    ours = silhouette_from_distances(pairwise_distances(X), labels)
+
+    assert ours == pytest.approx(silhouette_score(X, labels), abs=1e-9)
@@ -1,7 +1,11 @@
 import numpy as np
 import pytest
 
-from suno_backend.app.core.similarity import cosine_similarity, filter_by_similarity
+from suno_backend.app.core.similarity import (
+    cosine_similarity,
+    cosine_similarity_matrix,
+    filter_by_similarity,
+)
 
 
 def test_cosine_similarity_parallel_vectors():
@@ -50,3 +54,15 @@ def test_filter_by_similarity_fallbacks_when_none_meet_threshold():
     indices = filter_by_similarity(embeddings, centroid, min_similarity=0.9, max_results=2)
 
     assert indices == [1, 0]
+
+
+def test_cosine_similarity_matrix_matches_pairwise():
+    a = np.array([[1.0, 0.0], [0.0, 0.0], [0.6, 0.8]])
+    b = np.array([[2.0, 0.0], [0.0, 3.0]])
+
+    matrix = cosine_similarity_matrix(a, b)
+
+    assert matrix.shape == (3, 2)
+    for i in range(3):
+        for j in range(2):
+            assert matrix[i, j] == pytest.approx(cosine_similarity(a[i], b[j]))
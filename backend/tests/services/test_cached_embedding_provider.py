@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from suno_backend.app.metrics import TEXT_EMBED_CACHE
+from suno_backend.app.services.cached_embedding_provider import CachingEmbeddingProvider
+from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
+
+
+class CountingEmbedder(FakeEmbeddingProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.text_calls: list[str] = []
+
+    def embed_text(self, text: str) -> np.ndarray:
+        self.text_calls.append(text)
+        return super().embed_text(text)
+
+    def embed_audio_windows(self, audio_path: Path):
+        return "windows"
+
+
+def test_text_embeddings_are_cached_per_text() -> None:
+    inner = CountingEmbedder()
+    provider = CachingEmbeddingProvider(inner)
+    hits = TEXT_EMBED_CACHE.value(result="hit")
+
+    first = provider.embed_text("dark techno")
+    again = provider.embed_text("dark techno")
+    provider.embed_text("bright pop")
+
+    assert inner.text_calls == ["dark techno", "bright pop"]
+    assert again is first
+    assert np.array_equal(first, inner.embed_text("dark techno"))
+    assert TEXT_EMBED_CACHE.value(result="hit") == hits + 1
+    with pytest.raises(ValueError):
+        first[0] = 1.0
+
+
+def test_text_cache_evicts_least_recently_used() -> None:
+    inner = CountingEmbedder()
+    provider = CachingEmbeddingProvider(inner, max_text_entries=2)
+
+    provider.embed_text("a")
+    provider.embed_text("b")
+    provider.embed_text("a")
+    provider.embed_text("c")
+    provider.embed_text("a")
+    provider.embed_text("b")
+
+    assert inner.text_calls == ["a", "b", "c", "b"]
+    assert provider.text_cache_size() == 2
+
+
+def test_audio_and_extras_pass_through(tmp_path: Path) -> None:
+    inner = CountingEmbedder()
+    provider = CachingEmbeddingProvider(inner)
+    path = tmp_path / "clip.wav"
+
+    assert np.array_equal(provider.embed_audio(path), inner.embed_audio(path))
+    assert provider.embed_audio_windows(path) == "windows"
+    assert getattr(CachingEmbeddingProvider(FakeEmbeddingProvider()), "embed_audio_windows", None) is None
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from suno_backend.app.services.cached_music_provider import CachingMusicProvider
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.providers import MusicProvider
+from suno_backend.app.services.session_service import GenerationFailedError
+
+
+class CountingMusicProvider(FakeMusicProvider):
+    def __init__(self, media_root: Path) -> None:
+        super().__init__(media_root)
+        self.requests: list[int] = []
+        self.force_instrumental = True
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float):
+        self.requests.append(num_clips)
+        return super().generate_batch(prompt, num_clips, duration_sec)
+
+
+class FailingMusicProvider(MusicProvider):
+    force_instrumental = True
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float):
+        raise GenerationFailedError("down")
+
+
+def make_provider(tmp_path: Path, inner: MusicProvider, max_clips_per_key: int = 4):
+    return CachingMusicProvider(
+        inner,
+        media_root=tmp_path / "media",
+        cache_root=tmp_path / "cache",
+        max_clips_per_key=max_clips_per_key,
+    )
+
+
+def test_fills_pool_then_serves_from_cache(tmp_path: Path) -> None:
+    inner = CountingMusicProvider(tmp_path / "media")
+    provider = make_provider(tmp_path, inner, max_clips_per_key=4)
+
+    first = provider.generate_batch("warm pads", 3, 1.0)
+    second = provider.generate_batch("warm pads", 3, 1.0)
+    third = provider.generate_batch("warm pads", 3, 1.0)
+
+    assert inner.requests == [3, 1]
+    assert len(first) == len(second) == len(third) == 3
+    assert provider.hits == 5 and provider.misses == 4
+    served = {clip.audio_path for clip in first + second + third}
+    assert len(served) == 9
+    for clip in third:
+        assert clip.audio_path.parent == tmp_path / "media" / "tmp"
+        assert clip.raw_prompt == "warm pads"
+        clip.audio_path.unlink()
+    assert len(list((tmp_path / "cache").rglob("*.wav"))) == 4
+
+
+def test_key_includes_duration_and_force_instrumental(tmp_path: Path) -> None:
+    inner = CountingMusicProvider(tmp_path / "media")
+    provider = make_provider(tmp_path, inner, max_clips_per_key=1)
+
+    provider.generate_batch("warm pads", 1, 1.0)
+    provider.generate_batch("warm pads", 1, 2.0)
+    provider.force_instrumental = False
+    provider.generate_batch("warm pads", 1, 1.0)
+    provider.generate_batch("warm pads", 1, 1.0)
+
+    assert inner.requests == [1, 1, 1]
+    assert inner.force_instrumental is False
+
+
+def test_pool_survives_restart_and_covers_inner_failure(tmp_path: Path) -> None:
+    warm = make_provider(tmp_path, CountingMusicProvider(tmp_path / "media"), max_clips_per_key=2)
+    warm.generate_batch("warm pads", 2, 1.0)
+
+    cold = make_provider(tmp_path, FailingMusicProvider(), max_clips_per_key=4)
+    clips = cold.generate_batch("warm pads", 3, 1.0)
+
+    assert len(clips) == 2
+    assert all(clip.duration_sec > 0 for clip in clips)
+    with pytest.raises(GenerationFailedError):
+        cold.generate_batch("other brief", 1, 1.0)
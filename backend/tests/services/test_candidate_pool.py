@@ -0,0 +1,84 @@
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+
+from suno_backend.app.services.candidate_pool import CandidatePool
+from suno_backend.app.services.providers import GeneratedClip
+
+
+def make_clip(tmp_path: Path, name: str, size: int = 100) -> GeneratedClip:
+    tmp_dir = tmp_path / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    audio_path = tmp_dir / f"{name}.wav"
+    audio_path.write_bytes(b"\x00" * size)
+    return GeneratedClip(audio_path=audio_path, duration_sec=1.0, raw_prompt="prompt")
+
+
+def test_add_moves_clip_into_session_pool_dir(tmp_path: Path) -> None:
+    pool = CandidatePool(tmp_path)
+    session_id = uuid4()
+    clip = make_clip(tmp_path, "a")
+
+    pool.add(session_id, clip, np.array([1.0, 0.0]))
+
+    [candidate] = pool.get_candidates(session_id)
+    assert not clip.audio_path.exists()
+    assert candidate.clip.audio_path == tmp_path / str(session_id) / "candidates" / "a.wav"
+    assert candidate.clip.audio_path.exists()
+    assert pool.total_bytes == 100
+
+
+def test_take_returns_best_matches_above_threshold(tmp_path: Path) -> None:
+    pool = CandidatePool(tmp_path)
+    session_id = uuid4()
+    pool.add(session_id, make_clip(tmp_path, "far"), np.array([0.0, 1.0]))
+    pool.add(session_id, make_clip(tmp_path, "near"), np.array([1.0, 0.1]))
+    pool.add(session_id, make_clip(tmp_path, "exact"), np.array([2.0, 0.0]))
+
+    taken = pool.take(session_id, np.array([1.0, 0.0]), min_similarity=0.5, max_results=5)
+
+    assert [c.clip.audio_path.stem for c in taken] == ["exact", "near"]
+    assert [c.clip.audio_path.stem for c in pool.get_candidates(session_id)] == ["far"]
+    assert pool.total_bytes == 100
+    assert pool.take(uuid4(), np.array([1.0, 0.0]), min_similarity=0.0, max_results=1) == []
+
+
+def test_take_drops_entries_whose_file_is_gone(tmp_path: Path) -> None:
+    pool = CandidatePool(tmp_path)
+    session_id = uuid4()
+    pool.add(session_id, make_clip(tmp_path, "gone"), np.array([1.0, 0.0]))
+    pool.add(session_id, make_clip(tmp_path, "kept"), np.array([0.9, 0.1]))
+    (tmp_path / str(session_id) / "candidates" / "gone.wav").unlink()
+
+    taken = pool.take(session_id, np.array([1.0, 0.0]), min_similarity=0.0, max_results=5)
+
+    assert [c.clip.audio_path.stem for c in taken] == ["kept"]
+    assert pool.size(session_id) == 0
+    assert pool.total_bytes == 0
+
+
+def test_eviction_by_count_age_and_quota(tmp_path: Path) -> None:
+    session_a = uuid4()
+    session_b = uuid4()
+
+    by_count = CandidatePool(tmp_path / "count", max_per_session=2)
+    for name in ["a", "b", "c"]:
+        by_count.add(session_a, make_clip(tmp_path, name), np.array([1.0]))
+    assert [c.clip.audio_path.stem for c in by_count.get_candidates(session_a)] == ["b", "c"]
+    assert not (tmp_path / "count" / str(session_a) / "candidates" / "a.wav").exists()
+
+    by_quota = CandidatePool(tmp_path / "quota", max_total_bytes=250)
+    by_quota.add(session_a, make_clip(tmp_path, "a1"), np.array([1.0]))
+    by_quota.add(session_b, make_clip(tmp_path, "b1"), np.array([1.0]))
+    by_quota.add(session_b, make_clip(tmp_path, "b2"), np.array([1.0]))
+    assert by_quota.size(session_a) == 0
+    assert by_quota.size(session_b) == 2
+    assert by_quota.total_bytes == 200
+
+    by_age = CandidatePool(tmp_path / "age", max_age_sec=60)
+    by_age.add(session_a, make_clip(tmp_path, "old"), np.array([1.0]))
+    by_age.get_candidates(session_a)[0].added_at -= 120
+    assert by_age.take(session_a, np.array([1.0]), min_similarity=0.0, max_results=1) == []
+    assert by_age.size(session_a) == 0
+    assert by_age.total_bytes == 0
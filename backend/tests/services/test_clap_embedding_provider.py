@@ -103,3 +103,44 @@ def test_embeddings_work_with_clustering_and_similarity(tmp_path: Path) -> None:
 
     assert sum(len(cluster) for cluster in clusters) == len(embeddings)
     assert set(indices).issubset({0, 1})
+
+
+def test_spread_windows_embed_long_clip_to_single_vector(tmp_path: Path) -> None:
+    wav_path = tmp_path / "long.wav"
+    t = np.arange(16000 * 30) / 16000
+    samples = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16)
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(samples.tobytes())
+
+    full = ClapEmbeddingProvider().embed_audio(wav_path)
+    spread = ClapEmbeddingProvider(window_strategy="spread", window_sec=5.0, num_windows=3)
+    embedding = spread.embed_audio(wav_path)
+
+    assert embedding.shape == full.shape
+    # a steady tone looks the same from any window
+    cosine = float(embedding @ full / (np.linalg.norm(embedding) * np.linalg.norm(full)))
+    assert cosine > 0.9
+
+
+def test_sliding_windows_batch_all_windows_and_keep_them(tmp_path: Path) -> None:
+    wav_path = tmp_path / "long.wav"
+    t = np.arange(16000 * 25) / 16000
+    samples = (0.3 * np.sin(2 * np.pi * 330 * t) * 32767).astype(np.int16)
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(samples.tobytes())
+
+    provider = ClapEmbeddingProvider(
+        window_strategy="sliding", window_sec=10.0, window_overlap=0.5, window_pooling="attention"
+    )
+    windowed = provider.embed_audio_windows(wav_path)
+
+    assert windowed.windows.shape == (4, clap_module._model_dim)
+    assert windowed.spans_sec[0] == (0.0, 10.0) and windowed.spans_sec[-1] == (15.0, 25.0)
+    assert windowed.embedding.shape == (clap_module._model_dim,)
+    assert np.allclose(provider.embed_audio(wav_path), windowed.embedding, atol=1e-5)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from suno_backend.app.services.clip_streams import (
+    ClipObserver,
+    ClipStreamHub,
+    bind_clip_observer,
+    current_clip_observer,
+    streaming_wav_header,
+)
+
+
+def test_streaming_wav_header_declares_format() -> None:
+    header = streaming_wav_header(48000, 1, 2)
+    assert len(header) == 44
+    assert header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    channels, rate, byte_rate = struct.unpack("<HII", header[22:32])
+    assert (channels, rate, byte_rate) == (1, 48000, 96000)
+    assert header[40:44] == b"\xff\xff\xff\xff"
+
+
+def test_reader_follows_writer_until_finish() -> None:
+    stream = ClipStreamHub().open(0, 16000)
+    received = bytearray()
+
+    def reader() -> None:
+        offset = 0
+        while True:
+            chunk, ended = stream.read(offset, timeout=1.0)
+            received.extend(chunk)
+            offset += len(chunk)
+            if ended:
+                return
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for part in (b"ab", b"cd", b"ef"):
+        stream.write(part)
+        time.sleep(0.01)
+    stream.finish(Path("clip.wav"))
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert bytes(received) == b"abcdef"
+
+
+def test_hub_drops_finished_streams_after_linger(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr("suno_backend.app.services.clip_streams.time.monotonic", lambda: now[0])
+    hub = ClipStreamHub(linger_sec=10.0)
+    done, live = hub.open(0, 16000), hub.open(1, 16000)
+    done.finish()
+    now[0] += 11.0
+    assert hub.get(done.stream_id) is None
+    assert hub.get(live.stream_id) is live
+
+
+def test_hub_cap_evicts_finished_before_live() -> None:
+    hub = ClipStreamHub(max_streams=2)
+    finished, live = hub.open(0, 16000), hub.open(1, 16000)
+    finished.finish()
+    newest = hub.open(2, 16000)
+    assert hub.get(finished.stream_id) is None
+    assert hub.get(live.stream_id) is live and hub.get(newest.stream_id) is newest
+
+
+def test_observer_maps_streams_to_tracks_and_emits_events() -> None:
+    observer = ClipObserver(ClipStreamHub())
+    assert current_clip_observer() is None
+    with bind_clip_observer(observer):
+        assert current_clip_observer() is observer
+        ok = observer.clip_started(0, 16000)
+        bad = observer.clip_started(1, 16000)
+        observer.clip_finished(ok, Path("a.wav"))
+        observer.clip_finished(bad, None)
+    track_id = uuid4()
+    observer.track_finalized(Path("a.wav"), track_id)
+
+    events = [observer.events.get_nowait() for _ in range(4)]
+    assert [name for name, _ in events] == ["clip", "clip", "clip_done", "clip_failed"]
+    assert events[0][1]["stream_url"] == f"/streams/{ok.stream_id}"
+    assert observer.track_streams == {ok.stream_id: str(track_id)}
+    assert bad.failed and bad.done
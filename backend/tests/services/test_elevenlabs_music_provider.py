@@ -71,3 +71,152 @@ def test_generate_batch_raises_on_http_error(tmp_path: Path, monkeypatch: pytest
 
     with pytest.raises(GenerationFailedError):
         provider.generate_batch("prompt", num_clips=1, duration_sec=1.0)
+
+
+def test_generate_batch_runs_clips_concurrently(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import threading
+
+    headers, body = _fake_multipart(b"\x00\x01\x02\x03")
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_post(*args: Any, **kwargs: Any) -> _FakeResponse:
+        barrier.wait()
+        return _FakeResponse(status_code=200, headers=headers, content=body)
+
+    monkeypatch.setattr("suno_backend.app.services.elevenlabs_music_provider.requests.post", fake_post)
+
+    provider = ElevenLabsMusicProvider(media_root=tmp_path, api_key="test", max_concurrency=3)
+
+    clips = provider.generate_batch("prompt", num_clips=3, duration_sec=1.0)
+
+    assert len(clips) == 3
+
+
+def test_generate_batch_returns_finished_clips_at_deadline(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import threading
+    import time
+
+    from suno_backend.app.request_context import bind_deadline
+
+    headers, body = _fake_multipart(b"\x00\x01\x02\x03")
+    calls = []
+    lock = threading.Lock()
+    timeouts = []
+
+    def fake_post(*args: Any, **kwargs: Any) -> _FakeResponse:
+        with lock:
+            calls.append(1)
+            slow = len(calls) > 1
+        timeouts.append(kwargs["timeout"])
+        if slow:
+            time.sleep(0.5)
+        return _FakeResponse(status_code=200, headers=headers, content=body)
+
+    monkeypatch.setattr("suno_backend.app.services.elevenlabs_music_provider.requests.post", fake_post)
+
+    provider = ElevenLabsMusicProvider(media_root=tmp_path, api_key="test", max_concurrency=3)
+
+    start = time.perf_counter()
+    with bind_deadline(0.2):
+        clips = provider.generate_batch("prompt", num_clips=3, duration_sec=1.0)
+
+    assert time.perf_counter() - start < 0.45
+    assert len(clips) == 1
+    assert all(timeout <= 0.2 for timeout in timeouts)
+    # late clips are deleted once they land
+    time.sleep(0.5)
+    assert sorted((tmp_path / "tmp").glob("*.wav")) == [clips[0].audio_path]
+
+
+class _FakeStreamResponse(_FakeResponse):
+    def __init__(self, chunks: list[bytes]) -> None:
+        super().__init__(200, {"content-type": "application/octet-stream"}, b"".join(chunks))
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size: int):
+        yield from self.chunks
+
+    def __enter__(self) -> "_FakeStreamResponse":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+def test_generate_batch_relays_chunks_when_observer_bound(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from suno_backend.app.services.clip_streams import (
+        ClipObserver,
+        ClipStreamHub,
+        bind_clip_observer,
+    )
+
+    seen: dict[str, Any] = {}
+
+    def fake_post(url: str, **kwargs: Any) -> _FakeStreamResponse:
+        seen["url"], seen["stream"] = url, kwargs.get("stream")
+        return _FakeStreamResponse([b"\x00\x01" * 4, b"\x02\x03" * 4])
+
+    monkeypatch.setattr("suno_backend.app.services.elevenlabs_music_provider.requests.post", fake_post)
+    provider = ElevenLabsMusicProvider(media_root=tmp_path, api_key="test", output_format="pcm_44100")
+    observer = ClipObserver(ClipStreamHub())
+
+    with bind_clip_observer(observer):
+        clips = provider.generate_batch("prompt", num_clips=1, duration_sec=1.0)
+
+    assert seen == {"url": "https://api.elevenlabs.io/v1/music/stream", "stream": True}
+    assert len(clips) == 1 and clips[0].audio_path.exists()
+    started = observer.events.get_nowait()
+    assert started[0] == "clip"
+    stream = observer.hub.get(started[1]["stream_id"])
+    assert stream is not None and stream.done and stream.sample_rate == 44100
+    assert stream.read(0, timeout=0)[0] == b"\x00\x01" * 4 + b"\x02\x03" * 4
+    assert observer.events.get_nowait()[0] == "clip_done"
+
+
+def test_streamed_body_holds_the_scheduler_slot(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import requests
+
+    from suno_backend.app.services.clip_streams import (
+        ClipObserver,
+        ClipStreamHub,
+        bind_clip_observer,
+    )
+    from suno_backend.app.services.request_scheduler import RequestScheduler
+
+    scheduler = RequestScheduler(max_concurrency=1, max_retries=2, sleep=lambda _: None)
+    in_use: list[int] = []
+    calls: list[int] = []
+
+    class _Probe(_FakeStreamResponse):
+        def iter_content(self, chunk_size: int):
+            for chunk in self.chunks:
+                in_use.append(scheduler.bucket.in_use)
+                yield chunk
+            if len(calls) > 1:
+                raise requests.ConnectionError("reset mid-body")
+
+    def fake_post(url: str, **kwargs: Any) -> _FakeStreamResponse:
+        calls.append(1)
+        return _Probe([b"\x00\x01" * 4, b"\x02\x03" * 4])
+
+    monkeypatch.setattr("suno_backend.app.services.elevenlabs_music_provider.requests.post", fake_post)
+    provider = ElevenLabsMusicProvider(
+        media_root=tmp_path, api_key="test", output_format="pcm_44100", scheduler=scheduler
+    )
+
+    with bind_clip_observer(ClipObserver(ClipStreamHub())):
+        assert len(provider.generate_batch("prompt", num_clips=1, duration_sec=1.0)) == 1
+        assert in_use == [1, 1]
+        assert scheduler.bucket.in_use == 0
+
+        # a body cut short is not retried: its first chunks already reached listeners
+        with pytest.raises(GenerationFailedError):
+            provider.generate_batch("prompt", num_clips=1, duration_sec=1.0)
+    assert len(calls) == 2
+    assert scheduler.bucket.in_use == 0
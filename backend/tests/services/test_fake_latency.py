@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
+from suno_backend.app.services.fake_latency import FakeLatency
+from suno_backend.app.services.fake_music_provider import FakeMusicProvider
+from suno_backend.app.services.session_service import GenerationFailedError
+
+
+def test_lognormal_samples_are_seeded_and_positive() -> None:
+    first = FakeLatency(mean_sec=0.1, distribution="lognormal", seed=3)
+    second = FakeLatency(mean_sec=0.1, distribution="lognormal", seed=3)
+    samples = [first.sample() for _ in range(50)]
+    assert samples == [second.sample() for _ in range(50)]
+    assert min(samples) > 0
+
+
+def test_unknown_distribution_rejected() -> None:
+    with pytest.raises(ValueError):
+        FakeLatency(distribution="pareto")
+
+
+def test_music_batch_waits_for_slowest_clip_and_drops_failures(tmp_path: Path) -> None:
+    slept: List[float] = []
+    latency = FakeLatency(
+        mean_sec=0.2, distribution="uniform", failure_rate=0.5, seed=1, sleep=slept.append
+    )
+    clips = FakeMusicProvider(tmp_path, latency=latency).generate_batch("p", 8, 0.1)
+    assert len(slept) == 1 and 0 < slept[0] <= 0.4
+    assert 0 < len(clips) < 8
+
+
+def test_music_batch_with_every_clip_failing_raises(tmp_path: Path) -> None:
+    latency = FakeLatency(failure_rate=1.0, sleep=lambda _: None)
+    with pytest.raises(GenerationFailedError):
+        FakeMusicProvider(tmp_path, latency=latency).generate_batch("p", 3, 0.1)
+
+
+def test_namer_failure_raises_for_service_fallback() -> None:
+    namer = FakeClusterNamingProvider(latency=FakeLatency(failure_rate=1.0, sleep=lambda _: None))
+    with pytest.raises(RuntimeError):
+        namer.name_cluster(["a"])
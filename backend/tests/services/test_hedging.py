@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List
+
+import pytest
+
+from suno_backend.app.services.hedging import Hedger, LatencyTracker
+
+
+def _task(delays: List[float], value: str) -> Callable[[], str]:
+    """Each call pops the next delay, so a slot's primary and hedge can differ."""
+    lock = threading.Lock()
+
+    def run() -> str:
+        with lock:
+            delay = delays.pop(0)
+        time.sleep(delay)
+        return value
+
+    return run
+
+
+def test_tail_hedge_beats_straggler_and_discards_loser() -> None:
+    hedger = Hedger(max_hedges_per_batch=1, hedge_when_remaining=1)
+    discarded: List[str] = []
+    tasks = [_task([0.01], "a"), _task([0.01], "b"), _task([1.0, 0.01], "c")]
+
+    start = time.perf_counter()
+    outcomes = hedger.run(tasks, max_workers=3, discard=discarded.append)
+    elapsed = time.perf_counter() - start
+
+    assert outcomes == ["a", "b", "c"]
+    assert elapsed < 0.8
+    stats = hedger.snapshot()
+    assert stats["hedges_fired"] == 1
+    assert stats["hedges_won"] == 1
+    assert stats["requests"] == 4
+
+    # the straggler finishes later; its result is discarded and the saving measured
+    deadline = time.time() + 3
+    while not discarded and time.time() < deadline:
+        time.sleep(0.02)
+    assert discarded == ["c"]
+    assert hedger.snapshot()["latency_saved_sec"] > 0.5
+
+
+def test_hedges_are_capped_per_batch() -> None:
+    hedger = Hedger(max_hedges_per_batch=1, hedge_when_remaining=3)
+    tasks = [_task([0.01], "a")] + [_task([0.2, 0.2], f"slow{i}") for i in range(3)]
+
+    outcomes = hedger.run(tasks, max_workers=4)
+
+    assert outcomes == ["a", "slow0", "slow1", "slow2"]
+    assert hedger.snapshot()["hedges_fired"] == 1
+
+
+def test_p90_trigger_hedges_slow_primary() -> None:
+    tracker = LatencyTracker(min_samples=3)
+    for _ in range(5):
+        tracker.record(0.02)
+    hedger = Hedger(max_hedges_per_batch=1, hedge_when_remaining=0, tracker=tracker)
+
+    outcomes = hedger.run([_task([1.0, 0.01], "x")], max_workers=1)
+
+    assert outcomes == ["x"]
+    assert hedger.snapshot()["hedges_won"] == 1
+
+
+def test_queue_wait_is_not_recorded_as_latency() -> None:
+    class RecordingTracker(LatencyTracker):
+        def __init__(self) -> None:
+            super().__init__(min_samples=100)
+            self.samples: List[float] = []
+
+        def record(self, latency_sec: float) -> None:
+            self.samples.append(latency_sec)
+            super().record(latency_sec)
+
+    tracker = RecordingTracker()
+    hedger = Hedger(max_hedges_per_batch=0, tracker=tracker)
+
+    # four clips on one worker run back to back; each waits for the ones before it
+    outcomes = hedger.run([_task([0.1], str(i)) for i in range(4)], max_workers=1)
+
+    assert outcomes == ["0", "1", "2", "3"]
+    assert len(tracker.samples) == 4
+    assert all(0.09 <= sample < 0.18 for sample in tracker.samples)
+
+
+def test_primaries_never_exceed_max_workers() -> None:
+    hedger = Hedger(max_hedges_per_batch=2, hedge_when_remaining=0)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def task() -> str:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    outcomes = hedger.run([task] * 6, max_workers=2)
+
+    assert outcomes == ["ok"] * 6
+    assert hedger.snapshot()["hedges_fired"] == 0
+    assert peak[0] == 2
+
+
+def test_failures_are_returned_per_slot() -> None:
+    hedger = Hedger(max_hedges_per_batch=0)
+
+    def boom() -> str:
+        raise ValueError("nope")
+
+    outcomes = hedger.run([_task([0.0], "ok"), boom], max_workers=2)
+
+    assert outcomes[0] == "ok"
+    assert isinstance(outcomes[1], ValueError)
+
+
+def test_latency_tracker_needs_min_samples() -> None:
+    tracker = LatencyTracker(min_samples=2)
+    tracker.record(1.0)
+    assert tracker.percentile(90) is None
+    tracker.record(3.0)
+    assert tracker.percentile(90) == pytest.approx(2.8)
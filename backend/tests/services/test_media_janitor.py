@@ -0,0 +1,134 @@
+import os
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from suno_backend.app.metrics import MEDIA_EVICTIONS
+from suno_backend.app.services.media_janitor import MediaJanitor
+
+
+def _session(root: Path, size: int, age_sec: float = 0.0) -> Path:
+    directory = root / str(uuid4())
+    directory.mkdir()
+    (directory / f"{uuid4()}.wav").write_bytes(b"x" * size)
+    stamp = time.time() - age_sec
+    os.utime(directory, (stamp, stamp))
+    return directory
+
+
+@pytest.fixture
+def janitor(tmp_path: Path):
+    janitor = MediaJanitor(tmp_path, min_idle_sec=60.0, interval_sec=3600.0)
+    yield janitor
+    janitor.stop()
+
+
+def test_schedule_delete_hides_now_and_deletes_in_background(
+    janitor: MediaJanitor, tmp_path: Path
+) -> None:
+    session = _session(tmp_path, 10)
+
+    assert janitor.schedule_delete(session)
+    assert not session.exists()
+    assert janitor.drain()
+    assert list(janitor.trash_dir.iterdir()) == []
+    assert not janitor.schedule_delete(session)
+
+
+def test_clear_empties_media_root(janitor: MediaJanitor, tmp_path: Path) -> None:
+    _session(tmp_path, 10)
+    (tmp_path / "tmp").mkdir()
+    (tmp_path / "tmp" / "clip.wav").write_bytes(b"x")
+    before = MEDIA_EVICTIONS.value(reason="clear")
+
+    assert janitor.clear() == 2
+    assert janitor.drain()
+    assert [p.name for p in tmp_path.iterdir()] == [".trash"]
+    assert MEDIA_EVICTIONS.value(reason="clear") == before + 2
+
+
+def test_start_purges_trash_left_by_previous_run(tmp_path: Path) -> None:
+    leftover = tmp_path / ".trash" / "old-session"
+    leftover.mkdir(parents=True)
+    (leftover / "a.wav").write_bytes(b"x")
+    janitor = MediaJanitor(tmp_path, interval_sec=3600.0)
+    try:
+        janitor.start()
+        assert janitor.drain()
+        assert not leftover.exists()
+    finally:
+        janitor.stop()
+
+
+def test_sweep_drops_only_stale_tmp_files(janitor: MediaJanitor, tmp_path: Path) -> None:
+    tmp = tmp_path / "tmp"
+    tmp.mkdir()
+    stale, fresh = tmp / "stale.wav", tmp / "fresh.wav"
+    stale.write_bytes(b"x" * 5)
+    fresh.write_bytes(b"x" * 7)
+    old = time.time() - 2 * janitor.tmp_max_age_sec
+    os.utime(stale, (old, old))
+
+    janitor.sweep()
+
+    assert not stale.exists() and fresh.exists()
+    assert janitor.total_bytes == 7
+
+
+def test_quota_evicts_least_recently_played_idle_sessions(
+    janitor: MediaJanitor, tmp_path: Path
+) -> None:
+    oldest = _session(tmp_path, 400, age_sec=3000)
+    played = _session(tmp_path, 400, age_sec=2000)
+    middle = _session(tmp_path, 400, age_sec=1000)
+    active = _session(tmp_path, 400, age_sec=10)
+    janitor.touch(played.name)
+    janitor.quota_bytes = 1000
+
+    janitor.sweep()
+    janitor.drain()
+
+    # 1600 bytes > 1000: evict oldest, then middle (played counts as recent, active is protected)
+    assert not oldest.exists() and not middle.exists()
+    assert played.exists() and active.exists()
+    assert janitor.total_bytes == 800
+
+
+def test_on_delete_reports_each_session_dir_removed(tmp_path: Path) -> None:
+    deleted: list[str] = []
+    janitor = MediaJanitor(tmp_path, min_idle_sec=60.0, interval_sec=3600.0, on_delete=deleted.append)
+    try:
+        old = _session(tmp_path, 400, age_sec=3000)
+        kept = _session(tmp_path, 400, age_sec=10)
+        (tmp_path / "tmp").mkdir()
+        janitor.quota_bytes = 500
+        janitor.sweep()
+        assert deleted == [old.name]
+
+        janitor.clear()
+        assert deleted == [old.name, kept.name]
+    finally:
+        janitor.stop()
+
+
+def test_quota_leaves_recent_sessions_even_when_over(janitor: MediaJanitor, tmp_path: Path) -> None:
+    sessions = [_session(tmp_path, 600, age_sec=5) for _ in range(2)]
+    janitor.quota_bytes = 500
+
+    janitor.sweep()
+
+    assert all(session.exists() for session in sessions)
+    assert janitor.total_bytes == 1200
+
+
+def test_sizes_follow_new_files(janitor: MediaJanitor, tmp_path: Path) -> None:
+    session = _session(tmp_path, 100)
+    janitor.sweep()
+    assert janitor.total_bytes == 100
+
+    (session / "candidates").mkdir()
+    (session / "candidates" / "c.wav").write_bytes(b"x" * 50)
+    janitor.sweep()
+    assert janitor.total_bytes == 150
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from suno_backend.app.services.media_transcoder import MediaTranscoder, rendition_path
+
+# stands in for ffmpeg: writes a fixed-size "encoded" file to the output path (last argument)
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys
+with open(sys.argv[-1], "wb") as handle:
+    handle.write(b"E" * 100)
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path: Path) -> str:
+    path = tmp_path / "bin" / "ffmpeg"
+    path.parent.mkdir()
+    path.write_text(FAKE_FFMPEG)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def _wav(tmp_path: Path) -> Path:
+    wav = tmp_path / "session" / "track.wav"
+    wav.parent.mkdir(parents=True)
+    wav.write_bytes(b"R" * 1000)
+    return wav
+
+
+def test_encodes_each_rendition_beside_the_wav(tmp_path: Path, fake_ffmpeg: str) -> None:
+    transcoder = MediaTranscoder(formats=["mp3", "opus"], ffmpeg_path=fake_ffmpeg)
+    wav = _wav(tmp_path)
+    written = transcoder.submit(wav).result(timeout=10)
+    transcoder.shutdown(wait=True)
+
+    assert written == [rendition_path(wav, "mp3"), rendition_path(wav, "opus")]
+    assert all(path.read_bytes() == b"E" * 100 for path in written)
+    assert wav.exists()
+    assert sorted(p.name for p in wav.parent.iterdir()) == ["track.mp3", "track.opus", "track.wav"]
+    assert transcoder.pending() == 0
+
+
+def test_skips_wav_deleted_before_its_turn(tmp_path: Path, fake_ffmpeg: str) -> None:
+    transcoder = MediaTranscoder(formats=["opus"], ffmpeg_path=fake_ffmpeg)
+    wav = _wav(tmp_path)
+    wav.unlink()
+    assert transcoder.submit(wav).result(timeout=10) == []
+    transcoder.shutdown(wait=True)
+    assert list(wav.parent.iterdir()) == []
+
+
+def test_failed_encode_leaves_no_partial_file(tmp_path: Path) -> None:
+    failing = tmp_path / "ffmpeg-fail"
+    failing.write_text(f"#!{sys.executable}\nimport sys\nopen(sys.argv[-1], 'wb').write(b'x')\nsys.exit(1)\n")
+    failing.chmod(failing.stat().st_mode | stat.S_IXUSR)
+    transcoder = MediaTranscoder(formats=["opus"], ffmpeg_path=str(failing))
+    wav = _wav(tmp_path)
+    assert transcoder.submit(wav).result(timeout=10) == []
+    transcoder.shutdown(wait=True)
+    assert [p.name for p in wav.parent.iterdir()] == ["track.wav"]
+
+
+def test_disabled_without_ffmpeg(tmp_path: Path) -> None:
+    transcoder = MediaTranscoder(formats=["opus"], ffmpeg_path=str(tmp_path / "missing-ffmpeg"))
+    assert not transcoder.enabled
+    assert transcoder.submit(_wav(tmp_path)) is None
+
+
+def test_rejects_unknown_rendition() -> None:
+    with pytest.raises(ValueError):
+        MediaTranscoder(formats=["flac"])
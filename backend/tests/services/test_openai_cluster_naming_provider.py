@@ -80,3 +80,18 @@ def test_rejects_empty_after_cleanup(monkeypatch: pytest.MonkeyPatch) -> None:
 
     with pytest.raises(ValueError):
         provider.name_cluster(["anything"])
+
+
+def test_api_url_is_configurable(monkeypatch: pytest.MonkeyPatch) -> None:
+    recorded = {}
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        recorded["url"] = url
+        return make_response("Neon Mirage")
+
+    monkeypatch.setattr(httpx, "post", fake_post)
+    provider = OpenAiClusterNamingProvider(api_key="token", api_url="http://127.0.0.1:9999/")
+
+    provider.name_cluster(["dark synthwave chase"])
+
+    assert recorded["url"] == "http://127.0.0.1:9999/v1/chat/completions"
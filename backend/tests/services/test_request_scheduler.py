@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pytest
+import requests
+
+from suno_backend.app.request_context import bind_deadline, bind_session
+from suno_backend.app.services.elevenlabs_music_provider import ElevenLabsMusicProvider
+from suno_backend.app.services.request_scheduler import (
+    CircuitBreaker,
+    CircuitOpenError,
+    FairTokenBucket,
+    RequestScheduler,
+)
+from suno_backend.app.services.session_service import GenerationFailedError
+
+BOUNDARY = "stubboundary"
+
+
+class _StubElevenLabs(ThreadingHTTPServer):
+    """Local stand-in for the music endpoint: replays scripted (status, headers) then 200s."""
+
+    def __init__(self, script: List[Tuple[int, dict]]) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.script = list(script)
+        self.requests_seen = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: _StubElevenLabs
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        with self.server.lock:
+            self.server.requests_seen += 1
+            status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        if status == 200:
+            body = (
+                f"--{BOUNDARY}\r\nContent-Type: audio/wav\r\n\r\n".encode()
+                + b"\x00\x10" * 32
+                + f"\r\n--{BOUNDARY}--\r\n".encode()
+            )
+            headers = {"Content-Type": f"multipart/mixed; boundary={BOUNDARY}"}
+        else:
+            body = b'{"detail": "stub error"}'
+            headers = {"Content-Type": "application/json", **headers}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server(request) -> Iterator[_StubElevenLabs]:
+    server = _StubElevenLabs(getattr(request, "param", []))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class _Resp:
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_fair_bucket_round_robins_between_keys() -> None:
+    bucket = FairTokenBucket(1)
+    bucket.acquire("holder")
+    served: List[str] = []
+
+    def worker(key: str) -> None:
+        bucket.acquire(key)
+        served.append(key)
+        bucket.release()
+
+    # session "a" queues three calls before "b" queues one; "b" must not wait behind all of "a"
+    threads = []
+    for key in ["a", "a", "a", "b"]:
+        thread = threading.Thread(target=worker, args=(key,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    bucket.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert served == ["a", "b", "a", "a"]
+
+
+def test_scheduler_honors_retry_after_then_succeeds() -> None:
+    sleeps: List[float] = []
+    scheduler = RequestScheduler(max_retries=3, sleep=sleeps.append)
+    responses = iter([_Resp(429, {"retry-after": "2"}), _Resp(503), _Resp(200)])
+
+    resp = scheduler.submit("s", lambda: next(responses))
+
+    assert resp.status_code == 200
+    assert sleeps[0] == 2.0
+    assert 0.0 <= sleeps[1] <= scheduler.base_backoff_sec * 2
+    assert scheduler.retries == 2
+    assert scheduler.throttled == 1
+
+
+def test_scheduler_returns_last_response_when_retries_exhausted() -> None:
+    scheduler = RequestScheduler(max_retries=2, sleep=lambda _: None)
+    calls = []
+
+    def call() -> _Resp:
+        calls.append(1)
+        return _Resp(500)
+
+    assert scheduler.submit("s", call).status_code == 500
+    assert len(calls) == 3
+
+
+def test_scheduler_does_not_retry_client_errors() -> None:
+    scheduler = RequestScheduler(max_retries=3, sleep=lambda _: None)
+    calls = []
+
+    def call() -> _Resp:
+        calls.append(1)
+        return _Resp(400)
+
+    assert scheduler.submit("s", call).status_code == 400
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_recovers_after_reset() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_sec=10, clock=lambda: now[0])
+    scheduler = RequestScheduler(max_retries=0, breaker=breaker, sleep=lambda _: None)
+
+    scheduler.submit("s", lambda: _Resp(503))
+    scheduler.submit("s", lambda: _Resp(503))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        scheduler.submit("s", lambda: _Resp(200))
+
+    now[0] = 11.0
+    assert breaker.state == "half_open"
+    assert scheduler.submit("s", lambda: _Resp(200)).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_throttling_neither_resets_nor_trips_the_circuit() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_sec=10, clock=lambda: now[0])
+    scheduler = RequestScheduler(max_retries=0, breaker=breaker, sleep=lambda _: None)
+
+    scheduler.submit("s", lambda: _Resp(503))
+    scheduler.submit("s", lambda: _Resp(429))
+    scheduler.submit("s", lambda: _Resp(503))
+    assert breaker.state == "open"
+
+    now[0] = 11.0
+    assert scheduler.submit("s", lambda: _Resp(429)).status_code == 429
+    # the trial slot is free again, but the breaker has not closed
+    assert breaker.state == "half_open"
+    assert scheduler.submit("s", lambda: _Resp(200)).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_retry_after_beyond_the_backoff_cap_is_not_shortened() -> None:
+    sleeps: List[float] = []
+    scheduler = RequestScheduler(max_retries=3, max_backoff_sec=20.0, sleep=sleeps.append)
+    calls = []
+
+    def call() -> _Resp:
+        calls.append(1)
+        return _Resp(429, {"retry-after": "60"})
+
+    resp = scheduler.submit("s", call)
+
+    assert resp.status_code == 429 and not resp.closed
+    assert sleeps == [] and len(calls) == 1
+
+
+def test_retried_responses_are_closed() -> None:
+    responses = [_Resp(503), _Resp(429, {"retry-after": "1"}), _Resp(200)]
+    scheduler = RequestScheduler(max_retries=3, sleep=lambda _: None)
+
+    assert scheduler.submit("s", iter(responses).__next__) is responses[2]
+    assert [r.closed for r in responses] == [True, True, False]
+
+
+def test_scheduler_skips_backoff_that_would_overrun_deadline() -> None:
+    sleeps: List[float] = []
+    scheduler = RequestScheduler(max_retries=3, sleep=sleeps.append)
+
+    with bind_deadline(1.0):
+        resp = scheduler.submit("s", lambda: _Resp(429, {"retry-after": "5"}))
+
+    assert resp.status_code == 429
+    assert sleeps == []
+
+
+def test_transport_errors_are_retried() -> None:
+    scheduler = RequestScheduler(max_retries=1, sleep=lambda _: None)
+    attempts = []
+
+    def call() -> _Resp:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise requests.ConnectionError("reset")
+        return _Resp(200)
+
+    assert scheduler.submit("s", call).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "stub_server", [[(429, {"Retry-After": "0"}), (503, {}), (502, {})]], indirect=True
+)
+def test_provider_retries_against_stub_server(tmp_path: Path, stub_server: _StubElevenLabs) -> None:
+    scheduler = RequestScheduler(max_concurrency=2, max_retries=3, base_backoff_sec=0.01)
+    provider = ElevenLabsMusicProvider(
+        media_root=tmp_path,
+        api_key="test",
+        output_format="pcm_44100",
+        max_concurrency=1,
+        api_url=stub_server.url,
+        scheduler=scheduler,
+    )
+
+    with bind_session("session-1"):
+        clips = provider.generate_batch("prompt", num_clips=1, duration_sec=1.0)
+
+    assert len(clips) == 1
+    assert clips[0].audio_path.exists()
+    assert stub_server.requests_seen == 4
+    assert scheduler.throttled == 1
+
+
+@pytest.mark.parametrize("stub_server", [[(500, {})] * 10], indirect=True)
+def test_provider_fails_fast_once_circuit_opens(tmp_path: Path, stub_server: _StubElevenLabs) -> None:
+    scheduler = RequestScheduler(
+        max_retries=1,
+        base_backoff_sec=0.0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout_sec=60),
+    )
+    provider = ElevenLabsMusicProvider(
+        media_root=tmp_path,
+        api_key="test",
+        output_format="pcm_44100",
+        max_concurrency=1,
+        api_url=stub_server.url,
+        scheduler=scheduler,
+    )
+
+    with pytest.raises(GenerationFailedError):
+        provider.generate_batch("prompt", num_clips=3, duration_sec=1.0)
+
+    # two failures open the circuit; the remaining clips never reach the server
+    assert stub_server.requests_seen == 2
+    assert scheduler.breaker.state == "open"
@@ -1,3 +1,5 @@
+import threading
+import time
 from pathlib import Path
 from uuid import UUID, uuid4
 
@@ -5,10 +7,16 @@ import numpy as np
 import pytest
 
 from suno_backend.app.models.domain import Batch, BriefParams, Session
+from suno_backend.app.request_context import bind_deadline
+from suno_backend.app.services.candidate_pool import CandidatePool
 from suno_backend.app.services.fake_cluster_naming_provider import FakeClusterNamingProvider
 from suno_backend.app.services.fake_embedding_provider import FakeEmbeddingProvider
 from suno_backend.app.services.fake_music_provider import FakeMusicProvider
-from suno_backend.app.services.providers import ClusterNamingProvider, MusicProvider
+from suno_backend.app.services.providers import (
+    ClusterNamingProvider,
+    MusicProvider,
+    WindowedEmbedding,
+)
 from suno_backend.app.services.session_service import (
     GenerationFailedError,
     InvalidRequestError,
@@ -28,11 +36,82 @@ class EmptyMusicProvider(MusicProvider):
         return []
 
 
+class CountingMusicProvider(FakeMusicProvider):
+    def __init__(self, media_root: Path) -> None:
+        super().__init__(media_root)
+        self.requests: list[int] = []
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float):
+        self.requests.append(num_clips)
+        return super().generate_batch(prompt, num_clips, duration_sec)
+
+
+class GatedMusicProvider(FakeMusicProvider):
+    """Blocks the next generate_batch after arm() until release is set."""
+
+    def __init__(self, media_root: Path) -> None:
+        super().__init__(media_root)
+        self.armed = False
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def arm(self) -> None:
+        self.armed = True
+
+    def generate_batch(self, prompt: str, num_clips: int, duration_sec: float):
+        if self.armed:
+            self.armed = False
+            self.started.set()
+            assert self.release.wait(5)
+        return super().generate_batch(prompt, num_clips, duration_sec)
+
+
 class FailingNamer(ClusterNamingProvider):
     def name_cluster(self, prompts):
         raise RuntimeError("naming failed")
 
 
+class RecordingNamer(FakeClusterNamingProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def name_cluster(self, prompts):
+        self.calls += 1
+        return super().name_cluster(prompts)
+
+
+class SlowFirstEmbedder(FakeEmbeddingProvider):
+    def __init__(self, delay_sec: float) -> None:
+        super().__init__()
+        self.delay_sec = delay_sec
+        self.calls = 0
+
+    def embed_audio(self, audio_path: Path):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(self.delay_sec)
+        return super().embed_audio(audio_path)
+
+
+class WindowedEmbedder(FakeEmbeddingProvider):
+    def embed_audio_windows(self, audio_path: Path) -> WindowedEmbedding:
+        base = self.embed_audio(audio_path)
+        windows = np.stack([base, base * 0.5, -base])
+        return WindowedEmbedding(windows.mean(axis=0), windows, [(0.0, 4.0), (2.0, 6.0), (4.0, 8.0)])
+
+
+class PromptAlignedEmbedder(FakeEmbeddingProvider):
+    """Clips 0 and 1 match the prompt's text embedding; later clips are orthogonal to it."""
+
+    def embed_audio(self, audio_path: Path) -> np.ndarray:
+        index = int(audio_path.name.split("_")[1])
+        return np.array([1.0, 0.1 * index] if index < 2 else [0.0, 1.0], dtype=np.float32)
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return np.array([1.0, 0.0], dtype=np.float32)
+
+
 def make_service(
     tmp_path: Path,
     music_provider: MusicProvider | None = None,
@@ -40,10 +119,18 @@ def make_service(
     max_batch_size: int = 4,
     default_max_k: int = 3,
     min_similarity: float = 0.3,
+    k_selection: str = "fixed",
+    more_like_assignment: str = "new_cluster",
+    oversample: bool = False,
+    candidate_pool: CandidatePool | None = None,
+    embedder: FakeEmbeddingProvider | None = None,
+    prompt_filter: str = "off",
+    prompt_min_keep: int = 1,
+    store: SessionStore | None = None,
 ) -> SessionService:
-    store = SessionStore()
+    store = store or SessionStore()
     music = music_provider or FakeMusicProvider(tmp_path)
-    embedder = FakeEmbeddingProvider()
+    embedder = embedder or FakeEmbeddingProvider()
     naming = namer or FakeClusterNamingProvider()
     return SessionService(
         store=store,
@@ -54,6 +141,13 @@ def make_service(
         max_batch_size=max_batch_size,
         default_max_k=default_max_k,
         min_similarity=min_similarity,
+        k_selection=k_selection,
+        more_like_assignment=more_like_assignment,
+        oversample=oversample,
+        candidate_pool=candidate_pool,
+        prompt_filter=prompt_filter,
+        prompt_min_similarity=0.5,
+        prompt_min_keep=prompt_min_keep,
     )
 
 
@@ -108,6 +202,79 @@ def test_create_initial_batch_naming_fallback(tmp_path: Path) -> None:
     assert batch.clusters[0].label == "cluster-1"
 
 
+def test_create_initial_batch_degrades_when_deadline_passes(tmp_path: Path) -> None:
+    namer = RecordingNamer()
+    service = make_service(tmp_path, namer=namer, embedder=SlowFirstEmbedder(0.1))
+
+    with bind_deadline(0.05):
+        session = service.create_initial_batch(BRIEF, PARAMS, num_clips=3)
+
+    batch = session.batches[0]
+    assert batch.num_generated == 1
+    assert [cluster.label for cluster in batch.clusters] == ["cluster-1"]
+    assert namer.calls == 0
+    # clips that missed the deadline are not left behind in tmp
+    assert list((tmp_path / "tmp").glob("*.wav")) == []
+
+
+def test_create_initial_batch_with_silhouette_k_selection(tmp_path: Path) -> None:
+    service = make_service(tmp_path, k_selection="silhouette")
+
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=4)
+
+    batch = session.batches[0]
+    assert 1 <= len(batch.clusters) <= 3
+    assert sum(len(cluster.track_ids) for cluster in batch.clusters) == 4
+
+
+def test_track_embeddings_keep_windows(tmp_path: Path) -> None:
+    plain = make_service(tmp_path)
+    session = plain.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    track_id = session.batches[0].clusters[0].track_ids[0]
+    stored = plain.store.get_track_embedding(session.id, track_id)
+    assert stored is not None
+    assert stored.windows.shape == (1, stored.embedding.shape[0])
+    assert stored.spans_sec == [(0.0, PARAMS.duration_sec)]
+
+    windowed = make_service(tmp_path, embedder=WindowedEmbedder())
+    session = windowed.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    track_id = session.batches[0].clusters[0].track_ids[0]
+    stored = windowed.store.get_track_embedding(session.id, track_id)
+    assert stored is not None and stored.windows.shape[0] == 3
+    assert stored.spans_sec[-1] == (4.0, 8.0)
+
+
+def test_prompt_filter_drops_off_brief_clips_before_clustering(tmp_path: Path) -> None:
+    service = make_service(tmp_path, embedder=PromptAlignedEmbedder(), prompt_filter="drop")
+
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=4)
+
+    batch = session.batches[0]
+    assert batch.num_generated == 2
+    assert sum(len(cluster.track_ids) for cluster in batch.clusters) == 2
+    assert list((tmp_path / "tmp").glob("*.wav")) == []
+
+
+def test_prompt_filter_keeps_min_keep_best_clips(tmp_path: Path) -> None:
+    class OffBrief(PromptAlignedEmbedder):
+        def embed_text(self, text: str) -> np.ndarray:
+            return np.array([-1.0, 0.0], dtype=np.float32)
+
+    service = make_service(tmp_path, embedder=OffBrief(), prompt_filter="drop", prompt_min_keep=3)
+
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=4)
+
+    assert session.batches[0].num_generated == 3
+
+
+def test_prompt_filter_rank_keeps_every_clip(tmp_path: Path) -> None:
+    service = make_service(tmp_path, embedder=PromptAlignedEmbedder(), prompt_filter="rank")
+
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=4)
+
+    assert session.batches[0].num_generated == 4
+
+
 def test_more_like_cluster_success(tmp_path: Path) -> None:
     service = make_service(tmp_path)
     session = service.create_initial_batch(BRIEF, PARAMS, num_clips=3)
@@ -136,6 +303,93 @@ def test_more_like_cluster_success(tmp_path: Path) -> None:
     assert isinstance(centroid, np.ndarray)
 
 
+def test_more_like_cluster_incremental_updates_session_centroids(tmp_path: Path) -> None:
+    service = make_service(tmp_path, more_like_assignment="incremental", min_similarity=0.0)
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=4)
+    cluster_ids, _ = service.store.get_centroid_matrix(session.id)
+    counts_before = {cid: service.store.get_centroid_count(session.id, cid) for cid in cluster_ids}
+    parent_cluster = session.batches[0].clusters[0]
+
+    new_batch = service.more_like_cluster(
+        session_id=session.id, cluster_id=parent_cluster.id, num_clips=3
+    )
+
+    new_track_ids = [tid for cluster in new_batch.clusters for tid in cluster.track_ids]
+    assert len(new_track_ids) == 3
+    # no new centroid: each track is folded into exactly one existing running mean
+    cluster_ids_after, _ = service.store.get_centroid_matrix(session.id)
+    assert cluster_ids_after == cluster_ids
+    counts_after = {cid: service.store.get_centroid_count(session.id, cid) for cid in cluster_ids}
+    assert sum(counts_after.values()) == sum(counts_before.values()) + 3
+    for cluster in new_batch.clusters:
+        assert cluster.id in cluster_ids
+        grown = counts_after[cluster.id] - counts_before[cluster.id]
+        assert grown == len(cluster.track_ids)
+        assert set(cluster.track_ids) <= set(
+            service.store.get_cluster_members(session.id, cluster.id)
+        )
+
+
+def test_more_like_cluster_oversamples_and_pools_surplus(tmp_path: Path) -> None:
+    music = CountingMusicProvider(tmp_path)
+    pool = CandidatePool(tmp_path)
+    service = make_service(
+        tmp_path, music_provider=music, min_similarity=0.0, oversample=True, candidate_pool=pool
+    )
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    parent_cluster = session.batches[0].clusters[0]
+
+    new_batch = service.more_like_cluster(
+        session_id=session.id, cluster_id=parent_cluster.id, num_clips=2
+    )
+
+    # no history yet -> rate 0.5 -> one wave of 4; everything passes so no second wave
+    assert music.requests[1:] == [4]
+    assert new_batch.num_generated == 2
+    assert service.store.get_acceptance_rate(session.id) == pytest.approx(5 / 6)
+    pooled = pool.get_candidates(session.id)
+    assert len(pooled) == 2
+    for candidate in pooled:
+        assert candidate.clip.audio_path.exists()
+        assert candidate.clip.audio_path.parent == tmp_path / str(session.id) / "candidates"
+
+
+def test_more_like_cluster_serves_from_pool_without_generating(tmp_path: Path) -> None:
+    music = CountingMusicProvider(tmp_path)
+    pool = CandidatePool(tmp_path)
+    service = make_service(tmp_path, music_provider=music, min_similarity=0.0, candidate_pool=pool)
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    parent_cluster = session.batches[0].clusters[0]
+    for clip in FakeMusicProvider(tmp_path).generate_batch("extra", 2, PARAMS.duration_sec):
+        pool.add(session.id, clip, np.ones(8, dtype=np.float32))
+    calls_before = len(music.requests)
+
+    new_batch = service.more_like_cluster(
+        session_id=session.id, cluster_id=parent_cluster.id, num_clips=2
+    )
+
+    assert len(music.requests) == calls_before
+    assert new_batch.num_generated == 2
+    for track_id in new_batch.clusters[0].track_ids:
+        assert (tmp_path / str(session.id) / f"{track_id}.wav").exists()
+
+
+def test_more_like_cluster_oversampling_respects_budget(tmp_path: Path) -> None:
+    music = CountingMusicProvider(tmp_path)
+    service = make_service(tmp_path, music_provider=music, min_similarity=1.1, oversample=True)
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    parent_cluster = session.batches[0].clusters[0]
+
+    new_batch = service.more_like_cluster(
+        session_id=session.id, cluster_id=parent_cluster.id, num_clips=2
+    )
+
+    assert sum(music.requests[1:]) == 6
+    # nothing passes the threshold -> top-N fallback, rejected files are deleted
+    assert new_batch.num_generated == 2
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
 def test_more_like_cluster_missing_session_or_cluster(tmp_path: Path) -> None:
     service = make_service(tmp_path)
     session = service.create_initial_batch(BRIEF, PARAMS, num_clips=1)
@@ -146,3 +400,70 @@ def test_more_like_cluster_missing_session_or_cluster(tmp_path: Path) -> None:
 
     with pytest.raises(NotFoundError):
         service.more_like_cluster(session.id, missing_cluster_id, num_clips=1)
+
+
+@pytest.mark.parametrize("request_kind", ["create", "more_like"])
+def test_in_flight_session_survives_concurrent_creates_past_the_cap(
+    tmp_path: Path, request_kind: str
+) -> None:
+    music = GatedMusicProvider(tmp_path)
+    store = SessionStore(max_sessions=1)
+    service = make_service(tmp_path, music_provider=music, min_similarity=0.0, store=store)
+    outcome: dict = {}
+    if request_kind == "more_like":
+        session = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+        cluster_id = session.batches[0].clusters[0].id
+        work = lambda: service.more_like_cluster(session.id, cluster_id, num_clips=2)  # noqa: E731
+    else:
+        work = lambda: service.create_initial_batch(BRIEF, PARAMS, num_clips=2)  # noqa: E731
+
+    def run() -> None:
+        try:
+            outcome["result"] = work()
+        except Exception as exc:  # surfaced by the assertions below
+            outcome["error"] = exc
+
+    music.arm()
+    worker = threading.Thread(target=run)
+    worker.start()
+    assert music.started.wait(5)
+    # the in-flight session is the least recently used one, but it is pinned
+    other = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    music.release.set()
+    worker.join(5)
+
+    assert "error" not in outcome
+    result = outcome["result"]
+    in_flight_id = result.id if request_kind == "create" else result.session_id
+    in_flight = store.get_session(in_flight_id)
+    assert in_flight is not None and in_flight.batches[-1].num_generated == 2
+    # its final write touched it, so the idle session created meanwhile went instead
+    assert store.get_session(other.id) is None
+
+    # unpinned again: the next create evicts it as usual
+    service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    assert store.get_session(in_flight_id) is None
+
+
+def test_more_like_on_a_session_evicted_mid_request_is_not_found(tmp_path: Path) -> None:
+    music = GatedMusicProvider(tmp_path)
+    service = make_service(tmp_path, music_provider=music, min_similarity=0.0)
+    session = service.create_initial_batch(BRIEF, PARAMS, num_clips=2)
+    cluster_id = session.batches[0].clusters[0].id
+    outcome: dict = {}
+
+    def run() -> None:
+        try:
+            service.more_like_cluster(session.id, cluster_id, num_clips=2)
+        except Exception as exc:
+            outcome["error"] = exc
+
+    music.arm()
+    worker = threading.Thread(target=run)
+    worker.start()
+    assert music.started.wait(5)
+    assert service.store.evict(session.id)  # explicit evictions still apply to pinned sessions
+    music.release.set()
+    worker.join(5)
+
+    assert isinstance(outcome.get("error"), NotFoundError)
@@ -4,7 +4,8 @@ import numpy as np
 import pytest
 
 from suno_backend.app.models.domain import Batch, BriefParams, ClusterSummary, Session
-from suno_backend.app.services.session_store import SessionStore
+from suno_backend.app.services.providers import WindowedEmbedding
+from suno_backend.app.services.session_store import SessionEvictedError, SessionStore
 
 
 def make_brief_params() -> BriefParams:
@@ -163,3 +164,175 @@ def test_get_cluster_and_get_centroid_return_none_for_missing():
     assert store.get_cluster(session.id, uuid4()) is None
     assert store.get_centroid(uuid4(), cluster_id) is None
     assert store.get_centroid(session.id, uuid4()) is None
+
+
+def test_update_centroids_uses_running_mean_and_keeps_matrix_in_sync():
+    store = SessionStore()
+    session = store.create_session("brief", make_brief_params())
+    batch_id = uuid4()
+    cluster_id_1 = uuid4()
+    cluster_id_2 = uuid4()
+    cluster1 = ClusterSummary(id=cluster_id_1, batch_id=batch_id, label="c1", track_ids=[uuid4(), uuid4()])
+    cluster2 = ClusterSummary(id=cluster_id_2, batch_id=batch_id, label="c2", track_ids=[uuid4()])
+    batch = Batch(
+        id=batch_id,
+        session_id=session.id,
+        prompt_text="prompt",
+        num_requested=3,
+        num_generated=3,
+        clusters=[cluster1, cluster2],
+    )
+    store.add_batch(
+        session.id,
+        batch,
+        {cluster_id_1: np.array([1.0, 0.0]), cluster_id_2: np.array([0.0, 1.0])},
+    )
+
+    store.update_centroids(session.id, {cluster_id_1: (np.array([0.0, 3.0]), 1)})
+
+    assert store.get_centroid_count(session.id, cluster_id_1) == 3
+    assert np.allclose(store.get_centroid(session.id, cluster_id_1), [2.0 / 3.0, 1.0])
+    ids, matrix = store.get_centroid_matrix(session.id)
+    assert ids == [cluster_id_1, cluster_id_2]
+    assert np.allclose(matrix, [[2.0 / 3.0, 1.0], [0.0, 1.0]])
+    assert sorted(store.get_cluster_members(session.id, cluster_id_1)) == sorted(cluster1.track_ids)
+
+    with pytest.raises(ValueError, match="cluster"):
+        store.update_centroids(session.id, {uuid4(): (np.array([1.0, 1.0]), 1)})
+
+
+def test_centroid_matrix_grows_across_batches_and_is_returned_as_a_copy():
+    store = SessionStore()
+    session = store.create_session("brief", make_brief_params())
+    cluster_ids = [add_clustered_batch(store, session) for _ in range(9)]
+    store.update_centroids(session.id, {cluster_ids[-1]: (np.full(4, 3.0), 1)})
+
+    ids, matrix = store.get_centroid_matrix(session.id)
+
+    assert ids == cluster_ids
+    assert matrix.shape == (9, 4)
+    assert np.allclose(matrix[:-1], 1.0)
+    assert np.allclose(matrix[-1], 2.0)
+    matrix[:] = 0.0
+    _, again = store.get_centroid_matrix(session.id)
+    assert np.allclose(again[:-1], 1.0)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def add_clustered_batch(store: SessionStore, session: Session, dim: int = 4) -> UUID:
+    batch_id, cluster_id, track_id = uuid4(), uuid4(), uuid4()
+    cluster = ClusterSummary(id=cluster_id, batch_id=batch_id, label="c", track_ids=[track_id])
+    batch = Batch(
+        id=batch_id,
+        session_id=session.id,
+        prompt_text="prompt",
+        num_requested=1,
+        num_generated=1,
+        clusters=[cluster],
+    )
+    store.add_batch(session.id, batch, {cluster_id: np.ones(dim)})
+    embedding = np.ones(dim, dtype=np.float32)
+    windows = np.ones((8, dim), dtype=np.float32)
+    store.add_track_embeddings(
+        session.id, {track_id: WindowedEmbedding(embedding, windows, [(0.0, 1.0)] * 8)}
+    )
+    store.record_acceptance(session.id, 2, 1)
+    return cluster_id
+
+
+def test_max_sessions_evicts_least_recently_used_and_all_its_state():
+    evicted = []
+    store = SessionStore(max_sessions=2, on_evict=evicted.append)
+    first = store.create_session("a", make_brief_params())
+    second = store.create_session("b", make_brief_params())
+    second_cluster = add_clustered_batch(store, second)
+    store.get_session(first.id)  # first is now the most recent
+
+    third = store.create_session("c", make_brief_params())
+
+    assert evicted == [second.id]
+    assert store.session_count() == 2
+    assert store.get_session(second.id) is None
+    assert store.get_centroid(second.id, second_cluster) is None
+    assert store.get_centroid_matrix(second.id) == ([], None)
+    assert store.get_acceptance_rate(second.id) == 0.5
+    assert store.get_session(first.id) is first and store.get_session(third.id) is third
+
+
+def test_max_bytes_evicts_until_under_the_cap_and_accounting_returns_to_zero():
+    store = SessionStore(max_bytes=40_000)
+    sessions = []
+    for _ in range(3):
+        sessions.append(store.create_session("s", make_brief_params()))
+        add_clustered_batch(store, sessions[-1], dim=512)  # ~20 KB of windows each
+
+    assert store.resident_bytes <= 40_000
+    assert store.get_session(sessions[0].id) is None
+    assert store.get_session(sessions[2].id) is sessions[2]
+    resident = [s for s in sessions if store.get_session(s.id) is not None]
+    assert store.resident_bytes == sum(store.session_bytes(s.id) for s in resident)
+
+    for session in resident:
+        assert store.evict(session.id)
+    assert store.resident_bytes == 0 and store.session_count() == 0
+    assert not store.evict(sessions[0].id)
+
+
+def test_ttl_expires_idle_sessions():
+    clock = FakeClock()
+    evicted = []
+    store = SessionStore(ttl_sec=60.0, on_evict=evicted.append, clock=clock)
+    idle = store.create_session("idle", make_brief_params())
+    busy = store.create_session("busy", make_brief_params())
+
+    clock.now = 50.0
+    store.get_session(busy.id)
+    clock.now = 100.0
+
+    assert store.get_session(idle.id) is None
+    assert store.get_session(busy.id) is busy
+    clock.now = 200.0
+    assert store.evict_expired() == 1
+    assert evicted == [idle.id, busy.id]
+
+
+def test_writes_for_an_evicted_session_do_not_resurrect_it():
+    store = SessionStore()
+    session = store.create_session("s", make_brief_params())
+    store.evict(session.id)
+
+    # every writer reports the eviction the same way instead of resurrecting state
+    with pytest.raises(SessionEvictedError):
+        store.record_acceptance(session.id, 3, 3)
+    with pytest.raises(SessionEvictedError):
+        store.update_centroids(session.id, {uuid4(): (np.ones(4), 1)})
+
+    assert store.get_acceptance_rate(session.id) == 0.5
+    assert store.get_centroid_matrix(session.id) == ([], None)
+    with pytest.raises(ValueError, match="session not found"):
+        store.assign_tracks(session.id, {uuid4(): uuid4()})
+
+
+def test_pinned_sessions_are_skipped_by_lru_and_ttl() -> None:
+    clock = FakeClock()
+    store = SessionStore(max_sessions=1, ttl_sec=10.0, clock=clock)
+    pinned = store.create_session("pinned", make_brief_params(), pin=True)
+    other = store.create_session("other", make_brief_params())
+    clock.now = 100.0
+
+    assert store.evict_expired() == 1
+    assert store.get_session(pinned.id) is pinned and store.get_session(other.id) is None
+
+    store.unpin(pinned.id)
+    assert store.pin(pinned.id) is pinned
+    store.unpin(pinned.id)
+    store.create_session("third", make_brief_params())
+    assert store.get_session(pinned.id) is None
+    assert store.pin(pinned.id) is None
@@ -0,0 +1,74 @@
+"""Sustained session churn against a capped SessionStore: resident memory must level off."""
+
+import gc
+import os
+import resource
+from pathlib import Path
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from suno_backend.app.models.domain import Batch, BriefParams, ClusterSummary
+from suno_backend.app.services.providers import WindowedEmbedding
+from suno_backend.app.services.session_store import SessionStore
+
+STATM = Path("/proc/self/statm")
+DIM = 512
+TRACKS = 6
+WINDOWS = 16
+
+
+def _rss_bytes() -> int:
+    return int(STATM.read_text().split()[1]) * resource.getpagesize()
+
+
+def _one_session(store: SessionStore, rng: np.random.Generator) -> None:
+    """A session shaped like a CLAP-windowed initial batch: ~200 KB of embeddings."""
+    params = BriefParams(energy=0.5, density=0.5, duration_sec=30)
+    session = store.create_session("soak brief", params)
+    batch_id, cluster_id = uuid4(), uuid4()
+    track_ids = [uuid4() for _ in range(TRACKS)]
+    batch = Batch(
+        id=batch_id,
+        session_id=session.id,
+        prompt_text="soak prompt",
+        num_requested=TRACKS,
+        num_generated=TRACKS,
+        clusters=[ClusterSummary(id=cluster_id, batch_id=batch_id, label="c", track_ids=track_ids)],
+    )
+    store.add_batch(session.id, batch, {cluster_id: rng.standard_normal(DIM)})
+    store.add_track_embeddings(
+        session.id,
+        {
+            track_id: WindowedEmbedding(
+                rng.standard_normal(DIM).astype(np.float32),
+                rng.standard_normal((WINDOWS, DIM)).astype(np.float32),
+                [(float(i), float(i + 10)) for i in range(WINDOWS)],
+            )
+            for track_id in track_ids
+        },
+    )
+    store.record_acceptance(session.id, TRACKS, TRACKS // 2)
+
+
+@pytest.mark.skipif(not STATM.exists(), reason="needs /proc/self/statm")
+def test_rss_stays_flat_under_sustained_session_churn() -> None:
+    max_bytes = 16 * 1024 * 1024
+    store = SessionStore(max_bytes=max_bytes)
+    rng = np.random.default_rng(0)
+    # warm up past the cap so the store, allocator arenas and metrics are at steady state
+    for _ in range(300):
+        _one_session(store, rng)
+    gc.collect()
+    baseline = _rss_bytes()
+
+    # ~400 MB of embeddings flow through; unbounded, RSS would grow by about that much
+    for _ in range(2000):
+        _one_session(store, rng)
+    gc.collect()
+    growth = _rss_bytes() - baseline
+
+    assert store.resident_bytes <= max_bytes
+    assert store.session_count() < 2000
+    assert growth < 32 * 1024 * 1024, f"RSS grew {growth / 2**20:.1f} MB"
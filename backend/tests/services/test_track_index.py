@@ -0,0 +1,130 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from suno_backend.app.services import track_index as track_index_module
+from suno_backend.app.services.track_index import IndexedTrack, TrackIndex
+
+
+def _tracks(n: int, session: str = "s1", start: int = 0, created_at: float = 0.0):
+    return [IndexedTrack(f"t{start + i}", session, created_at, f"/media/{session}/t{start + i}.wav") for i in range(n)]
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.argsort(-(unit @ (query / np.linalg.norm(query))))[:k].tolist()
+
+
+def test_flat_search_ranks_by_cosine() -> None:
+    index = TrackIndex()
+    index.add(_tracks(3), [np.array([1.0, 0.0]), np.array([0.6, 0.8]), np.array([0.0, 2.0])])
+
+    matches = index.search(np.array([1.0, 0.1]), k=2)
+
+    assert [m.track.track_id for m in matches] == ["t0", "t1"]
+    assert matches[0].score == pytest.approx(0.995, abs=1e-3)
+    assert [m.track.track_id for m in index.similar("t2", k=5)] == ["t1", "t0"]
+    assert index.similar("missing") is None
+
+
+def test_duplicate_ids_are_skipped_and_dim_is_enforced() -> None:
+    index = TrackIndex()
+    index.add(_tracks(2), [np.ones(4), np.ones(4)])
+    index.add(_tracks(2), [np.ones(4), np.ones(4)])
+    assert len(index) == 2
+    with pytest.raises(ValueError):
+        index.add(_tracks(1, start=9), [np.ones(3)])
+
+
+def test_session_and_time_filters() -> None:
+    index = TrackIndex()
+    index.add(_tracks(2, "a", created_at=100.0), [np.array([1.0, 0.0]), np.array([0.9, 0.1])])
+    index.add(_tracks(2, "b", start=2, created_at=200.0), [np.array([1.0, 0.0]), np.array([0.0, 1.0])])
+    query = np.array([1.0, 0.0])
+
+    assert {m.track.track_id for m in index.search(query, k=10, session_id="b")} == {"t2", "t3"}
+    assert [m.track.track_id for m in index.search(query, k=10, since=150.0)] == ["t2", "t3"]
+    assert {m.track.track_id for m in index.search(query, k=10, until=150.0)} == {"t0", "t1"}
+    assert index.search(query, k=10, session_id="nope") == []
+
+
+def test_ivf_recall_after_background_training(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(track_index_module, "MIN_TRAIN_ROWS", 2000)
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    vectors = (centers[rng.integers(0, 20, size=3000)] + 0.3 * rng.normal(size=(3000, 32))).astype(np.float32)
+    index = TrackIndex(nprobe=8)
+    for start in range(0, 3000, 500):
+        index.add(_tracks(500, start=start), vectors[start : start + 500])
+    deadline = time.monotonic() + 30
+    while not index.trained and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert index.trained
+
+    hits = 0
+    for q in range(50):
+        query = vectors[q * 7] + 0.05 * rng.normal(size=32)
+        expected = set(_brute_force(vectors, query, 10))
+        got = {int(m.track.track_id[1:]) for m in index.search(query, k=10)}
+        hits += len(expected & got)
+    assert hits / 500 >= 0.9
+
+
+def test_persists_and_reloads_incrementally(tmp_path: Path) -> None:
+    index = TrackIndex(tmp_path)
+    index.add(_tracks(2), [np.array([1.0, 0.0]), np.array([0.0, 1.0])])
+    index.add(_tracks(1, start=2), [np.array([0.7, 0.7])])
+
+    reloaded = TrackIndex(tmp_path)
+
+    assert len(reloaded) == 3
+    assert reloaded.get("t2") == IndexedTrack("t2", "s1", 0.0, "/media/s1/t2.wav")
+    assert [m.track.track_id for m in reloaded.similar("t0", k=1)] == ["t2"]
+
+
+def test_removed_tracks_are_never_returned_and_stay_removed(tmp_path: Path) -> None:
+    index = TrackIndex(tmp_path)
+    index.add(_tracks(2, "a"), [np.array([1.0, 0.0]), np.array([0.9, 0.1])])
+    index.add(_tracks(2, "b", start=2), [np.array([1.0, 0.1]), np.array([0.0, 1.0])])
+
+    assert index.remove(["t1", "missing"]) == 1
+    assert index.remove_session("b") == 2
+    assert index.remove_session("b") == 0
+
+    for reloaded in (index, TrackIndex(tmp_path)):
+        assert len(reloaded) == 1
+        assert reloaded.get("t1") is None and reloaded.similar("t2") is None
+        assert [m.track.track_id for m in reloaded.search(np.array([1.0, 0.0]), k=10)] == ["t0"]
+        assert reloaded.search(np.array([1.0, 0.0]), k=10, session_id="b") == []
+
+
+def test_reload_drops_torn_tail(tmp_path: Path) -> None:
+    index = TrackIndex(tmp_path)
+    index.add(_tracks(2), [np.array([1.0, 0.0]), np.array([0.0, 1.0])])
+    with open(tmp_path / "vectors.f32", "ab") as handle:
+        np.array([0.5, 0.5], dtype=np.float32).tofile(handle)  # vector without metadata
+
+    reloaded = TrackIndex(tmp_path)
+    assert len(reloaded) == 2
+    reloaded.add(_tracks(1, start=2), [np.array([0.5, 0.5])])
+    assert len(TrackIndex(tmp_path)) == 3
+
+
+def test_trained_index_reloads_its_lists(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(track_index_module, "MIN_TRAIN_ROWS", 256)
+    vectors = np.random.default_rng(1).normal(size=(400, 8)).astype(np.float32)
+    index = TrackIndex(tmp_path, nprobe=4)
+    index.add(_tracks(300), vectors[:300])
+    deadline = time.monotonic() + 30
+    while not index.trained and time.monotonic() < deadline:
+        time.sleep(0.05)
+    index.add(_tracks(100, start=300), vectors[300:])
+
+    reloaded = TrackIndex(tmp_path, nprobe=4)
+
+    assert reloaded.trained and len(reloaded) == 400
+    for row in (0, 150, 399):
+        assert reloaded.search(vectors[row], k=1)[0].track.track_id == f"t{row}"
+        assert [m.track for m in reloaded.similar(f"t{row}", k=3)] == [m.track for m in index.similar(f"t{row}", k=3)]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import io
+import logging
+import logging.handlers
+import threading
+
+import pytest
+
+from suno_backend.app.logging_config import SAMPLED, configure_logging, stop_logging
+from suno_backend.app.request_context import bind_request_id, bind_session
+
+
+@pytest.fixture
+def restore_root_level():
+    root = logging.getLogger()
+    level = root.level
+    yield
+    configure_logging(level=level, use_queue=False, sample_rate=1.0)
+    root.setLevel(level)
+
+
+@pytest.mark.parametrize("use_queue", [True, False])
+def test_records_carry_request_context(restore_root_level, use_queue: bool) -> None:
+    stream = io.StringIO()
+    configure_logging(level="INFO", use_queue=use_queue, stream=stream)
+    logger = logging.getLogger("suno_backend.test")
+
+    with bind_request_id("req123"), bind_session("sess-1"):
+        logger.info("hello %s", "world")
+    logger.info("outside")
+    stop_logging()
+
+    lines = stream.getvalue().splitlines()
+    assert "INFO:suno_backend.test:[req=req123 session=sess-1] hello world" in lines
+    assert "INFO:suno_backend.test:[req=- session=-] outside" in lines
+
+
+def test_queued_records_keep_args_and_format_on_the_listener(
+    restore_root_level, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    formatted_on = []
+    original_format = logging.Formatter.format
+
+    def recording_format(self: logging.Formatter, record: logging.LogRecord) -> str:
+        formatted_on.append(threading.current_thread().name)
+        return original_format(self, record)
+
+    monkeypatch.setattr(logging.Formatter, "format", recording_format)
+    stream = io.StringIO()
+    configure_logging(level="INFO", use_queue=True, stream=stream)
+    root = logging.getLogger()
+    # pytest's capture handlers would format the record on this thread
+    others = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    for handler in others:
+        root.removeHandler(handler)
+    try:
+        state = {"step": 1}
+        logging.getLogger("suno_backend.test.queue").info("state %s", state)
+        state["step"] = 2  # mutated after the call, before the listener writes
+        stop_logging()
+    finally:
+        for handler in others:
+            root.addHandler(handler)
+
+    assert "state {'step': 1}" in stream.getvalue()
+    assert formatted_on and threading.current_thread().name not in formatted_on
+
+
+def test_sampled_records_are_thinned_at_info(restore_root_level) -> None:
+    stream = io.StringIO()
+    configure_logging(level="INFO", use_queue=False, sample_rate=0.25, stream=stream)
+    logger = logging.getLogger("suno_backend.test.sampled")
+
+    for i in range(20):
+        logger.info("clip %s", i, extra=SAMPLED)
+    logger.warning("always kept", extra=SAMPLED)
+
+    lines = stream.getvalue().splitlines()
+    assert sum("clip" in line for line in lines) == 5
+    assert any("always kept" in line for line in lines)
+
+
+def test_sampled_records_all_pass_at_debug(restore_root_level) -> None:
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", use_queue=False, sample_rate=0.25, stream=stream)
+    logger = logging.getLogger("suno_backend.test.debug")
+
+    for i in range(8):
+        logger.info("clip %s", i, extra=SAMPLED)
+
+    assert sum("clip" in line for line in stream.getvalue().splitlines()) == 8
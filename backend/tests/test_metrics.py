@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from suno_backend.app.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = Registry()
+    hist = registry.register(Histogram("stage_seconds", "stage time", ("stage",), buckets=(0.1, 1.0)))
+
+    hist.observe(0.05, stage="embed")
+    hist.observe(0.1, stage="embed")
+    hist.observe(3.0, stage="embed")
+
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="embed",le="0.1"} 2' in text
+    assert 'stage_seconds_bucket{stage="embed",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="embed",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="embed"} 3' in text
+    assert 'stage_seconds_sum{stage="embed"} 3.15' in text
+
+
+def test_counter_and_gauge_render() -> None:
+    registry = Registry()
+    counter = registry.register(Counter("clips_total", "clips", ("reason",)))
+    gauge = registry.register(Gauge("resident", "resident sessions", callback=lambda: 4))
+
+    counter.inc(reason='a "quoted" value')
+    counter.inc(2, reason='a "quoted" value')
+
+    text = registry.render()
+    assert 'clips_total{reason="a \\"quoted\\" value"} 3' in text
+    assert "resident 4" in text
+    assert gauge.value() == 4
+
+
+def test_metric_validation() -> None:
+    registry = Registry()
+    counter = registry.register(Counter("c_total", "c", ("stage",)))
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, stage="x")
+    with pytest.raises(ValueError):
+        registry.register(Counter("c_total", "dup"))
+
+
+def test_histogram_time_context_manager() -> None:
+    hist = Histogram("t_seconds", "t")
+    with hist.time():
+        pass
+    assert hist.count() == 1
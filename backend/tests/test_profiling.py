@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from suno_backend.app.profiling import ProfilerBusyError, ProfileStore, active_profile, run_profiled
+
+
+def _hot_loop() -> int:
+    return sum(i * i for i in range(20000))
+
+
+def test_capture_writes_cprofile_and_sections(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path)
+    with store.capture("unit", metadata={"request_id": "abc"}) as capture:
+        assert active_profile() is capture
+        _hot_loop()
+        capture.add_section("torch_clap.txt", "table one")
+        capture.add_section("torch_clap.txt", "table two")
+    assert active_profile() is None
+
+    meta = store.get(capture.profile_id)
+    assert meta is not None
+    assert meta["request_id"] == "abc"
+    assert meta["error"] is None
+    assert {"cprofile.pstats", "cprofile.txt", "torch_clap.txt", "meta.json"} <= set(meta["artifacts"])
+    assert "_hot_loop" in store.artifact_path(capture.profile_id, "cprofile.txt").read_text()
+    assert store.artifact_path(capture.profile_id, "torch_clap.txt").read_text() == "table one\n\ntable two"
+
+
+def _worker_loop() -> int:
+    return sum(i * 3 for i in range(20000))
+
+
+def test_pool_tasks_are_profiled_and_merged(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path)
+    assert run_profiled(_worker_loop) == _worker_loop()
+    with ThreadPoolExecutor(max_workers=2) as pool, store.capture("unit") as capture:
+        futures = [
+            pool.submit(contextvars.copy_context().run, run_profiled, _worker_loop) for _ in range(2)
+        ]
+        assert [future.result() for future in futures] == [_worker_loop()] * 2
+        # the request thread already has a profiler; running inline must not replace it
+        run_profiled(_hot_loop)
+
+    meta = store.get(capture.profile_id)
+    assert meta["profiled_threads"] == 3
+    text = store.artifact_path(capture.profile_id, "cprofile.txt").read_text()
+    assert "_worker_loop" in text
+    assert "_hot_loop" in text
+
+
+def test_capture_records_errors_and_still_saves(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path)
+    with pytest.raises(ValueError):
+        with store.capture("unit"):
+            raise ValueError("boom")
+    (meta,) = store.list()
+    assert meta["error"] == "ValueError: boom"
+
+
+def test_second_concurrent_capture_is_rejected(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path)
+    entered, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with store.capture("first"):
+            entered.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    entered.wait(5)
+    try:
+        with pytest.raises(ProfilerBusyError):
+            with store.capture("second"):
+                pass
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_oldest_profiles_are_pruned(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path, max_profiles=2)
+    ids = []
+    for _ in range(3):
+        with store.capture("unit") as capture:
+            ids.append(capture.profile_id)
+    assert [meta["profile_id"] for meta in store.list()] == ids[:0:-1]
+    assert store.get(ids[0]) is None
+
+
+def test_artifact_lookup_rejects_unknown_names(tmp_path: Path) -> None:
+    store = ProfileStore(tmp_path)
+    with store.capture("unit") as capture:
+        pass
+    assert store.artifact_path(capture.profile_id, "../meta.json") is None
+    assert store.get("../../etc") is None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import time
+
+from suno_backend.app.request_context import (
+    bind_deadline,
+    bind_session,
+    current_deadline,
+    current_session_key,
+    deadline_expired,
+    reserve_time,
+    time_budget,
+)
+
+
+def test_no_deadline_passes_stage_caps_through() -> None:
+    assert current_deadline() is None
+    assert time_budget(10.0) == 10.0
+    assert not deadline_expired()
+
+
+def test_nested_deadline_keeps_the_tighter_bound() -> None:
+    with bind_deadline(1.0) as outer:
+        with bind_deadline(60.0) as inner:
+            assert inner.expires_at == outer.expires_at
+        assert time_budget(10.0) <= 1.0
+    assert current_deadline() is None
+
+
+def test_reserve_time_shrinks_budget_for_earlier_stages() -> None:
+    with bind_deadline(10.0):
+        with reserve_time(2.0):
+            assert 7.5 < time_budget(10.0) <= 8.0
+        assert time_budget(10.0) > 9.0
+
+
+def test_reserve_time_is_clamped_to_a_share_of_the_remaining_budget() -> None:
+    with bind_deadline(4.0):
+        with reserve_time(5.0):
+            assert not deadline_expired()
+            assert 2.5 < time_budget(10.0) <= 3.0
+
+
+def test_deadline_expires() -> None:
+    with bind_deadline(0.01):
+        time.sleep(0.02)
+        assert deadline_expired()
+        assert time_budget(5.0) == 0.0
+
+
+def test_session_key_binding() -> None:
+    assert current_session_key() == "anonymous"
+    with bind_session("abc"):
+        assert current_session_key() == "abc"
+    assert current_session_key() == "anonymous"
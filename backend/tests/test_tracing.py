@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from suno_backend.app import tracing
+from suno_backend.app.tracing import (
+    NOOP_SPAN,
+    InMemorySpanExporter,
+    JsonlFileSpanExporter,
+    configure_tracing,
+    current_span,
+    start_span,
+)
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter)
+    yield exporter
+    configure_tracing(None)
+
+
+def test_disabled_tracing_yields_noop_span() -> None:
+    with start_span("work", {"k": 1}) as span:
+        assert span is NOOP_SPAN
+        assert current_span() is NOOP_SPAN
+
+
+def test_child_spans_share_trace_and_parent(exporter: InMemorySpanExporter) -> None:
+    with start_span("root") as root:
+        with start_span("child", {"clip.index": 0}) as child:
+            current_span().set_attribute("audio.frames", 480)
+    assert [span.name for span in exporter.spans] == ["child", "root"]
+    assert child.trace_id == root.trace_id
+    assert child.parent_span_id == root.span_id
+    assert root.parent_span_id is None
+    assert child.attributes == {"clip.index": 0, "audio.frames": 480}
+    assert root.status == "OK"
+    assert child.duration_ms is not None and child.duration_ms >= 0
+
+
+def test_exception_marks_span_error(exporter: InMemorySpanExporter) -> None:
+    with pytest.raises(ValueError):
+        with start_span("boom"):
+            raise ValueError("bad clip")
+    (span,) = exporter.by_name("boom")
+    assert span.status == "ERROR"
+    assert span.status_message == "ValueError: bad clip"
+    assert current_span() is NOOP_SPAN
+
+
+def test_jsonl_exporter_writes_one_line_per_span(tmp_path: Path) -> None:
+    path = tmp_path / "traces" / "spans.jsonl"
+    configure_tracing(JsonlFileSpanExporter(path))
+    try:
+        with start_span("root"):
+            with start_span("child", {"path": Path("a.wav")}):
+                pass
+    finally:
+        configure_tracing(None)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "root"]
+    assert lines[0]["parent_span_id"] == lines[1]["span_id"]
+    assert lines[0]["attributes"] == {"path": "a.wav"}
+    assert lines[1]["status"] == {"code": "OK", "message": None}
+
+
+def test_jsonl_exporter_writes_off_the_request_thread(tmp_path: Path, monkeypatch) -> None:
+    threads = []
+    dumps = json.dumps
+
+    def recording_dumps(obj, **kwargs):
+        threads.append(threading.current_thread().name)
+        return dumps(obj, **kwargs)
+
+    monkeypatch.setattr(tracing.json, "dumps", recording_dumps)
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonlFileSpanExporter(path)
+    configure_tracing(exporter)
+    try:
+        for index in range(50):
+            with start_span("clip", {"clip.index": index}):
+                pass
+    finally:
+        configure_tracing(None)
+    exporter.shutdown()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["attributes"]["clip.index"] for line in lines] == list(range(50))
+    assert set(threads) == {"span-exporter"}